@@ -3,20 +3,34 @@ from __future__ import annotations
 from flask import Flask, render_template
 from flask_cors import CORS
 
+from .audit_sink import init_audit_sink
 from .config import Config, get_config
+from .data_versions import init_data_versions
+from .database import init_database
 from .extensions import db, login_manager, migrate
+from .job_queue import init_job_queue
+from .metrics import init_metrics
+from .serialization import init_json
+from .sql_profiler import init_sql_profiler
 
 
 def create_app(config_name: str | None = None) -> Flask:
     app = Flask(__name__)
     app_config: type[Config] = get_config(config_name)
     app.config.from_object(app_config)
+    init_json(app)
 
     CORS(app)
 
     db.init_app(app)
+    init_database(app)
+    init_data_versions(app)
+    init_metrics(app)
+    init_sql_profiler(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
+    init_audit_sink(app)
+    init_job_queue(app)
 
     from .auth.routes import bp as auth_bp
     from .companies.routes import bp as companies_bp
@@ -25,6 +39,8 @@ def create_app(config_name: str | None = None) -> Flask:
     from .finance.routes import bp as finance_bp
     from .tools.routes import bp as tools_bp
     from .admin.routes import bp as admin_bp
+    from .jobs.routes import bp as jobs_bp
+    from .imports.routes import bp as imports_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
     app.register_blueprint(companies_bp, url_prefix='/api/v1/companies')
@@ -33,6 +49,8 @@ def create_app(config_name: str | None = None) -> Flask:
     app.register_blueprint(finance_bp, url_prefix='/api/v1/finance')
     app.register_blueprint(tools_bp, url_prefix='/api/v1/tools')
     app.register_blueprint(admin_bp, url_prefix='/api/v1/admin')
+    app.register_blueprint(jobs_bp, url_prefix='/api/v1/jobs')
+    app.register_blueprint(imports_bp, url_prefix='/api/v1/imports')
 
     @app.get('/healthz')
     def healthz():
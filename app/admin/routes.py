@@ -1,76 +1,129 @@
 from __future__ import annotations
 
-from flask import request
+from flask import current_app, request
 from flask_login import login_required
+from sqlalchemy import select
 
+from ..ai_client import get_provider_stats
 from ..ai_service import (
     AI_MODEL_SETTING_KEY,
     get_model_preset,
     get_ai_model_settings,
     get_model_presets,
+    get_settings_cache_stats,
     save_ai_model_settings,
 )
-from ..api_utils import api_error, api_ok, require_platform_roles
+from ..api_utils import api_error, api_ok, keyset_paginate, parse_iso_datetime, require_platform_roles, stream_export
+from ..audit_sink import get_audit_sink
+from ..completion_cache import get_completion_cache
+from ..database import use_read_replica
 from ..extensions import db
+from ..job_queue import get_job_worker, get_queue_counts
 from ..models import AuditLog, Company, PlatformRole, UserAccount
+from ..serialization import RowSerializer
+from ..sql_profiler import get_sql_profiler
 from . import bp
 
+TENANT_FIELDS = RowSerializer('id', 'name', 'business_model', 'created_at')
+USER_FIELDS = RowSerializer('id', 'email', 'full_name', 'platform_role', 'company_id')
+AUDIT_FIELDS = RowSerializer(
+    'id', 'company_id', 'actor_user_id', 'action', 'resource_type', 'resource_id', 'details', 'created_at'
+)
+
 
 @bp.get('/tenants')
 @login_required
 @require_platform_roles(PlatformRole.PLATFORM_ADMIN)
+@use_read_replica
 def list_tenants():
-    tenants = Company.query.order_by(Company.created_at.desc()).all()
-    return api_ok([
-        {
-            'id': tenant.id,
-            'name': tenant.name,
-            'business_model': tenant.business_model,
-            'created_at': tenant.created_at.isoformat(),
-        }
-        for tenant in tenants
-    ])
+    try:
+        tenants, next_cursor = keyset_paginate(Company.query, Company.created_at, Company.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    return api_ok(TENANT_FIELDS.many(tenants), meta={'next_cursor': next_cursor})
 
 
 @bp.get('/users')
 @login_required
 @require_platform_roles(PlatformRole.PLATFORM_ADMIN)
+@use_read_replica
 def list_users():
-    users = UserAccount.query.order_by(UserAccount.id.desc()).all()
-    return api_ok([
-        {
-            'id': user.id,
-            'email': user.email,
-            'full_name': user.full_name,
-            'platform_role': user.platform_role.value,
-            'company_id': user.company_id,
-        }
-        for user in users
-    ])
+    try:
+        users, next_cursor = keyset_paginate(UserAccount.query, UserAccount.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    return api_ok(USER_FIELDS.many(users), meta={'next_cursor': next_cursor})
 
 
 @bp.get('/audits')
 @login_required
 @require_platform_roles(PlatformRole.PLATFORM_ADMIN)
+@use_read_replica
 def list_audits():
     company_id = request.args.get('company_id', type=int)
     query = AuditLog.query
     if company_id:
         query = query.filter_by(company_id=company_id)
-    logs = query.order_by(AuditLog.created_at.desc()).limit(200).all()
-    return api_ok([
+    try:
+        logs, next_cursor = keyset_paginate(query, AuditLog.created_at, AuditLog.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    return api_ok(AUDIT_FIELDS.many(logs), meta={'next_cursor': next_cursor})
+
+
+@bp.get('/audits/export')
+@login_required
+@require_platform_roles(PlatformRole.PLATFORM_ADMIN)
+@use_read_replica
+def export_audits():
+    statement = select(
+        AuditLog.id,
+        AuditLog.company_id,
+        AuditLog.actor_user_id,
+        AuditLog.action,
+        AuditLog.resource_type,
+        AuditLog.resource_id,
+        AuditLog.details,
+        AuditLog.ip_address,
+        AuditLog.created_at,
+    ).order_by(AuditLog.id)
+    company_id = request.args.get('company_id', type=int)
+    if company_id:
+        statement = statement.where(AuditLog.company_id == company_id)
+    try:
+        start = parse_iso_datetime(request.args.get('from'))
+        end = parse_iso_datetime(request.args.get('to'))
+    except ValueError:
+        return api_error('invalid_date')
+    if start:
+        statement = statement.where(AuditLog.created_at >= start)
+    if end:
+        statement = statement.where(AuditLog.created_at <= end)
+    return stream_export(statement, 'audit_log')
+
+
+@bp.get('/runtime')
+@login_required
+@require_platform_roles(PlatformRole.PLATFORM_ADMIN)
+def runtime_stats():
+    sink = get_audit_sink(current_app)
+    cache = get_completion_cache(current_app)
+    worker = get_job_worker(current_app)
+    profiler = get_sql_profiler(current_app)
+    return api_ok(
         {
-            'id': log.id,
-            'company_id': log.company_id,
-            'actor_user_id': log.actor_user_id,
-            'action': log.action,
-            'resource_type': log.resource_type,
-            'resource_id': log.resource_id,
-            'details': log.details,
-            'created_at': log.created_at.isoformat(),
+            'audit_sink': sink.snapshot() if sink else {'mode': 'sync'},
+            'ai_providers': get_provider_stats(),
+            'ai_settings_cache': get_settings_cache_stats(),
+            'completion_cache': cache.snapshot() if cache else {'enabled': False},
+            'jobs': {
+                'queue': get_queue_counts(),
+                'embedded_worker': worker.snapshot() if worker else None,
+            },
+            'sql_profiler': profiler.snapshot() if profiler else {'enabled': False},
+            'json_backend': current_app.json.backend,
         }
-        for log in logs
-    ])
+    )
 
 
 @bp.get('/settings/ai-model')
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import http.client
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+from flask import current_app
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class AIProviderError(Exception):
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(AIProviderError):
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class ProviderClient:
+    """Keep-alive connection pool, retries with jittered backoff and a circuit breaker for one ``base_url``."""
+
+    def __init__(self, base_url: str, config):
+        parts = urlsplit(base_url.rstrip('/'))
+        self.scheme = parts.scheme or 'https'
+        self.host = parts.hostname or ''
+        self.port = parts.port
+        self.base_path = parts.path
+        self.connect_timeout = config['AI_HTTP_CONNECT_TIMEOUT']
+        self.read_timeout = config['AI_HTTP_TIMEOUT']
+        self.max_retries = config['AI_HTTP_MAX_RETRIES']
+        self.backoff_base = config['AI_HTTP_BACKOFF_BASE']
+        self.backoff_max = config['AI_HTTP_BACKOFF_MAX']
+        self.breaker = CircuitBreaker(config['AI_CIRCUIT_FAILURE_THRESHOLD'], config['AI_CIRCUIT_RESET_SECONDS'])
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=config['AI_HTTP_POOL_SIZE'])
+        # Shared by every batch in the process so concurrent batches cannot stampede one provider.
+        self.batch_concurrency = config['AI_BATCH_CONCURRENCY']
+        self.batch_slots = threading.BoundedSemaphore(self.batch_concurrency)
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'connections_opened': 0, 'short_circuited': 0}
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(self.host, self.port, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+        # Headers and body go out in separate writes; without this Nagle stalls reused connections.
+        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats['connections_opened'] += 1
+        return connection
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _exchange(self, connection: http.client.HTTPConnection, method: str, path: str, body: bytes, headers: dict):
+        connection.request(method, f'{self.base_path}{path}', body=body, headers=headers)
+        return connection.getresponse()
+
+    def _send_once(self, method: str, path: str, body: bytes, headers: dict, stream: bool = False) -> tuple[int, dict, Any]:
+        connection, reused = self._acquire()
+        try:
+            try:
+                response = self._exchange(connection, method, path, body, headers)
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                connection = self._new_connection()
+                response = self._exchange(connection, method, path, body, headers)
+            if stream and response.status < 400:
+                return response.status, dict(response.getheaders()), (connection, response)
+            data = response.read()
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection, response)
+        return response.status, dict(response.getheaders()), data
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)].
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+    def request(self, method: str, path: str, body: bytes, headers: dict) -> bytes:
+        return self._perform(method, path, body, headers)
+
+    def stream(self, method: str, path: str, body: bytes, headers: dict) -> Iterator[bytes]:
+        """Send the request and yield the response body line by line as it arrives.
+
+        Retries and the circuit breaker apply until the response status is known;
+        errors after the first line reach the caller unchanged.
+        """
+        connection, response = self._perform(method, path, body, headers, stream=True)
+        completed = False
+        try:
+            while line := response.readline():
+                yield line
+            completed = True
+        finally:
+            if completed:
+                self._release(connection, response)
+            else:
+                # Abandoned mid-body (client went away): the connection cannot be reused.
+                connection.close()
+
+    def _perform(self, method: str, path: str, body: bytes, headers: dict, stream: bool = False):
+        if not self.breaker.allow():
+            self.stats['short_circuited'] += 1
+            raise CircuitOpenError('ai_provider_circuit_open')
+
+        self.stats['requests'] += 1
+        try:
+            return self._attempt(method, path, body, headers, stream)
+        except AIProviderError:
+            raise
+        except BaseException:
+            # Anything unexpected (a bug, SystemExit on worker abort) must still settle the breaker:
+            # a half-open probe that never reports back would short-circuit every later call.
+            self.stats['failures'] += 1
+            self.breaker.record_failure()
+            raise
+
+    def _attempt(self, method: str, path: str, body: bytes, headers: dict, stream: bool):
+        last_error: AIProviderError | None = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+            retry_after = None
+            try:
+                status, response_headers, data = self._send_once(method, path, body, headers, stream)
+            except (OSError, http.client.HTTPException) as exc:
+                last_error = AIProviderError(f'ai_provider_unreachable: {exc}')
+            else:
+                if status < 400:
+                    self.breaker.record_success()
+                    return data
+                last_error = AIProviderError(f'ai_provider_http_{status}', status=status)
+                if status not in RETRYABLE_STATUSES:
+                    # Client errors say nothing about provider health.
+                    self.breaker.record_success()
+                    raise last_error
+                retry_after = response_headers.get('Retry-After')
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        self.stats['failures'] += 1
+        self.breaker.record_failure()
+        raise last_error
+
+    def snapshot(self) -> dict:
+        return {**self.stats, 'circuit': self.breaker.state, 'idle_connections': self._pool.qsize()}
+
+
+_clients: dict[str, ProviderClient] = {}
+_clients_pid: int | None = None
+_clients_lock = threading.Lock()
+
+
+def get_provider_client(base_url: str) -> ProviderClient:
+    global _clients_pid
+    key = base_url.rstrip('/')
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            # Never share sockets inherited across a fork.
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ProviderClient(key, current_app.config)
+        return client
+
+
+def get_provider_stats() -> dict[str, dict]:
+    return {base_url: client.snapshot() for base_url, client in list(_clients.items())}
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 import json
-from typing import Any
-from urllib import request as urlrequest
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
 
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+
+from .ai_client import get_provider_client
+from .completion_cache import completion_cache_key, get_completion_cache
+from .extensions import db
+from .metrics import count_llm_cache_hit, count_llm_tokens, observe_llm_call, observe_llm_first_token
 from .models import SystemSetting
 
 AI_MODEL_SETTING_KEY = 'ai_model'
+SETTINGS_CHANGED_INFO_KEY = 'ai_settings_changed'
 
 MODEL_PRESETS: list[dict[str, str]] = [
     {
@@ -62,27 +73,115 @@ def get_model_preset(preset_id: str | None) -> dict[str, str] | None:
     return next((preset for preset in MODEL_PRESETS if preset['id'] == preset_id), None)
 
 
-def get_ai_model_settings() -> dict[str, Any]:
+class SettingsCache:
+    """Process-local cache of the AI model setting row.
+
+    An entry is served until ``ttl`` seconds pass or the stamp file's mtime moves.
+    Committing a settings change bumps the stamp, so every worker sharing the
+    instance directory reloads on its next call.
+    """
+
+    def __init__(self, ttl: float, stamp_path: str):
+        self.ttl = ttl
+        self.stamp_path = stamp_path
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value: dict[str, Any] = {}
+        self._stamp: int | None = None
+        self._loaded_at = 0.0
+
+    def _read_stamp(self) -> int | None:
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self, loader) -> dict[str, Any]:
+        stamp = self._read_stamp()
+        with self._lock:
+            if self._loaded and stamp == self._stamp and time.monotonic() - self._loaded_at < self.ttl:
+                self.stats['hits'] += 1
+                return dict(self._value)
+            self.stats['misses'] += 1
+        # The stamp is read before loading, so a bump racing with the load forces another reload.
+        value = loader()
+        with self._lock:
+            self._value, self._stamp, self._loaded_at, self._loaded = value, stamp, time.monotonic(), True
+        return dict(value)
+
+    def invalidate(self):
+        os.makedirs(os.path.dirname(self.stamp_path), exist_ok=True)
+        previous = self._read_stamp() or 0
+        with open(self.stamp_path, 'a', encoding='utf-8'):
+            pass
+        stamp = max(time.time_ns(), previous + 1)
+        os.utime(self.stamp_path, ns=(stamp, stamp))
+        with self._lock:
+            self._loaded = False
+            self.stats['invalidations'] += 1
+
+    def snapshot(self) -> dict:
+        return {**self.stats, 'ttl': self.ttl}
+
+
+def _get_settings_cache() -> SettingsCache:
+    cache = current_app.extensions.get('ai_settings_cache')
+    if cache is None:
+        cache = current_app.extensions['ai_settings_cache'] = SettingsCache(
+            current_app.config['AI_SETTINGS_CACHE_TTL'],
+            current_app.config.get('AI_SETTINGS_STAMP_FILE')
+            or os.path.join(current_app.instance_path, 'ai-settings.stamp'),
+        )
+    return cache
+
+
+def _load_ai_model_settings() -> dict[str, Any]:
     setting = SystemSetting.query.get(AI_MODEL_SETTING_KEY)
     return (setting.value or {}) if setting else {}
 
 
+def get_ai_model_settings() -> dict[str, Any]:
+    return _get_settings_cache().get(_load_ai_model_settings)
+
+
+def get_settings_cache_stats() -> dict:
+    return _get_settings_cache().snapshot()
+
+
 def save_ai_model_settings(payload: dict[str, Any]):
     setting = SystemSetting.query.get(AI_MODEL_SETTING_KEY)
     if not setting:
         setting = SystemSetting(key=AI_MODEL_SETTING_KEY, value={})
     setting.value = payload
+    # Invalidated once the surrounding transaction commits.
+    db.session.info[SETTINGS_CHANGED_INFO_KEY] = True
     return setting
 
 
-def generate_employee_agent_prompt(name: str, primary_tasks: str | None, company_role: str) -> str:
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_settings_cache(session):
+    if session.info.pop(SETTINGS_CHANGED_INFO_KEY, False):
+        _get_settings_cache().invalidate()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_settings_change(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(SETTINGS_CHANGED_INFO_KEY, None)
+
+
+def _require_model_settings() -> tuple[str, str, str]:
     settings = get_ai_model_settings()
     base_url = (settings.get('base_url') or '').strip()
     api_key = (settings.get('api_key') or '').strip()
     model = (settings.get('model') or '').strip()
     if not base_url or not api_key or not model:
         raise ValueError('ai_model_not_configured')
+    return base_url, api_key, model
 
+
+def _employee_prompt_payload(model: str, name: str, primary_tasks: str | None, company_role: str) -> dict[str, Any]:
     prompt = (
         '请根据以下员工信息，生成一段简洁实用的智能体系统提示词，'
         '用于指导该员工的AI助手工作。输出中文，100-180字。\n'
@@ -90,53 +189,179 @@ def generate_employee_agent_prompt(name: str, primary_tasks: str | None, company
         f'公司角色: {company_role}\n'
         f'岗位职责: {primary_tasks or "未提供"}'
     )
+    return {
+        'model': model,
+        'messages': [
+            {'role': 'system', 'content': '你是企业组织管理顾问，擅长编写角色智能体提示词。'},
+            {'role': 'user', 'content': prompt},
+        ],
+        'temperature': 0.3,
+    }
 
-    payload = json.dumps(
-        {
-            'model': model,
-            'messages': [
-                {'role': 'system', 'content': '你是企业组织管理顾问，擅长编写角色智能体提示词。'},
-                {'role': 'user', 'content': prompt},
-            ],
-            'temperature': 0.3,
-        }
-    ).encode('utf-8')
 
-    return _call_chat_completion(base_url=base_url, api_key=api_key, payload=payload)
+def _structured_payload(model: str, system_prompt: str, user_prompt: str) -> dict[str, Any]:
+    return {
+        'model': model,
+        'messages': [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': user_prompt},
+        ],
+        'temperature': 0.2,
+    }
 
 
-def generate_structured_chat_completion(system_prompt: str, user_prompt: str) -> str:
-    settings = get_ai_model_settings()
-    base_url = (settings.get('base_url') or '').strip()
-    api_key = (settings.get('api_key') or '').strip()
-    model = (settings.get('model') or '').strip()
-    if not base_url or not api_key or not model:
-        raise ValueError('ai_model_not_configured')
+def generate_employee_agent_prompt(
+    name: str, primary_tasks: str | None, company_role: str, use_cache: bool = True
+) -> str:
+    base_url, api_key, model = _require_model_settings()
+    payload = _employee_prompt_payload(model, name, primary_tasks, company_role)
+    return _call_chat_completion(base_url=base_url, api_key=api_key, payload=payload, use_cache=use_cache)
 
-    payload = json.dumps(
-        {
-            'model': model,
-            'messages': [
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_prompt},
-            ],
-            'temperature': 0.2,
-        }
-    ).encode('utf-8')
-    return _call_chat_completion(base_url=base_url, api_key=api_key, payload=payload)
-
-
-def _call_chat_completion(base_url: str, api_key: str, payload: bytes) -> str:
-    req = urlrequest.Request(
-        f'{base_url.rstrip("/")}/chat/completions',
-        data=payload,
-        method='POST',
-        headers={
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json',
-        },
-    )
-    with urlrequest.urlopen(req, timeout=30) as response:
-        body = response.read().decode('utf-8')
-    data = json.loads(body)
-    return data['choices'][0]['message']['content'].strip()
+
+def generate_structured_chat_completion(system_prompt: str, user_prompt: str, use_cache: bool = True) -> str:
+    base_url, api_key, model = _require_model_settings()
+    payload = _structured_payload(model, system_prompt, user_prompt)
+    return _call_chat_completion(base_url=base_url, api_key=api_key, payload=payload, use_cache=use_cache)
+
+
+def generate_employee_agent_prompts(
+    employees: list[dict[str, Any]], use_cache: bool = True
+) -> list[tuple[str | None, str | None]]:
+    """Generate prompts for many employees concurrently, returning ``(prompt, error)`` per input.
+
+    Each item carries ``name``, ``primary_tasks`` and ``company_role``. At most
+    ``AI_BATCH_CONCURRENCY`` calls per provider are in flight across all batches
+    in the process; a failed call only fails its own item.
+    """
+    base_url, api_key, model = _require_model_settings()
+    use_cache = use_cache and not _cache_bypassed()
+    client = get_provider_client(base_url)
+    app = current_app._get_current_object()
+
+    def generate(employee: dict[str, Any]) -> tuple[str | None, str | None]:
+        payload = _employee_prompt_payload(model, employee['name'], employee.get('primary_tasks'), employee['company_role'])
+        with app.app_context(), client.batch_slots:
+            try:
+                return _call_chat_completion(base_url=base_url, api_key=api_key, payload=payload, use_cache=use_cache), None
+            except Exception as exc:
+                return None, str(exc) or exc.__class__.__name__
+
+    if not employees:
+        return []
+    with ThreadPoolExecutor(min(len(employees), client.batch_concurrency), thread_name_prefix='agent-prompt') as pool:
+        return list(pool.map(generate, employees))
+
+
+def stream_employee_agent_prompt(
+    name: str, primary_tasks: str | None, company_role: str, use_cache: bool = True
+) -> Iterator[str]:
+    """Like ``generate_employee_agent_prompt`` but yields text deltas as the provider produces them.
+
+    Settings are validated eagerly, so ``ai_model_not_configured`` is raised before
+    the caller starts a response.
+    """
+    base_url, api_key, model = _require_model_settings()
+    payload = _employee_prompt_payload(model, name, primary_tasks, company_role)
+    return _stream_chat_completion(base_url=base_url, api_key=api_key, payload=payload, use_cache=use_cache)
+
+
+def stream_structured_chat_completion(system_prompt: str, user_prompt: str, use_cache: bool = True) -> Iterator[str]:
+    base_url, api_key, model = _require_model_settings()
+    payload = _structured_payload(model, system_prompt, user_prompt)
+    return _stream_chat_completion(base_url=base_url, api_key=api_key, payload=payload, use_cache=use_cache)
+
+
+def _cache_bypassed() -> bool:
+    # Callers force a fresh completion with ``Cache-Control: no-cache``.
+    return has_request_context() and 'no-cache' in request.headers.get('Cache-Control', '')
+
+
+def _cache_lookup(base_url: str, payload: dict[str, Any], use_cache: bool):
+    cache = get_completion_cache(current_app)
+    if cache is None:
+        return None, None, None
+    key = completion_cache_key(payload['model'], base_url, payload['messages'], payload.get('temperature'))
+    cached = cache.get(key) if use_cache and not _cache_bypassed() else None
+    return cache, key, cached
+
+
+def _request_headers(api_key: str) -> dict[str, str]:
+    return {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+    }
+
+
+def _call_chat_completion(base_url: str, api_key: str, payload: dict[str, Any], use_cache: bool = True) -> str:
+    cache, key, cached = _cache_lookup(base_url, payload, use_cache)
+    if cached is not None:
+        count_llm_cache_hit(payload['model'])
+        return cached
+
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        body = get_provider_client(base_url).request(
+            'POST',
+            '/chat/completions',
+            body=json.dumps(payload).encode('utf-8'),
+            headers=_request_headers(api_key),
+        )
+        data = json.loads(body.decode('utf-8'))
+        content = data['choices'][0]['message']['content'].strip()
+        outcome = 'ok'
+    finally:
+        observe_llm_call(payload['model'], 'request', time.perf_counter() - started, outcome)
+    count_llm_tokens(payload['model'], data.get('usage'))
+    if cache is not None:
+        cache.set(key, content)
+    return content
+
+
+def _stream_chat_completion(
+    base_url: str, api_key: str, payload: dict[str, Any], use_cache: bool = True
+) -> Iterator[str]:
+    cache, key, cached = _cache_lookup(base_url, payload, use_cache)
+    if cached is not None:
+        count_llm_cache_hit(payload['model'])
+        yield cached
+        return
+
+    model = payload['model']
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        lines = get_provider_client(base_url).stream(
+            'POST',
+            '/chat/completions',
+            body=json.dumps({**payload, 'stream': True}).encode('utf-8'),
+            headers={**_request_headers(api_key), 'Accept': 'text/event-stream'},
+        )
+        parts = []
+        finished = False
+        for raw in lines:
+            line = raw.decode('utf-8').strip()
+            # Keep reading past [DONE] so the body is fully consumed and the connection can be reused.
+            if finished or not line.startswith('data:'):
+                continue
+            data = line[len('data:') :].strip()
+            if data == '[DONE]':
+                finished = True
+                continue
+            chunk = json.loads(data)
+            # Only providers that attach usage to stream chunks are counted here.
+            count_llm_tokens(model, chunk.get('usage'))
+            choices = chunk.get('choices') or []
+            delta = (choices[0].get('delta') or {}).get('content') if choices else None
+            if delta:
+                if not parts:
+                    observe_llm_first_token(model, time.perf_counter() - started)
+                parts.append(delta)
+                yield delta
+        outcome = 'ok'
+    finally:
+        # A consumer that stops iterating early (client disconnect) lands here through GeneratorExit.
+        observe_llm_call(model, 'stream', time.perf_counter() - started, outcome)
+
+    if cache is not None:
+        cache.set(key, ''.join(parts).strip())
@@ -1,17 +1,34 @@
 from __future__ import annotations
 
-from datetime import datetime
+import base64
+import csv
+import enum
+import hashlib
+import io
+import json
+from datetime import datetime, timezone
 from functools import wraps
 
-from flask import jsonify, request
+from flask import Response, current_app, jsonify, request, stream_with_context
 from flask_login import current_user
+from sqlalchemy import DateTime, and_, or_
 
+from .audit_sink import get_audit_sink, queue_audit
+from .data_versions import get_company_data_version
 from .extensions import db
 from .models import AuditLog, PlatformRole
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
 
-def api_ok(data=None, message='ok', code=0, status=200):
-    return jsonify({'code': code, 'message': message, 'data': data}), status
+
+def api_ok(data=None, message='ok', code=0, status=200, meta=None):
+    payload = {'code': code, 'message': message, 'data': data}
+    if meta is not None:
+        payload['meta'] = meta
+    return jsonify(payload), status
 
 
 def api_error(message='error', code=1, status=400):
@@ -39,6 +56,63 @@ def ensure_company_scope(company_id: int):
     return current_user.company_id == company_id
 
 
+def requested_company_id(**view_args) -> int | None:
+    """``?company_id=``, defaulting to the caller's company (a ``conditional_get`` resolver)."""
+    return request.args.get('company_id', type=int) or current_user.company_id
+
+
+def _not_modified(etag: str, last_modified: datetime | None) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def conditional_get(company_of):
+    """Answer a GET with ``304 Not Modified`` while the company's data is unchanged.
+
+    ``company_of(**view_args)`` returns the company whose data the view renders.
+    Validators come from ``Company.data_version`` / ``data_changed_at``, bumped on
+    every commit that touches the company (see ``app.data_versions``), so a
+    revalidation costs one primary-key lookup instead of loading the rows. Views
+    that the company cannot be resolved for, or that the caller may not see, run
+    unchanged and report their own error.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            if not current_app.config['CONDITIONAL_GET_ENABLED']:
+                return func(*args, **kwargs)
+            company_id = company_of(**kwargs)
+            version = get_company_data_version(company_id) if company_id and ensure_company_scope(company_id) else None
+            if version is None:
+                return func(*args, **kwargs)
+
+            data_version, changed_at = version
+            # Per user and URL: the same version renders differently for other callers and query strings.
+            key = f'{company_id}:{data_version}:{current_user.get_id()}:{request.full_path}'
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+            last_modified = changed_at.replace(microsecond=0, tzinfo=timezone.utc) if changed_at else None
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(func(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Cached by the browser only, and always revalidated.
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapped
+
+    return decorator
+
+
 def parse_iso_datetime(value: str | None):
     if not value:
         return None
@@ -46,14 +120,179 @@ def parse_iso_datetime(value: str | None):
 
 
 def log_action(action: str, resource_type: str, resource_id: str | None = None, company_id: int | None = None, details: dict | None = None):
-    db.session.add(
-        AuditLog(
-            company_id=company_id,
-            actor_user_id=current_user.id if current_user.is_authenticated else None,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            details=details or {},
-            ip_address=request.remote_addr,
-        )
+    row = {
+        'company_id': company_id,
+        'actor_user_id': current_user.id if current_user.is_authenticated else None,
+        'action': action,
+        'resource_type': resource_type,
+        'resource_id': resource_id,
+        'details': details or {},
+        'ip_address': request.remote_addr,
+    }
+    sink = get_audit_sink(current_app)
+    if sink is None:
+        db.session.add(AuditLog(**row))
+        return
+    queue_audit(sink, {**row, 'created_at': datetime.utcnow()})
+
+
+def _encode_cursor(values: list) -> str:
+    serialized = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(serialized, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _cursor_value(column, value):
+    # Cursors come from the client: anything but a scalar of the column's type would reach the driver.
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError('invalid_cursor')
+        return datetime.fromisoformat(value)
+    expected = column.type.python_type
+    if expected is float:
+        expected = (int, float)
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError('invalid_cursor')
+    return value
+
+
+def _decode_cursor(cursor: str, columns) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('invalid_cursor')
+        return [_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise ValueError('invalid_cursor') from None
+
+
+def _seek_condition(columns, values):
+    # (c1, c2, ...) < (v1, v2, ...) expanded for portability; the redundant ``c1 <= v1``
+    # bound lets the planner turn the seek into an index range scan.
+    clauses = []
+    for index, column in enumerate(columns):
+        equals = [columns[i] == values[i] for i in range(index)]
+        clauses.append(and_(*equals, column < values[index]))
+    if len(columns) == 1:
+        return clauses[0]
+    return and_(columns[0] <= values[0], or_(*clauses))
+
+
+def keyset_paginate(query, *columns):
+    """Return one page of ``query`` ordered by ``columns`` descending, plus the next page cursor.
+
+    ``limit`` and ``cursor`` are read from the query string. Pages seek past the last
+    key of the previous page instead of using OFFSET, so every page costs the same.
+    The last column must be unique (normally the primary key).
+    Raises ``ValueError('invalid_cursor')`` for a cursor that cannot be decoded.
+    """
+    limit = request.args.get('limit', type=int) or DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.filter(_seek_condition(columns, _decode_cursor(cursor, columns)))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def stream_export(statement, filename: str):
+    """Stream the rows of a column ``select()`` as NDJSON or CSV (``?format=``).
+
+    Rows are fetched ``EXPORT_CHUNK_SIZE`` at a time with ``yield_per`` (a server-side
+    cursor where the driver supports it) and written out chunk by chunk, so memory
+    stays flat regardless of the export size.
+    """
+    fmt = (request.args.get('format') or 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return api_error('invalid_format')
+    columns = [column.name for column in statement.selected_columns]
+
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(columns)
+        for partition in result.partitions():
+            for row in partition:
+                values = [_export_value(value) for value in row]
+                if writer:
+                    writer.writerow(
+                        json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                        for value in values
+                    )
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'},
+    )
+
+
+def iter_batch_items():
+    """Yield ``(index, item)`` from a JSON array body, an NDJSON stream or a CSV upload.
+
+    NDJSON and CSV are read incrementally; CSV rows become dicts keyed on the
+    header row with empty cells dropped. Unparseable NDJSON lines yield ``None``.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        index = 0
+        for line in io.BufferedReader(request.stream, buffer_size=64 * 1024):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, None
+            index += 1
+        return
+    if request.mimetype == 'text/csv':
+        text = io.TextIOWrapper(io.BufferedReader(request.stream, buffer_size=64 * 1024), encoding='utf-8-sig', newline='')
+        for index, row in enumerate(csv.DictReader(text)):
+            yield index, {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+        return
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise ValueError('invalid_payload')
+    yield from enumerate(data)
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events message."""
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+def sse_response(events):
+    """Stream an iterable of ``sse_event`` strings as ``text/event-stream``."""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        # Keep proxies (nginx) from buffering the stream.
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
     )
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from flask import Flask
+from sqlalchemy import event, insert
+
+from .extensions import db
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+PENDING_AUDITS_KEY = 'pending_audits'
+STAGED_AUDITS_KEY = 'staged_audits'
+SPOOL_PREFIX = 'audit-'
+SPOOL_SUFFIX = '.ndjson'
+STAGED_SUFFIX = '.staged'
+
+
+def _encode(row: dict) -> str:
+    return json.dumps({**row, 'created_at': row['created_at'].isoformat()}, ensure_ascii=False)
+
+
+def _decode(line: str) -> dict:
+    row = json.loads(line)
+    row['created_at'] = datetime.fromisoformat(row['created_at'])
+    return row
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditSink:
+    """Bounded in-process audit queue flushed in bulk by a background thread.
+
+    A transaction's rows are staged in their own spool file before it commits
+    (``stage``) and moved to the queue after it commits (``submit``), which
+    appends them to a per-process spool segment. A flush rotates the segment,
+    bulk-inserts the queued rows and deletes the segment on success. Segments and
+    staged files left behind by failed flushes or crashed processes are replayed
+    on the next flush, so delivery is at-least-once: a crash during the commit
+    itself can replay the rows of a transaction that did not commit.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.queue_size = app.config['AUDIT_SINK_QUEUE_SIZE']
+        self.batch_size = app.config['AUDIT_SINK_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_SINK_FLUSH_INTERVAL']
+        self.fsync = app.config['AUDIT_SINK_FSYNC']
+        self.spool_dir = Path(app.config.get('AUDIT_SINK_SPOOL_DIR') or os.path.join(app.instance_path, 'audit-spool'))
+        self.stats = {
+            'enqueued': 0,
+            'flushed': 0,
+            'replayed': 0,
+            'overflow': 0,
+            'failed_flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'last_flush_at': None,
+        }
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._start()
+
+    def _start(self):
+        # First use in this process (or after a fork): state inherited from the parent is not ours.
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._queue: list[dict] = []
+        self._segment_seq = 0
+        self._staged_seq = itertools.count(1)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        self._segment_path = self.spool_dir / f'{SPOOL_PREFIX}{os.getpid()}-{self._segment_seq}{SPOOL_SUFFIX}'
+        self._segment = open(self._segment_path, 'a', encoding='utf-8')
+
+    def stage(self, rows: list[dict]) -> Path:
+        """Spool ``rows`` of a transaction about to commit; unlink the file once it is settled."""
+        self._ensure_started()
+        path = self.spool_dir / f'{SPOOL_PREFIX}{os.getpid()}-staged{next(self._staged_seq)}{STAGED_SUFFIX}'
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(''.join(_encode(row) + '\n' for row in rows))
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+        return path
+
+    def submit(self, rows: list[dict]) -> list[dict]:
+        """Queue ``rows`` and return the ones that did not fit in the bounded queue."""
+        self._ensure_started()
+        with self._lock:
+            room = max(self.queue_size - len(self._queue), 0)
+            accepted, overflow = rows[:room], rows[room:]
+            if accepted:
+                self._segment.write(''.join(_encode(row) + '\n' for row in accepted))
+                self._segment.flush()
+                if self.fsync:
+                    os.fsync(self._segment.fileno())
+                self._queue.extend(accepted)
+                self.stats['enqueued'] += len(accepted)
+            self.stats['overflow'] += len(overflow)
+            depth = len(self._queue)
+        if depth >= self.batch_size:
+            self._wakeup.set()
+        return overflow
+
+    def queue_depth(self) -> int:
+        if self._pid != os.getpid():
+            return 0
+        return len(self._queue)
+
+    def snapshot(self) -> dict:
+        return {
+            'mode': 'async',
+            'queue_depth': self.queue_depth(),
+            'queue_size': self.queue_size,
+            **self.stats,
+        }
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('audit sink flush failed')
+
+    def flush(self) -> int:
+        if self._pid != os.getpid():
+            return 0
+        with self._flush_lock:
+            self._replay_spool()
+            with self._lock:
+                if not self._queue:
+                    return 0
+                rows, self._queue = self._queue, []
+                self._segment.close()
+                closed_segment = self._segment_path
+                self._open_segment()
+
+            started = time.perf_counter()
+            try:
+                self._insert(rows)
+            except Exception:
+                # The closed segment stays on disk and is replayed by the next flush.
+                self.stats['failed_flushes'] += 1
+                logger.exception('audit sink failed to write %s rows, kept in %s', len(rows), closed_segment)
+                return 0
+            closed_segment.unlink(missing_ok=True)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stats['flushed'] += len(rows)
+            self.stats['last_flush_ms'] = round(elapsed_ms, 3)
+            self.stats['max_flush_ms'] = round(max(self.stats['max_flush_ms'], elapsed_ms), 3)
+            self.stats['last_flush_at'] = datetime.utcnow().isoformat()
+            return len(rows)
+
+    def _insert(self, rows: list[dict]):
+        with self.app.app_context():
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    db.session.execute(insert(AuditLog), rows[start : start + self.batch_size])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _replay_spool(self):
+        for path in sorted(self.spool_dir.glob(f'{SPOOL_PREFIX}*')):
+            if path == self._segment_path or path.suffix not in (SPOOL_SUFFIX, STAGED_SUFFIX):
+                continue
+            try:
+                owner = int(path.name[len(SPOOL_PREFIX) :].split('-', 1)[0])
+            except ValueError:
+                continue
+            if owner == self._pid and path.suffix == STAGED_SUFFIX:
+                # Our own transaction is still committing.
+                continue
+            if owner != self._pid and _pid_alive(owner):
+                continue
+            claimed = path
+            if owner != self._pid:
+                # Claim another process's leftovers atomically so only one worker replays them.
+                self._segment_seq += 1
+                claimed = self.spool_dir / f'{SPOOL_PREFIX}{self._pid}-replay{self._segment_seq}{SPOOL_SUFFIX}'
+                try:
+                    os.rename(path, claimed)
+                except FileNotFoundError:
+                    continue
+
+            rows = []
+            with open(claimed, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        rows.append(_decode(line))
+                    except (ValueError, KeyError):
+                        logger.warning('skipping unreadable audit spool line in %s', claimed)
+            try:
+                if rows:
+                    self._insert(rows)
+            except Exception:
+                self.stats['failed_flushes'] += 1
+                logger.exception('audit sink failed to replay %s', claimed)
+                return
+            claimed.unlink(missing_ok=True)
+            self.stats['replayed'] += len(rows)
+
+
+def get_audit_sink(app: Flask) -> AuditSink | None:
+    return app.extensions.get('audit_sink')
+
+
+def init_audit_sink(app: Flask):
+    if app.config.get('AUDIT_SINK', 'sync') != 'async':
+        return
+    app.extensions['audit_sink'] = AuditSink(app)
+    _register_session_hooks()
+
+
+_hooks_registered = False
+
+
+def _register_session_hooks():
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    _hooks_registered = True
+
+    @event.listens_for(db.session, 'before_commit')
+    def _stage_pending(session):
+        # Spool before the commit so a crash right after it cannot lose the rows.
+        pending = session.info.get(PENDING_AUDITS_KEY)
+        if pending and STAGED_AUDITS_KEY not in session.info:
+            sink, rows = pending
+            session.info[STAGED_AUDITS_KEY] = sink.stage(rows)
+
+    @event.listens_for(db.session, 'after_commit')
+    def _submit_pending(session):
+        pending = session.info.pop(PENDING_AUDITS_KEY, None)
+        staged = session.info.pop(STAGED_AUDITS_KEY, None)
+        if not pending:
+            return
+        sink, rows = pending
+        overflow = sink.submit(rows)
+        if overflow:
+            # The queue is full: fall back to a direct synchronous write.
+            with session.get_bind(mapper=AuditLog).begin() as connection:
+                connection.execute(insert(AuditLog), overflow)
+        if staged is not None:
+            staged.unlink(missing_ok=True)
+
+    @event.listens_for(db.session, 'after_soft_rollback')
+    def _discard_pending(session, previous_transaction):
+        if not session.in_transaction():
+            session.info.pop(PENDING_AUDITS_KEY, None)
+            staged = session.info.pop(STAGED_AUDITS_KEY, None)
+            if staged is not None:
+                staged.unlink(missing_ok=True)
+
+
+def queue_audit(sink: AuditSink, row: dict):
+    """Hold ``row`` until the current transaction commits, then hand it to ``sink``."""
+    session = db.session()
+    if not session.in_transaction():
+        # Make sure a later rollback() emits events and discards the row.
+        session.begin()
+    pending = session.info.setdefault(PENDING_AUDITS_KEY, (sink, []))
+    pending[1].append(row)
@@ -5,11 +5,17 @@ import json
 from flask import request
 from flask_login import current_user, login_required
 
-from ..api_utils import api_error, api_ok, ensure_company_scope, log_action
+from ..api_utils import api_error, api_ok, conditional_get, ensure_company_scope, log_action
+from ..database import use_read_replica
 from ..extensions import db
 from ..models import Company, UserAccount
+from ..org_roles import sync_organization_roles
+from ..serialization import RowSerializer
 from . import bp
 
+COMPANY_FIELDS = RowSerializer('id', 'name', 'business_model', 'description', 'accounting_method', 'capital')
+
+
 def _normalize_organization_structure(data: dict):
     if 'organization_structure_lines' in data and 'organization_structure' not in data:
         rows = []
@@ -51,6 +57,7 @@ def create_company():
     )
     db.session.add(company)
     db.session.flush()
+    sync_organization_roles(company)
 
     current_user.company_id = company.id
     log_action('company.create', 'company', str(company.id), company.id, {'name': company.name})
@@ -60,26 +67,19 @@ def create_company():
 
 @bp.get('')
 @login_required
+@use_read_replica
 def list_companies():
     if current_user.company_id:
         companies = Company.query.filter_by(id=current_user.company_id).all()
     else:
         companies = Company.query.order_by(Company.id.desc()).all()
-    return api_ok([
-        {
-            'id': c.id,
-            'name': c.name,
-            'business_model': c.business_model,
-            'description': c.description,
-            'accounting_method': c.accounting_method,
-            'capital': c.capital,
-        }
-        for c in companies
-    ])
+    return api_ok(COMPANY_FIELDS.many(companies))
 
 
 @bp.get('/<int:company_id>')
 @login_required
+@use_read_replica
+@conditional_get(lambda company_id: company_id)
 def get_company(company_id: int):
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
@@ -121,6 +121,8 @@ def update_company(company_id: int):
     ]:
         if field in data:
             setattr(company, field, data.get(field))
+    if 'organization_structure' in data:
+        sync_organization_roles(company)
 
     log_action('company.update', 'company', str(company.id), company.id, {'name': company.name})
     db.session.commit()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Flask
+
+
+def completion_cache_key(model: str, base_url: str, messages: list[dict], temperature: float | None) -> str:
+    """Content address of a chat completion request."""
+    material = json.dumps(
+        {'model': model, 'base_url': base_url.rstrip('/'), 'messages': messages, 'temperature': temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier completion cache: an in-process LRU in front of an optional shared SQLite file.
+
+    Both tiers expire entries after ``ttl`` seconds and evict least recently used
+    entries beyond their size limits. The disk tier is shared by every worker on
+    the host; a disk hit is promoted into the memory tier. Disk eviction runs once
+    every ``disk_evict_interval`` writes per process (reads already skip expired
+    rows), so the file can briefly exceed ``disk_max_entries`` by that many rows
+    per worker.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        disk_path: str | None = None,
+        disk_max_entries: int = 0,
+        disk_evict_interval: int = 256,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self.disk_evict_interval = max(1, disk_evict_interval)
+        self._disk_writes = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if not self.disk_path:
+            return None
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            connection = sqlite3.connect(self.disk_path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS completion_cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_completion_cache_accessed_at ON completion_cache (accessed_at)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_completion_cache_created_at ON completion_cache (created_at)')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _remember(self, key: str, created_at: float, value: str):
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        connection = self._connection()
+        if connection is not None:
+            row = connection.execute(
+                'SELECT value, created_at FROM completion_cache WHERE key = ? AND created_at > ?', (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                connection.execute('UPDATE completion_cache SET accessed_at = ? WHERE key = ?', (now, key))
+                self._remember(key, row[1], row[0])
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                return row[0]
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        self._remember(key, now, value)
+        with self._lock:
+            self.stats['stores'] += 1
+
+        connection = self._connection()
+        if connection is not None:
+            connection.execute(
+                'INSERT OR REPLACE INTO completion_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, value, now, now),
+            )
+            with self._lock:
+                self._disk_writes += 1
+                due = self._disk_writes % self.disk_evict_interval == 0
+            if due:
+                self._evict_disk(connection, now)
+
+    def _evict_disk(self, connection: sqlite3.Connection, now: float):
+        removed = connection.execute('DELETE FROM completion_cache WHERE created_at <= ?', (now - self.ttl,)).rowcount
+        if self.disk_max_entries:
+            excess = connection.execute('SELECT COUNT(*) FROM completion_cache').fetchone()[0] - self.disk_max_entries
+            if excess > 0:
+                removed += connection.execute(
+                    'DELETE FROM completion_cache WHERE key IN '
+                    '(SELECT key FROM completion_cache ORDER BY accessed_at LIMIT ?)',
+                    (excess,),
+                ).rowcount
+        if removed:
+            with self._lock:
+                self.stats['evictions'] += removed
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        connection = self._connection()
+        if connection is not None:
+            connection.execute('DELETE FROM completion_cache')
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            memory_entries = len(self._memory)
+        return {
+            **self.stats,
+            'memory_entries': memory_entries,
+            'max_entries': self.max_entries,
+            'disk': bool(self.disk_path),
+            'ttl': self.ttl,
+        }
+
+
+def get_completion_cache(app: Flask) -> CompletionCache | None:
+    if not app.config.get('COMPLETION_CACHE_ENABLED'):
+        return None
+    cache = app.extensions.get('completion_cache')
+    if cache is None:
+        cache = app.extensions['completion_cache'] = CompletionCache(
+            ttl=app.config['COMPLETION_CACHE_TTL'],
+            max_entries=app.config['COMPLETION_CACHE_MAX_ENTRIES'],
+            disk_path=app.config.get('COMPLETION_CACHE_PATH'),
+            disk_max_entries=app.config['COMPLETION_CACHE_DISK_MAX_ENTRIES'],
+            disk_evict_interval=app.config['COMPLETION_CACHE_DISK_EVICT_INTERVAL'],
+        )
+    return cache
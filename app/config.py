@@ -14,16 +14,118 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     REMEMBER_COOKIE_DURATION = timedelta(days=14)
 
+    # Comma separated read-replica URLs; read-only views route there when set.
+    SQLALCHEMY_REPLICA_URIS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    # Seconds after a caller's last write during which their reads stay on the primary.
+    REPLICA_LAG_TOLERANCE = float(os.getenv('REPLICA_LAG_TOLERANCE', '5'))
+
+    # API response encoder: 'auto' uses orjson when it is installed, 'stdlib' forces the json module.
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+    # ETag / Last-Modified on company-scoped GETs, derived from Company.data_version (see app.data_versions).
+    CONDITIONAL_GET_ENABLED = os.getenv('CONDITIONAL_GET_ENABLED', 'true').lower() == 'true'
+
+    # Prometheus /metrics; under gunicorn also set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py).
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    # /metrics answers only these client addresses/networks, or a request with `Authorization: Bearer METRICS_TOKEN`.
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Opt-in per-request SQL profiling: Server-Timing header plus a warning log above these limits.
+    SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER_ENABLED', 'false').lower() == 'true'
+    SQL_PROFILER_MAX_QUERIES = int(os.getenv('SQL_PROFILER_MAX_QUERIES', '20'))
+    SQL_PROFILER_MAX_DB_MS = float(os.getenv('SQL_PROFILER_MAX_DB_MS', '200'))
+    SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv('SQL_PROFILER_REPEAT_THRESHOLD', '5'))
+
+    # 'sync' writes audit rows in the request transaction; 'async' queues them for a background bulk writer.
+    AUDIT_SINK = os.getenv('AUDIT_SINK', 'sync')
+    AUDIT_SINK_QUEUE_SIZE = int(os.getenv('AUDIT_SINK_QUEUE_SIZE', '10000'))
+    AUDIT_SINK_BATCH_SIZE = int(os.getenv('AUDIT_SINK_BATCH_SIZE', '500'))
+    AUDIT_SINK_FLUSH_INTERVAL = float(os.getenv('AUDIT_SINK_FLUSH_INTERVAL', '1.0'))
+    AUDIT_SINK_FSYNC = os.getenv('AUDIT_SINK_FSYNC', 'false').lower() == 'true'
+    AUDIT_SINK_SPOOL_DIR = os.getenv('AUDIT_SINK_SPOOL_DIR')
+
+    TOKEN_USAGE_BATCH_MAX_ROWS = int(os.getenv('TOKEN_USAGE_BATCH_MAX_ROWS', '100000'))
+    # Most buckets one /finance/dashboard series may return (about five years of days).
+    FINANCE_SERIES_MAX_BUCKETS = int(os.getenv('FINANCE_SERIES_MAX_BUCKETS', '2000'))
+    IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '100000'))
+
+    # Seconds a worker may serve cached AI model settings; commits through the API bump the stamp file immediately.
+    AI_SETTINGS_CACHE_TTL = float(os.getenv('AI_SETTINGS_CACHE_TTL', '300'))
+    AI_SETTINGS_STAMP_FILE = os.getenv('AI_SETTINGS_STAMP_FILE')
+
+    # Completion cache keyed on (model, base_url, messages, temperature); COMPLETION_CACHE_PATH adds a shared SQLite tier.
+    COMPLETION_CACHE_ENABLED = os.getenv('COMPLETION_CACHE_ENABLED', 'true').lower() == 'true'
+    COMPLETION_CACHE_TTL = float(os.getenv('COMPLETION_CACHE_TTL', '86400'))
+    COMPLETION_CACHE_MAX_ENTRIES = int(os.getenv('COMPLETION_CACHE_MAX_ENTRIES', '1024'))
+    COMPLETION_CACHE_PATH = os.getenv('COMPLETION_CACHE_PATH')
+    COMPLETION_CACHE_DISK_MAX_ENTRIES = int(os.getenv('COMPLETION_CACHE_DISK_MAX_ENTRIES', '100000'))
+    COMPLETION_CACHE_DISK_EVICT_INTERVAL = int(os.getenv('COMPLETION_CACHE_DISK_EVICT_INTERVAL', '256'))
+
+    # Background jobs (job table). Embedded workers run as threads in each web process;
+    # set JOB_EMBEDDED_WORKERS=0 and run `flask jobs worker` to process jobs elsewhere.
+    JOB_EMBEDDED_WORKERS = int(os.getenv('JOB_EMBEDDED_WORKERS', '2'))
+    JOB_WORKER_THREADS = int(os.getenv('JOB_WORKER_THREADS', '4'))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))
+    JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '600'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', '5'))
+
+    # Task execution pipeline: concurrent steps per execution. Clients poll GET /executions/<id>;
+    # the SSE endpoints hold a connection each and are only offered under a threaded or async
+    # gunicorn worker class (gunicorn.conf.py enables them), capped below the gunicorn timeout.
+    TASK_EXECUTION_CONCURRENCY = int(os.getenv('TASK_EXECUTION_CONCURRENCY', '4'))
+    TASK_EXECUTION_STREAM_ENABLED = os.getenv('TASK_EXECUTION_STREAM_ENABLED', 'false').lower() == 'true'
+    TASK_EXECUTION_STREAM_INTERVAL = float(os.getenv('TASK_EXECUTION_STREAM_INTERVAL', '0.5'))
+    TASK_EXECUTION_STREAM_TIMEOUT = float(os.getenv('TASK_EXECUTION_STREAM_TIMEOUT', '25'))
+    # Same rules for POST /employees/<id>/agent-prompt/stream; without it, clients use
+    # PUT /employees/<id> with generate_agent_prompt. A generation still streaming at the
+    # timeout is abandoned and nothing is saved.
+    AGENT_PROMPT_STREAM_ENABLED = os.getenv('AGENT_PROMPT_STREAM_ENABLED', 'false').lower() == 'true'
+    AGENT_PROMPT_STREAM_TIMEOUT = float(os.getenv('AGENT_PROMPT_STREAM_TIMEOUT', '25'))
+
+    # Outbound chat-completion client: keep-alive pool per base_url, retries on 429/5xx, circuit breaker.
+    AI_HTTP_CONNECT_TIMEOUT = float(os.getenv('AI_HTTP_CONNECT_TIMEOUT', '5'))
+    AI_HTTP_TIMEOUT = float(os.getenv('AI_HTTP_TIMEOUT', '30'))
+    AI_HTTP_POOL_SIZE = int(os.getenv('AI_HTTP_POOL_SIZE', '8'))
+    AI_HTTP_MAX_RETRIES = int(os.getenv('AI_HTTP_MAX_RETRIES', '2'))
+    AI_HTTP_BACKOFF_BASE = float(os.getenv('AI_HTTP_BACKOFF_BASE', '0.5'))
+    AI_HTTP_BACKOFF_MAX = float(os.getenv('AI_HTTP_BACKOFF_MAX', '8'))
+    AI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('AI_CIRCUIT_FAILURE_THRESHOLD', '5'))
+    AI_CIRCUIT_RESET_SECONDS = float(os.getenv('AI_CIRCUIT_RESET_SECONDS', '30'))
+    # Batch agent-prompt generation: concurrent calls per provider and employees per request.
+    AI_BATCH_CONCURRENCY = int(os.getenv('AI_BATCH_CONCURRENCY', '8'))
+    AI_BATCH_MAX_EMPLOYEES = int(os.getenv('AI_BATCH_MAX_EMPLOYEES', '200'))
+
+
+class ProductionConfig(Config):
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'query_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', '1200')),
+    }
+    # Applied on every new SQLite connection; ignored for other databases.
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    }
+
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # The in-memory database is a single shared connection; run jobs explicitly instead.
+    JOB_EMBEDDED_WORKERS = 0
 
 
 config_by_name = {
     'development': Config,
     'testing': TestingConfig,
-    'production': Config,
+    'production': ProductionConfig,
 }
 
 
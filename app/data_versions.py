@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import event, select, update
+
+from .extensions import db
+from .models import Company, Employee, FinancialRecord, OrganizationRole, Project, ProjectEmployee, Role, Task, TokenUsage, Tool
+
+CHANGED_COMPANIES_INFO_KEY = 'changed_company_ids'
+CHANGED_PROJECTS_INFO_KEY = 'changed_project_ids'
+
+# Rows shown by the company-scoped read endpoints. Tasks and project members only
+# know their project; the owning companies are resolved once, at commit.
+COMPANY_SCOPED_MODELS = (Employee, Project, Tool, TokenUsage, FinancialRecord, OrganizationRole, Role)
+PROJECT_SCOPED_MODELS = (Task, ProjectEmployee)
+
+
+def mark_company_changed(*company_ids: int | None):
+    """Bump these companies' data version when the current transaction commits.
+
+    ORM changes to the models above are picked up automatically; bulk
+    ``insert()`` / ``update()`` / ``delete()`` statements must call this.
+    """
+    db.session.info.setdefault(CHANGED_COMPANIES_INFO_KEY, set()).update(
+        company_id for company_id in company_ids if company_id is not None
+    )
+
+
+def get_company_data_version(company_id: int) -> tuple[int, datetime | None] | None:
+    row = db.session.execute(
+        select(Company.data_version, Company.data_changed_at).where(Company.id == company_id)
+    ).first()
+    return (row.data_version, row.data_changed_at) if row else None
+
+
+def init_data_versions(app: Flask):
+    _register_session_hooks()
+
+
+_hooks_registered = False
+
+
+def _register_session_hooks():
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    _hooks_registered = True
+
+    @event.listens_for(db.session, 'before_flush')
+    def _collect_changes(session, flush_context, instances):
+        companies = session.info.setdefault(CHANGED_COMPANIES_INFO_KEY, set())
+        projects = session.info.setdefault(CHANGED_PROJECTS_INFO_KEY, set())
+        modified = [obj for obj in session.dirty if session.is_modified(obj)]
+        for obj in (*session.new, *modified, *session.deleted):
+            if isinstance(obj, Company):
+                # A new company starts at version 0; there is nothing cached to invalidate.
+                if obj.id is not None:
+                    companies.add(obj.id)
+            elif isinstance(obj, COMPANY_SCOPED_MODELS):
+                companies.add(obj.company_id)
+            elif isinstance(obj, PROJECT_SCOPED_MODELS):
+                projects.add(obj.project_id)
+        companies.discard(None)
+        projects.discard(None)
+
+    @event.listens_for(db.session, 'before_commit')
+    def _bump_versions(session):
+        # Commit flushes after this hook, so flush now to collect the pending changes.
+        session.flush()
+        company_ids = session.info.pop(CHANGED_COMPANIES_INFO_KEY, set())
+        project_ids = session.info.pop(CHANGED_PROJECTS_INFO_KEY, set())
+        if project_ids:
+            company_ids.update(session.scalars(select(Project.company_id).where(Project.id.in_(project_ids))))
+        if not company_ids:
+            return
+        # Sorted so concurrent transactions lock the company rows in the same order.
+        session.execute(
+            update(Company)
+            .where(Company.id.in_(sorted(company_ids)))
+            .values(data_version=Company.data_version + 1, data_changed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    @event.listens_for(db.session, 'after_soft_rollback')
+    def _discard_changes(session, previous_transaction):
+        if not session.in_transaction():
+            session.info.pop(CHANGED_COMPANIES_INFO_KEY, None)
+            session.info.pop(CHANGED_PROJECTS_INFO_KEY, None)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import random
+import time
+import zlib
+from functools import wraps
+
+from flask import Flask, current_app, has_request_context, session
+from flask_login import current_user
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+REPLICA_ENGINES_KEY = 'db_replicas'
+REPLICA_ENGINE_INFO_KEY = 'replica_engine'
+WROTE_INFO_KEY = 'wrote'
+LAST_WRITE_SESSION_KEY = '_db_last_write_at'
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica chosen for the request, and everything else to the primary.
+
+    A replica is only used once a view opted in through ``use_read_replica``. Any
+    flush or DML statement pins the rest of the session to the primary, so a
+    request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get(REPLICA_ENGINE_INFO_KEY)
+        if replica is not None and bind is None and not self.info.get(WROTE_INFO_KEY):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info[WROTE_INFO_KEY] = True
+            else:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict):
+    """Run ``PRAGMA key=value`` on every new DBAPI connection of a SQLite ``engine``."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for key, value in pragmas.items():
+                cursor.execute(f'PRAGMA {key}={value}')
+        finally:
+            cursor.close()
+
+
+def get_replica_engines(app: Flask) -> list[Engine]:
+    return app.extensions.get(REPLICA_ENGINES_KEY, [])
+
+
+def _choose_replica(replicas: list[Engine]) -> Engine:
+    # Sticky per user so consecutive reads see a monotonic view of one replica.
+    if current_user.is_authenticated:
+        return replicas[zlib.crc32(str(current_user.get_id()).encode()) % len(replicas)]
+    return random.choice(replicas)
+
+
+def use_read_replica(func):
+    """Route the read queries of a view to a replica, unless the caller wrote recently.
+
+    A caller whose last write is younger than ``REPLICA_LAG_TOLERANCE`` seconds stays
+    on the primary so read-after-write flows never observe replica lag.
+    """
+
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        replicas = get_replica_engines(current_app)
+        last_write = session.get(LAST_WRITE_SESSION_KEY, 0)
+        if replicas and time.time() - last_write >= current_app.config['REPLICA_LAG_TOLERANCE']:
+            db = current_app.extensions['sqlalchemy']
+            db.session.info[REPLICA_ENGINE_INFO_KEY] = _choose_replica(replicas)
+        return func(*args, **kwargs)
+
+    return wrapped
+
+
+def _remember_write():
+    if has_request_context():
+        session[LAST_WRITE_SESSION_KEY] = time.time()
+
+
+def _remember_flush(db_session, flush_context):
+    _remember_write()
+
+
+def _remember_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _remember_write()
+
+
+def init_database(app: Flask):
+    db = app.extensions['sqlalchemy']
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, pragmas)
+
+    replicas = []
+    for url in app.config.get('SQLALCHEMY_REPLICA_URIS') or []:
+        engine = create_engine(url, **(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}))
+        apply_sqlite_pragmas(engine, pragmas)
+        replicas.append(engine)
+    app.extensions[REPLICA_ENGINES_KEY] = replicas
+    if replicas and not event.contains(RoutingSession, 'after_flush', _remember_flush):
+        event.listen(RoutingSession, 'after_flush', _remember_flush)
+        event.listen(RoutingSession, 'do_orm_execute', _remember_dml)
@@ -1,42 +1,52 @@
 from __future__ import annotations
 
-import json
+import time
+from datetime import datetime
 
-from flask import request
+from flask import current_app, request
 from flask_login import current_user, login_required
+from sqlalchemy import select, update
 
-from ..ai_service import generate_employee_agent_prompt
-from ..api_utils import api_error, api_ok, ensure_company_scope, log_action
+from ..ai_service import (
+    generate_employee_agent_prompt,
+    generate_employee_agent_prompts,
+    stream_employee_agent_prompt,
+)
+from ..api_utils import (
+    api_error,
+    api_ok,
+    conditional_get,
+    ensure_company_scope,
+    keyset_paginate,
+    log_action,
+    requested_company_id,
+    sse_event,
+    sse_response,
+)
+from ..data_versions import mark_company_changed
+from ..database import use_read_replica
 from ..extensions import db
 from ..models import Company, CompanyRole, Employee
+from ..org_roles import get_organization_roles, normalize_organization_role_name, organization_role_exists
+from ..serialization import RowSerializer
 from . import bp
 
-def _company_org_roles(company: Company) -> list[dict[str, str]]:
-    if not company.organization_structure:
-        return []
-    try:
-        rows = json.loads(company.organization_structure)
-    except json.JSONDecodeError:
-        return []
-    if not isinstance(rows, list):
-        return []
-    normalized = []
-    for row in rows:
-        if not isinstance(row, dict):
-            continue
-        name = (row.get('name') or '').strip()
-        if not name:
-            continue
-        normalized.append({'name': name, 'description': (row.get('description') or '').strip()})
-    return normalized
-
-
-def _ensure_org_role(company: Company, organization_role: str | None) -> bool:
-    role_name = (organization_role or '').strip()
-    if not role_name:
+EMPLOYEE_FIELDS = RowSerializer(
+    'id',
+    'name',
+    'company_role',
+    'organization_role',
+    'primary_tasks',
+    'ai_provider',
+    'agent_prompt',
+    api_key_masked=lambda e: '***' if e.api_key_encrypted else None,
+)
+
+
+def _ensure_org_role(company_id: int, organization_role: str | None) -> bool:
+    if not organization_role:
         return True
-    names = {item['name'] for item in _company_org_roles(company)}
-    return role_name in names
+    return organization_role_exists(company_id, organization_role)
 
 
 def _apply_employee_payload(employee: Employee, data: dict):
@@ -49,7 +59,7 @@ def _apply_employee_payload(employee: Employee, data: dict):
     if 'company_role' in data and data.get('company_role'):
         employee.company_role = CompanyRole(data.get('company_role'))
     if 'organization_role' in data:
-        employee.organization_role = data.get('organization_role')
+        employee.organization_role = normalize_organization_role_name(data.get('organization_role')) or None
     if 'ai_provider' in data:
         employee.ai_provider = data.get('ai_provider')
     if 'api_key_encrypted' in data:
@@ -69,7 +79,7 @@ def create_employee():
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
 
-    company = Company.query.get_or_404(company_id)
+    Company.query.get_or_404(company_id)
 
     employee = Employee(
         company_id=company_id,
@@ -77,14 +87,14 @@ def create_employee():
         primary_tasks=data.get('primary_tasks'),
         role_id=data.get('role_id'),
         company_role=CompanyRole(data.get('company_role', CompanyRole.MEMBER.value)),
-        organization_role=data.get('organization_role'),
+        organization_role=normalize_organization_role_name(data.get('organization_role')) or None,
         ai_provider=data.get('ai_provider'),
         api_key_encrypted=data.get('api_key_encrypted'),
         photo_path=data.get('photo_path'),
         created_by=current_user.id,
     )
 
-    if not _ensure_org_role(company, employee.organization_role):
+    if not _ensure_org_role(company_id, employee.organization_role):
         return api_error('invalid_payload')
 
     if data.get('generate_agent_prompt'):
@@ -111,14 +121,13 @@ def create_employee():
 @login_required
 def update_employee(employee_id: int):
     employee = Employee.query.get_or_404(employee_id)
-    company = Company.query.get_or_404(employee.company_id)
     if not ensure_company_scope(employee.company_id):
         return api_error('forbidden', status=403)
 
     data = request.get_json() or {}
     _apply_employee_payload(employee, data)
 
-    if not _ensure_org_role(company, employee.organization_role):
+    if not _ensure_org_role(employee.company_id, employee.organization_role):
         return api_error('invalid_payload')
 
     if data.get('generate_agent_prompt'):
@@ -145,8 +154,149 @@ def update_employee(employee_id: int):
 
 
 
+@bp.post('/<int:employee_id>/agent-prompt/stream')
+@login_required
+def stream_agent_prompt(employee_id: int):
+    if not current_app.config['AGENT_PROMPT_STREAM_ENABLED']:
+        return api_error('streaming_disabled', status=404)
+    employee = Employee.query.get_or_404(employee_id)
+    if not ensure_company_scope(employee.company_id):
+        return api_error('forbidden', status=403)
+
+    try:
+        deltas = stream_employee_agent_prompt(
+            name=employee.name,
+            primary_tasks=employee.primary_tasks,
+            company_role=employee.organization_role or employee.company_role.value,
+        )
+    except ValueError as exc:
+        if str(exc) == 'ai_model_not_configured':
+            return api_error('ai_model_not_configured')
+        raise
+    # Do not hold a read transaction open while the provider streams.
+    db.session.rollback()
+    deadline = time.monotonic() + current_app.config['AGENT_PROMPT_STREAM_TIMEOUT']
+
+    def generate():
+        parts = []
+        try:
+            for delta in deltas:
+                if time.monotonic() >= deadline:
+                    deltas.close()
+                    yield sse_event('error', {'message': 'ai_prompt_stream_timeout'})
+                    return
+                parts.append(delta)
+                yield sse_event('token', {'text': delta})
+        except Exception:
+            yield sse_event('error', {'message': 'ai_prompt_generation_failed'})
+            return
+
+        employee = db.session.get(Employee, employee_id)
+        employee.agent_prompt = ''.join(parts).strip()
+        log_action('employee.update', 'employee', str(employee.id), employee.company_id, {'name': employee.name})
+        db.session.commit()
+        yield sse_event('done', {'id': employee.id, 'agent_prompt': employee.agent_prompt})
+
+    return sse_response(generate())
+
+
+@bp.post('/agent-prompts/batch')
+@login_required
+def generate_agent_prompts_batch():
+    """Generate agent prompts for many employees concurrently and save them in one transaction.
+
+    Body: ``company_id`` plus either ``employee_ids`` or ``only_missing`` to pick
+    every employee of the company (without a prompt). Failures are reported per
+    employee and do not block the others.
+    """
+    data = request.get_json() or {}
+    try:
+        company_id = int(data['company_id'])
+    except (KeyError, TypeError, ValueError):
+        return api_error('invalid_payload')
+    if not ensure_company_scope(company_id):
+        return api_error('forbidden', status=403)
+
+    query = select(
+        Employee.id, Employee.name, Employee.primary_tasks, Employee.company_role, Employee.organization_role
+    ).where(Employee.company_id == company_id)
+    employee_ids = data.get('employee_ids')
+    if employee_ids is not None:
+        if not isinstance(employee_ids, list) or not all(isinstance(i, int) for i in employee_ids):
+            return api_error('invalid_payload')
+        employee_ids = list(dict.fromkeys(employee_ids))
+        query = query.where(Employee.id.in_(employee_ids))
+    elif data.get('only_missing'):
+        query = query.where((Employee.agent_prompt.is_(None)) | (Employee.agent_prompt == ''))
+    rows = db.session.execute(query.order_by(Employee.id)).all()
+    if len(rows) > current_app.config['AI_BATCH_MAX_EMPLOYEES']:
+        return api_error('batch_too_large', status=413)
+
+    found = {row.id for row in rows}
+    errors = [{'employee_id': i, 'error': 'employee_not_found'} for i in employee_ids or [] if i not in found]
+    # Release the read transaction while the provider calls run.
+    db.session.rollback()
+    try:
+        outcomes = generate_employee_agent_prompts(
+            [
+                {
+                    'name': row.name,
+                    'primary_tasks': row.primary_tasks,
+                    'company_role': row.organization_role or row.company_role.value,
+                }
+                for row in rows
+            ]
+        )
+    except ValueError as exc:
+        if str(exc) == 'ai_model_not_configured':
+            return api_error('ai_model_not_configured')
+        raise
+
+    # Employees deleted while the provider calls ran would make the bulk UPDATE by primary key fail.
+    generated_ids = [row.id for row, (_, error) in zip(rows, outcomes) if not error]
+    remaining = set()
+    if generated_ids:
+        remaining = set(
+            db.session.execute(
+                select(Employee.id).where(Employee.company_id == company_id, Employee.id.in_(generated_ids))
+            ).scalars()
+        )
+
+    now = datetime.utcnow()
+    updates = []
+    for row, (prompt, error) in zip(rows, outcomes):
+        if error:
+            errors.append({'employee_id': row.id, 'error': 'ai_prompt_generation_failed', 'detail': error})
+        elif row.id not in remaining:
+            errors.append({'employee_id': row.id, 'error': 'employee_not_found'})
+        else:
+            updates.append({'id': row.id, 'agent_prompt': prompt, 'updated_at': now})
+
+    if updates:
+        db.session.execute(update(Employee), updates)
+        mark_company_changed(company_id)
+        log_action(
+            'employee.agent_prompt.batch_generate',
+            'employee',
+            None,
+            company_id,
+            {'updated': len(updates), 'failed': len(errors)},
+        )
+        db.session.commit()
+    return api_ok(
+        {
+            'updated': len(updates),
+            'failed': len(errors),
+            'results': [{'id': item['id'], 'agent_prompt': item['agent_prompt']} for item in updates],
+            'errors': errors,
+        }
+    )
+
+
 @bp.get('/organization-roles')
 @login_required
+@use_read_replica
+@conditional_get(requested_company_id)
 def list_organization_roles():
     company_id = request.args.get('company_id', type=int) or current_user.company_id
     if not company_id:
@@ -154,12 +304,14 @@ def list_organization_roles():
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
 
-    company = Company.query.get_or_404(company_id)
-    return api_ok(_company_org_roles(company))
+    Company.query.get_or_404(company_id)
+    return api_ok(get_organization_roles(company_id))
 
 
 @bp.get('')
 @login_required
+@use_read_replica
+@conditional_get(requested_company_id)
 def list_employees():
     company_id = request.args.get('company_id', type=int) or current_user.company_id
     if not company_id:
@@ -167,17 +319,8 @@ def list_employees():
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
 
-    employees = Employee.query.filter_by(company_id=company_id).order_by(Employee.id.desc()).all()
-    return api_ok([
-        {
-            'id': e.id,
-            'name': e.name,
-            'company_role': e.company_role.value,
-            'organization_role': e.organization_role,
-            'primary_tasks': e.primary_tasks,
-            'ai_provider': e.ai_provider,
-            'agent_prompt': e.agent_prompt,
-            'api_key_masked': '***' if e.api_key_encrypted else None,
-        }
-        for e in employees
-    ])
+    try:
+        employees, next_cursor = keyset_paginate(Employee.query.filter_by(company_id=company_id), Employee.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    return api_ok(EMPLOYEE_FIELDS.many(employees), meta={'next_cursor': next_cursor})
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import click
+
+from ..extensions import db
+from . import bp
+from .rollups import check_rollups, rebuild_rollups
+
+
+def _as_day(value):
+    return value.date() if value else None
+
+
+@bp.cli.command('rebuild-rollups')
+@click.option('--company-id', type=int, default=None, help='Only rebuild a single company.')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='First day to rebuild.')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Last day to rebuild.')
+def rebuild_rollups_command(company_id: int | None, since, until):
+    """Rebuild the daily finance rollups from token_usage and financial_record."""
+    count = rebuild_rollups(company_id, _as_day(since), _as_day(until))
+    db.session.commit()
+    click.echo(f'rebuilt {count} rollup rows')
+
+
+@bp.cli.command('check-rollups')
+@click.option('--company-id', type=int, default=None, help='Only check a single company.')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='First day to check.')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Last day to check.')
+def check_rollups_command(company_id: int | None, since, until):
+    """Compare the daily finance rollups against the raw tables."""
+    mismatches = check_rollups(company_id, _as_day(since), _as_day(until))
+    for item in mismatches:
+        click.echo(
+            f"company={item['company_id']} day={item['day']} {item['field']}: "
+            f"expected={item['expected']} actual={item['actual']}"
+        )
+    if mismatches:
+        raise click.ClickException(f'{len(mismatches)} rollup mismatches found')
+    click.echo('rollups consistent')
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Date, case, cast, func, insert, update
+
+from ..data_versions import mark_company_changed
+from ..extensions import db
+from ..models import FinanceDailyRollup, FinancialRecord, FinancialRecordType, TokenUsage
+
+ROLLUP_FIELDS = ('tokens_used', 'ai_cost', 'income', 'expense')
+GRANULARITIES = ('day', 'week', 'month')
+FLOAT_TOLERANCE = 1e-6
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _upsert_insert(dialect_name: str):
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def apply_rollup_deltas(rows: list[dict]):
+    """Add per-(company_id, day) deltas to the rollup store inside the current transaction.
+
+    Each row carries ``company_id``, ``day`` and any subset of ``ROLLUP_FIELDS``.
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    params = [
+        {
+            'company_id': row['company_id'],
+            'day': _as_date(row['day']),
+            **{field: row.get(field) or 0 for field in ROLLUP_FIELDS},
+            'created_at': now,
+            'updated_at': now,
+        }
+        for row in rows
+    ]
+    mark_company_changed(*{param['company_id'] for param in params})
+
+    table = FinanceDailyRollup.__table__
+    dialect_insert = _upsert_insert(db.session.get_bind(mapper=FinanceDailyRollup).dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.company_id, table.c.day],
+            set_={
+                **{field: table.c[field] + stmt.excluded[field] for field in ROLLUP_FIELDS},
+                'updated_at': stmt.excluded.updated_at,
+            },
+        )
+        db.session.execute(stmt, params)
+        return
+
+    for param in params:
+        result = db.session.execute(
+            update(table)
+            .where(table.c.company_id == param['company_id'], table.c.day == param['day'])
+            .values(
+                **{field: table.c[field] + param[field] for field in ROLLUP_FIELDS},
+                updated_at=param['updated_at'],
+            )
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table), [param])
+
+
+def record_token_usage(usage: TokenUsage):
+    apply_rollup_deltas(
+        [
+            {
+                'company_id': usage.company_id,
+                'day': usage.usage_date,
+                'tokens_used': usage.tokens_used,
+                'ai_cost': usage.cost,
+            }
+        ]
+    )
+
+
+def record_financial_record(record: FinancialRecord):
+    field = 'income' if record.record_type == FinancialRecordType.INCOME else 'expense'
+    apply_rollup_deltas([{'company_id': record.company_id, 'day': record.record_date, field: record.amount}])
+
+
+def get_rollup_totals(company_id: int) -> dict[str, float | int]:
+    totals = db.session.query(
+        func.sum(FinanceDailyRollup.tokens_used),
+        func.sum(FinanceDailyRollup.ai_cost),
+        func.sum(FinanceDailyRollup.income),
+        func.sum(FinanceDailyRollup.expense),
+    ).filter(FinanceDailyRollup.company_id == company_id).one()
+    return {
+        'tokens_used': int(totals[0] or 0),
+        'ai_cost': float(totals[1] or 0),
+        'income': float(totals[2] or 0),
+        'expense': float(totals[3] or 0),
+    }
+
+
+def _bucket_expression(dialect_name: str, granularity: str):
+    day = FinanceDailyRollup.day
+    if granularity == 'day':
+        return day
+    if dialect_name == 'sqlite':
+        if granularity == 'week':
+            return func.date(day, '-6 days', 'weekday 1')
+        return func.strftime('%Y-%m-01', day)
+    if dialect_name == 'postgresql':
+        return cast(func.date_trunc(granularity, day), Date)
+    raise ValueError('unsupported_dialect')
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(bucket: date, granularity: str) -> date:
+    if granularity == 'week':
+        return bucket + timedelta(days=7)
+    if granularity == 'month':
+        return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+
+def count_buckets(first: date, last: date, granularity: str) -> int:
+    """Number of buckets from the bucket of ``first`` to the bucket of ``last``, inclusive."""
+    first, last = bucket_start(first, granularity), bucket_start(last, granularity)
+    if last < first:
+        return 0
+    if granularity == 'week':
+        return (last - first).days // 7 + 1
+    if granularity == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days + 1
+
+
+def get_rollup_series(
+    company_id: int,
+    start: date | None,
+    end: date | None,
+    granularity: str = 'day',
+    max_buckets: int | None = None,
+) -> list[dict]:
+    """Return per-bucket totals between ``start`` and ``end`` (inclusive days) in a single grouped query.
+
+    Buckets without data are filled with zeros so the series is continuous.
+    Raises ``ValueError('range_too_large')`` when the series would exceed ``max_buckets``.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError('invalid_granularity')
+    # Checked before querying when both ends are given; open ends are checked against the data below.
+    if max_buckets and start and end and count_buckets(start, end, granularity) > max_buckets:
+        raise ValueError('range_too_large')
+
+    dialect_name = db.session.get_bind(mapper=FinanceDailyRollup).dialect.name
+    bucket = _bucket_expression(dialect_name, granularity).label('bucket')
+    query = db.session.query(
+        bucket,
+        func.sum(FinanceDailyRollup.tokens_used),
+        func.sum(FinanceDailyRollup.ai_cost),
+        func.sum(FinanceDailyRollup.income),
+        func.sum(FinanceDailyRollup.expense),
+    ).filter(FinanceDailyRollup.company_id == company_id)
+    if start:
+        query = query.filter(FinanceDailyRollup.day >= start)
+    if end:
+        query = query.filter(FinanceDailyRollup.day <= end)
+    rows = {
+        _as_date(row[0]): {
+            'tokens_used': int(row[1] or 0),
+            'ai_cost': float(row[2] or 0),
+            'income': float(row[3] or 0),
+            'expense': float(row[4] or 0),
+        }
+        for row in query.group_by(bucket).order_by(bucket)
+    }
+
+    first = bucket_start(start, granularity) if start else min(rows, default=None)
+    last = bucket_start(end, granularity) if end else max(rows, default=None)
+    if first is None or last is None:
+        return []
+    if max_buckets and count_buckets(first, last, granularity) > max_buckets:
+        raise ValueError('range_too_large')
+
+    series = []
+    current = first
+    empty = {'tokens_used': 0, 'ai_cost': 0.0, 'income': 0.0, 'expense': 0.0}
+    while current <= last:
+        values = rows.get(current, empty)
+        series.append(
+            {
+                'bucket': current.isoformat(),
+                **values,
+                'profit': values['income'] - values['expense'],
+            }
+        )
+        if current == last:
+            # The bucket after the last one may not exist (near date.max).
+            break
+        current = next_bucket(current, granularity)
+    return series
+
+
+def compute_raw_rollups(
+    company_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[tuple[int, date], dict[str, float | int]]:
+    """Aggregate the raw ``token_usage``/``financial_record`` tables per company and day.
+
+    ``start``/``end`` restrict the scan to whole days and use the date indexes.
+    """
+    lower = datetime.combine(start, time.min) if start else None
+    upper = datetime.combine(end + timedelta(days=1), time.min) if end else None
+    aggregates: dict[tuple[int, date], dict[str, float | int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+    usage_day = func.date(TokenUsage.usage_date)
+    usage_query = db.session.query(
+        TokenUsage.company_id,
+        usage_day,
+        func.sum(TokenUsage.tokens_used),
+        func.sum(TokenUsage.cost),
+    ).group_by(TokenUsage.company_id, usage_day)
+    if company_id:
+        usage_query = usage_query.filter(TokenUsage.company_id == company_id)
+    if lower:
+        usage_query = usage_query.filter(TokenUsage.usage_date >= lower)
+    if upper:
+        usage_query = usage_query.filter(TokenUsage.usage_date < upper)
+    for row_company_id, day, tokens_used, cost in usage_query:
+        bucket = aggregates[(row_company_id, _as_date(day))]
+        bucket['tokens_used'] = int(tokens_used or 0)
+        bucket['ai_cost'] = float(cost or 0)
+
+    record_day = func.date(FinancialRecord.record_date)
+    record_query = db.session.query(
+        FinancialRecord.company_id,
+        record_day,
+        func.sum(case((FinancialRecord.record_type == FinancialRecordType.INCOME, FinancialRecord.amount), else_=0)),
+        func.sum(case((FinancialRecord.record_type == FinancialRecordType.EXPENSE, FinancialRecord.amount), else_=0)),
+    ).group_by(FinancialRecord.company_id, record_day)
+    if company_id:
+        record_query = record_query.filter(FinancialRecord.company_id == company_id)
+    if lower:
+        record_query = record_query.filter(FinancialRecord.record_date >= lower)
+    if upper:
+        record_query = record_query.filter(FinancialRecord.record_date < upper)
+    for row_company_id, day, income, expense in record_query:
+        bucket = aggregates[(row_company_id, _as_date(day))]
+        bucket['income'] = float(income or 0)
+        bucket['expense'] = float(expense or 0)
+
+    return dict(aggregates)
+
+
+def _rollup_query(company_id: int | None, start: date | None, end: date | None):
+    query = FinanceDailyRollup.query
+    if company_id:
+        query = query.filter(FinanceDailyRollup.company_id == company_id)
+    if start:
+        query = query.filter(FinanceDailyRollup.day >= start)
+    if end:
+        query = query.filter(FinanceDailyRollup.day <= end)
+    return query
+
+
+def rebuild_rollups(company_id: int | None = None, start: date | None = None, end: date | None = None) -> int:
+    """Recompute the rollup store from the raw tables. The caller commits."""
+    aggregates = compute_raw_rollups(company_id, start, end)
+    delete_query = _rollup_query(company_id, start, end)
+    if company_id:
+        mark_company_changed(company_id)
+    else:
+        stored = delete_query.with_entities(FinanceDailyRollup.company_id).distinct()
+        mark_company_changed(*{key[0] for key in aggregates}, *(row.company_id for row in stored))
+    delete_query.delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    rows = [
+        {'company_id': key[0], 'day': key[1], **values, 'created_at': now, 'updated_at': now}
+        for key, values in aggregates.items()
+    ]
+    if rows:
+        db.session.execute(insert(FinanceDailyRollup), rows)
+    return len(rows)
+
+
+def check_rollups(company_id: int | None = None, start: date | None = None, end: date | None = None) -> list[dict]:
+    """Compare the rollup store against the raw tables and return every mismatching field."""
+    expected = compute_raw_rollups(company_id, start, end)
+    actual = {
+        (row.company_id, row.day): {field: getattr(row, field) for field in ROLLUP_FIELDS}
+        for row in _rollup_query(company_id, start, end)
+    }
+
+    mismatches = []
+    empty = dict.fromkeys(ROLLUP_FIELDS, 0)
+    for key in sorted(set(expected) | set(actual)):
+        expected_values = expected.get(key, empty)
+        actual_values = actual.get(key, empty)
+        for field in ROLLUP_FIELDS:
+            if abs((expected_values[field] or 0) - (actual_values[field] or 0)) > FLOAT_TOLERANCE:
+                mismatches.append(
+                    {
+                        'company_id': key[0],
+                        'day': key[1].isoformat(),
+                        'field': field,
+                        'expected': expected_values[field],
+                        'actual': actual_values[field],
+                    }
+                )
+    return mismatches
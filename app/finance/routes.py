@@ -1,13 +1,39 @@
 from __future__ import annotations
 
-from flask import request
+import math
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app, request
 from flask_login import current_user, login_required
-from sqlalchemy import func
+from sqlalchemy import insert, select
 
-from ..api_utils import api_error, api_ok, ensure_company_scope, log_action, parse_iso_datetime
+from ..api_utils import (
+    api_error,
+    api_ok,
+    conditional_get,
+    ensure_company_scope,
+    iter_batch_items,
+    log_action,
+    parse_iso_datetime,
+    requested_company_id,
+    stream_export,
+)
+from ..database import use_read_replica
 from ..extensions import db
 from ..models import FinancialRecord, FinancialRecordType, TokenUsage
 from . import bp
+from .rollups import (
+    GRANULARITIES,
+    apply_rollup_deltas,
+    get_rollup_series,
+    get_rollup_totals,
+    record_financial_record,
+    record_token_usage,
+)
+
+BATCH_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
 
 
 @bp.post('/token-usage')
@@ -26,15 +52,108 @@ def create_token_usage():
         model=data['model'],
         tokens_used=int(data['tokens_used']),
         cost=float(data['cost']),
-        usage_date=parse_iso_datetime(data.get('usage_date')),
+        usage_date=parse_iso_datetime(data.get('usage_date')) or datetime.utcnow(),
         created_by=current_user.id,
     )
     db.session.add(usage)
+    record_token_usage(usage)
     log_action('finance.token_usage.create', 'token_usage', None, company_id, {'model': usage.model})
     db.session.commit()
     return api_ok({'id': usage.id}, status=201)
 
 
+def _parse_token_usage_item(item, allowed_companies: dict[int, bool]):
+    if not isinstance(item, dict) or not {'company_id', 'model', 'tokens_used', 'cost'}.issubset(item):
+        return None, 'invalid_payload'
+    try:
+        company_id = int(item['company_id'])
+        tokens_used = int(item['tokens_used'])
+        cost = float(item['cost'])
+    except (TypeError, ValueError):
+        return None, 'invalid_payload'
+    # float() accepts 'nan' and 'inf'; neither can be stored or summed into the rollups.
+    if tokens_used < 0 or not math.isfinite(cost) or cost < 0 or not item['model']:
+        return None, 'invalid_payload'
+    if company_id not in allowed_companies:
+        allowed_companies[company_id] = ensure_company_scope(company_id)
+    if not allowed_companies[company_id]:
+        return None, 'forbidden'
+    try:
+        usage_date = parse_iso_datetime(item.get('usage_date')) or datetime.utcnow()
+    except (TypeError, ValueError):
+        return None, 'invalid_date'
+    return {
+        'company_id': company_id,
+        'model': str(item['model'])[:64],
+        'tokens_used': tokens_used,
+        'cost': cost,
+        'usage_date': usage_date,
+        'created_by': current_user.id,
+    }, None
+
+
+def _write_token_usage_chunk(rows: list[dict]):
+    db.session.execute(insert(TokenUsage), rows)
+    deltas: dict[tuple, dict] = defaultdict(lambda: {'tokens_used': 0, 'ai_cost': 0.0})
+    for row in rows:
+        delta = deltas[(row['company_id'], row['usage_date'].date())]
+        delta['tokens_used'] += row['tokens_used']
+        delta['ai_cost'] += row['cost']
+    apply_rollup_deltas([{'company_id': key[0], 'day': key[1], **values} for key, values in deltas.items()])
+
+
+@bp.post('/token-usage/batch')
+@login_required
+def create_token_usage_batch():
+    """Ingest many token usage rows (JSON array or NDJSON) with one bulk INSERT per chunk."""
+    max_rows = current_app.config['TOKEN_USAGE_BATCH_MAX_ROWS']
+    allowed_companies: dict[int, bool] = {}
+    errors: list[dict] = []
+    error_count = 0
+    inserted = 0
+    chunk: list[dict] = []
+    company_totals: dict[int, int] = defaultdict(int)
+
+    try:
+        for index, item in iter_batch_items():
+            if index >= max_rows:
+                db.session.rollback()
+                return api_error('batch_too_large', status=413)
+            row, error = _parse_token_usage_item(item, allowed_companies)
+            if error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'index': index, 'error': error})
+                continue
+            chunk.append(row)
+            company_totals[row['company_id']] += 1
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                _write_token_usage_chunk(chunk)
+                inserted += len(chunk)
+                chunk = []
+    except ValueError:
+        db.session.rollback()
+        return api_error('invalid_payload')
+    if chunk:
+        _write_token_usage_chunk(chunk)
+        inserted += len(chunk)
+
+    if inserted:
+        companies = sorted(company_totals)
+        log_action(
+            'finance.token_usage.batch_create',
+            'token_usage',
+            None,
+            companies[0] if len(companies) == 1 else None,
+            {'inserted': inserted, 'failed': error_count, 'companies': dict(sorted(company_totals.items()))},
+        )
+        db.session.commit()
+    return api_ok(
+        {'inserted': inserted, 'failed': error_count, 'errors': errors, 'errors_truncated': error_count > len(errors)},
+        status=201 if inserted else 200,
+    )
+
+
 @bp.post('/records')
 @login_required
 def create_financial_record():
@@ -51,10 +170,11 @@ def create_financial_record():
         description=data['description'],
         amount=float(data['amount']),
         record_type=FinancialRecordType(data['record_type']),
-        record_date=parse_iso_datetime(data.get('record_date')),
+        record_date=parse_iso_datetime(data.get('record_date')) or datetime.utcnow(),
         created_by=current_user.id,
     )
     db.session.add(record)
+    record_financial_record(record)
     log_action('finance.record.create', 'financial_record', None, company_id)
     db.session.commit()
     return api_ok({'id': record.id}, status=201)
@@ -62,6 +182,8 @@ def create_financial_record():
 
 @bp.get('/dashboard')
 @login_required
+@use_read_replica
+@conditional_get(requested_company_id)
 def dashboard():
     company_id = request.args.get('company_id', type=int) or current_user.company_id
     if not company_id:
@@ -69,27 +191,114 @@ def dashboard():
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
 
-    token_stats = db.session.query(
-        func.sum(TokenUsage.tokens_used),
-        func.sum(TokenUsage.cost),
-    ).filter(TokenUsage.company_id == company_id).one()
+    granularity = request.args.get('granularity')
+    if not any(request.args.get(key) for key in ('from', 'to', 'granularity')):
+        totals = get_rollup_totals(company_id)
+        return api_ok(
+            {
+                'company_id': company_id,
+                **totals,
+                'profit': totals['income'] - totals['expense'],
+            }
+        )
 
-    income = db.session.query(func.sum(FinancialRecord.amount)).filter(
-        FinancialRecord.company_id == company_id,
-        FinancialRecord.record_type == FinancialRecordType.INCOME,
-    ).scalar() or 0
-    expense = db.session.query(func.sum(FinancialRecord.amount)).filter(
-        FinancialRecord.company_id == company_id,
-        FinancialRecord.record_type == FinancialRecordType.EXPENSE,
-    ).scalar() or 0
+    granularity = granularity or 'day'
+    if granularity not in GRANULARITIES:
+        return api_error('invalid_granularity')
+    try:
+        start = parse_iso_datetime(request.args.get('from'))
+        end = parse_iso_datetime(request.args.get('to'))
+    except ValueError:
+        return api_error('invalid_date')
+    start_day = start.date() if start else None
+    end_day = end.date() if end else None
+    if start_day and end_day and start_day > end_day:
+        return api_error('invalid_date')
 
+    try:
+        series = get_rollup_series(
+            company_id, start_day, end_day, granularity, current_app.config['FINANCE_SERIES_MAX_BUCKETS']
+        )
+    except ValueError as exc:
+        return api_error(str(exc))
+    except OverflowError:
+        return api_error('invalid_date')
+    totals = {
+        'tokens_used': sum(item['tokens_used'] for item in series),
+        'ai_cost': sum(item['ai_cost'] for item in series),
+        'income': sum(item['income'] for item in series),
+        'expense': sum(item['expense'] for item in series),
+    }
     return api_ok(
         {
             'company_id': company_id,
-            'tokens_used': int(token_stats[0] or 0),
-            'ai_cost': float(token_stats[1] or 0),
-            'income': float(income),
-            'expense': float(expense),
-            'profit': float(income - expense),
+            **totals,
+            'profit': totals['income'] - totals['expense'],
+            'from': start_day.isoformat() if start_day else None,
+            'to': end_day.isoformat() if end_day else None,
+            'granularity': granularity,
+            'series': series,
         }
     )
+
+
+@bp.get('/token-usage/export')
+@login_required
+@use_read_replica
+def export_token_usage():
+    company_id = request.args.get('company_id', type=int) or current_user.company_id
+    if not company_id:
+        return api_error('company_id_required')
+    if not ensure_company_scope(company_id):
+        return api_error('forbidden', status=403)
+
+    statement = select(
+        TokenUsage.id,
+        TokenUsage.company_id,
+        TokenUsage.model,
+        TokenUsage.tokens_used,
+        TokenUsage.cost,
+        TokenUsage.usage_date,
+        TokenUsage.created_by,
+    ).where(TokenUsage.company_id == company_id)
+    try:
+        start = parse_iso_datetime(request.args.get('from'))
+        end = parse_iso_datetime(request.args.get('to'))
+    except ValueError:
+        return api_error('invalid_date')
+    if start:
+        statement = statement.where(TokenUsage.usage_date >= start)
+    if end:
+        statement = statement.where(TokenUsage.usage_date <= end)
+    return stream_export(statement.order_by(TokenUsage.usage_date, TokenUsage.id), 'token_usage')
+
+
+@bp.get('/records/export')
+@login_required
+@use_read_replica
+def export_financial_records():
+    company_id = request.args.get('company_id', type=int) or current_user.company_id
+    if not company_id:
+        return api_error('company_id_required')
+    if not ensure_company_scope(company_id):
+        return api_error('forbidden', status=403)
+
+    statement = select(
+        FinancialRecord.id,
+        FinancialRecord.company_id,
+        FinancialRecord.record_date,
+        FinancialRecord.description,
+        FinancialRecord.amount,
+        FinancialRecord.record_type,
+        FinancialRecord.created_by,
+    ).where(FinancialRecord.company_id == company_id)
+    try:
+        start = parse_iso_datetime(request.args.get('from'))
+        end = parse_iso_datetime(request.args.get('to'))
+    except ValueError:
+        return api_error('invalid_date')
+    if start:
+        statement = statement.where(FinancialRecord.record_date >= start)
+    if end:
+        statement = statement.where(FinancialRecord.record_date <= end)
+    return stream_export(statement.order_by(FinancialRecord.record_date, FinancialRecord.id), 'financial_record')
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from flask import current_app, request
+from flask_login import current_user, login_required
+from sqlalchemy import insert, select
+
+from ..api_utils import api_error, api_ok, ensure_company_scope, iter_batch_items, log_action, parse_iso_datetime
+from ..data_versions import mark_company_changed
+from ..extensions import db
+from ..models import Company, CompanyRole, Employee, Priority, Project, Task, TaskStatus
+from ..org_roles import organization_role_names
+from . import bp
+
+BATCH_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+AMBIGUOUS = -1
+
+COMPANY_ROLES = {role.value: role for role in CompanyRole}
+TASK_STATUSES = {status.value: status for status in TaskStatus}
+PRIORITIES = {priority.value: priority for priority in Priority}
+
+
+class _RowError(Exception):
+    pass
+
+
+def _text(item: dict, key: str, max_length: int | None = None, required: bool = False) -> str | None:
+    value = item.get(key)
+    if value is None or value == '':
+        if required:
+            raise _RowError('invalid_payload')
+        return None
+    value = str(value).strip()
+    if (required and not value) or (max_length and len(value) > max_length):
+        raise _RowError('invalid_payload')
+    return value or None
+
+
+def _int(item: dict, key: str) -> int | None:
+    value = item.get(key)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise _RowError('invalid_payload') from None
+
+
+def _date(item: dict, key: str) -> datetime | None:
+    try:
+        return parse_iso_datetime(item.get(key) or None)
+    except (TypeError, ValueError):
+        raise _RowError('invalid_date') from None
+
+
+def _choice(item: dict, key: str, choices: dict, default, error: str):
+    value = item.get(key)
+    if value is None or value == '':
+        return default
+    try:
+        return choices[value]
+    except (KeyError, TypeError):
+        raise _RowError(error) from None
+
+
+def _name_index(rows) -> dict[str, int]:
+    # Duplicate names cannot be resolved by name; rows must use the id instead.
+    index: dict[str, int] = {}
+    for row_id, name in rows:
+        index[name] = AMBIGUOUS if name in index else row_id
+    return index
+
+
+class _Lookups:
+    """Everything a batch is validated against, loaded once before the first row."""
+
+    def __init__(self, company: Company, entity: str):
+        company_id = company.id
+        self.org_roles: set[str] = set()
+        self.employee_ids: set[int] = set()
+        self.employee_names: dict[str, int] = {}
+        self.project_ids: set[int] = set()
+        self.project_names: dict[str, int] = {}
+        self.task_projects: dict[int, int] = {}
+        if entity == 'employees':
+            self.org_roles = organization_role_names(company_id)
+            return
+
+        employees = db.session.execute(select(Employee.id, Employee.name).where(Employee.company_id == company_id)).all()
+        self.employee_ids = {row.id for row in employees}
+        self.employee_names = _name_index(employees)
+        if entity == 'tasks':
+            projects = db.session.execute(select(Project.id, Project.name).where(Project.company_id == company_id)).all()
+            self.project_ids = {row.id for row in projects}
+            self.project_names = _name_index(projects)
+            self.task_projects = dict(
+                db.session.execute(
+                    select(Task.id, Task.project_id)
+                    .join(Project, Project.id == Task.project_id)
+                    .where(Project.company_id == company_id)
+                ).all()
+            )
+
+    def employee(self, item: dict, prefix: str, error: str) -> int | None:
+        employee_id = _int(item, f'{prefix}_id')
+        if employee_id is not None:
+            if employee_id not in self.employee_ids:
+                raise _RowError(error)
+            return employee_id
+        name = _text(item, f'{prefix}_name')
+        if name is None:
+            return None
+        employee_id = self.employee_names.get(name)
+        if employee_id is None:
+            raise _RowError(error)
+        if employee_id == AMBIGUOUS:
+            raise _RowError('ambiguous_employee_name')
+        return employee_id
+
+    def project(self, item: dict) -> int:
+        project_id = _int(item, 'project_id')
+        if project_id is not None:
+            if project_id not in self.project_ids:
+                raise _RowError('project_not_found')
+            return project_id
+        project_id = self.project_names.get(_text(item, 'project_name', required=True))
+        if project_id is None:
+            raise _RowError('project_not_found')
+        if project_id == AMBIGUOUS:
+            raise _RowError('ambiguous_project_name')
+        return project_id
+
+
+def _employee_row(item: dict, lookups: _Lookups) -> dict:
+    organization_role = _text(item, 'organization_role', 128)
+    if organization_role and organization_role not in lookups.org_roles:
+        raise _RowError('organization_role_not_found')
+    return {
+        'name': _text(item, 'name', 128, required=True),
+        'primary_tasks': _text(item, 'primary_tasks'),
+        'company_role': _choice(item, 'company_role', COMPANY_ROLES, CompanyRole.MEMBER, 'invalid_company_role'),
+        'organization_role': organization_role,
+        'ai_provider': _text(item, 'ai_provider', 64),
+        'photo_path': _text(item, 'photo_path', 255),
+    }
+
+
+def _project_row(item: dict, lookups: _Lookups) -> dict:
+    return {
+        'name': _text(item, 'name', 128, required=True),
+        'description': _text(item, 'description'),
+        'lead_id': lookups.employee(item, 'lead', 'lead_employee_not_found'),
+        'start_date': _date(item, 'start_date'),
+        'end_date': _date(item, 'end_date'),
+        'objective': _text(item, 'objective'),
+    }
+
+
+def _task_row(item: dict, lookups: _Lookups) -> dict:
+    project_id = lookups.project(item)
+    dependency_task_id = _int(item, 'dependency_task_id')
+    if dependency_task_id is not None and lookups.task_projects.get(dependency_task_id) != project_id:
+        raise _RowError('dependency_task_not_found')
+    return {
+        'project_id': project_id,
+        'description': _text(item, 'description', required=True),
+        'assignee_id': lookups.employee(item, 'assignee', 'assignee_not_found'),
+        'status': _choice(item, 'status', TASK_STATUSES, TaskStatus.TODO, 'invalid_status'),
+        'priority': _choice(item, 'priority', PRIORITIES, Priority.MEDIUM, 'invalid_priority'),
+        'due_date': _date(item, 'due_date'),
+        'dependency_task_id': dependency_task_id,
+    }
+
+
+IMPORTERS = {
+    'employees': (Employee, _employee_row, True),
+    'projects': (Project, _project_row, True),
+    'tasks': (Task, _task_row, False),
+}
+
+
+@bp.post('/<entity>')
+@login_required
+def import_rows(entity: str):
+    """Bulk import employees, projects or tasks from CSV, NDJSON or a JSON array.
+
+    Lookups (org roles, employees and projects by id or name) are loaded once per
+    request and valid rows are written with one multi-row INSERT per chunk.
+    ``?dry_run=true`` validates every row and reports errors without writing.
+    Invalid rows are reported by index and skipped; the rest are imported.
+    """
+    if entity not in IMPORTERS:
+        return api_error('not_found', status=404)
+    company_id = request.args.get('company_id', type=int) or current_user.company_id
+    if not company_id:
+        return api_error('company_id_required')
+    if not ensure_company_scope(company_id):
+        return api_error('forbidden', status=403)
+    company = Company.query.get_or_404(company_id)
+    dry_run = (request.args.get('dry_run') or '').lower() in ('1', 'true', 'yes')
+
+    model, build_row, has_company_id = IMPORTERS[entity]
+    lookups = _Lookups(company, entity)
+    max_rows = current_app.config['IMPORT_MAX_ROWS']
+    now = datetime.utcnow()
+    defaults = {'created_by': current_user.id, 'created_at': now, 'updated_at': now}
+    if has_company_id:
+        defaults['company_id'] = company_id
+
+    errors: list[dict] = []
+    error_count = 0
+    valid = 0
+    chunk: list[dict] = []
+    try:
+        for index, item in iter_batch_items():
+            if index >= max_rows:
+                db.session.rollback()
+                return api_error('batch_too_large', status=413)
+            try:
+                if not isinstance(item, dict):
+                    raise _RowError('invalid_payload')
+                row = build_row(item, lookups)
+            except _RowError as exc:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'index': index, 'error': str(exc)})
+                continue
+            valid += 1
+            if dry_run:
+                continue
+            chunk.append({**defaults, **row})
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                db.session.execute(insert(model), chunk)
+                chunk = []
+    except (ValueError, UnicodeDecodeError):
+        db.session.rollback()
+        return api_error('invalid_payload')
+    if chunk:
+        db.session.execute(insert(model), chunk)
+    if not dry_run:
+        mark_company_changed(company_id)
+
+    inserted = 0 if dry_run else valid
+    if inserted:
+        log_action(
+            f'{model.__tablename__}.import',
+            model.__tablename__,
+            None,
+            company_id,
+            {'inserted': inserted, 'failed': error_count},
+        )
+        db.session.commit()
+    else:
+        db.session.rollback()
+    return api_ok(
+        {
+            'entity': entity,
+            'dry_run': dry_run,
+            'valid': valid,
+            'inserted': inserted,
+            'failed': error_count,
+            'errors': errors,
+            'errors_truncated': error_count > len(errors),
+        }
+    )
@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable
+
+from flask import Flask, current_app
+from sqlalchemy import event, func, select, update
+
+from .extensions import db
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JOBS_ENQUEUED_INFO_KEY = 'jobs_enqueued'
+CLAIM_CANDIDATES = 8
+
+JOB_HANDLERS: dict[str, Callable[[Job], dict | None]] = {}
+
+_lease_local = threading.local()
+
+
+class JobLeaseLost(Exception):
+    """The running job was requeued and claimed by another worker; stop without writing anything."""
+
+
+def register_job_handler(kind: str):
+    """Register ``func(job) -> dict | None`` as the handler for jobs of ``kind``.
+
+    The handler runs inside the worker's transaction: everything it writes is
+    committed together with the job's ``succeeded`` status, or rolled back when it
+    raises. ``ValueError`` is a permanent failure; any other exception is retried
+    with backoff until ``max_attempts`` is reached. Long handlers, and any handler
+    that commits along the way, call ``check_job_lease()`` before each side effect.
+    """
+
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue_job(
+    kind: str,
+    payload: dict,
+    company_id: int | None = None,
+    created_by: int | None = None,
+    max_attempts: int | None = None,
+) -> Job:
+    """Add a queued job to the current transaction. Workers pick it up once the caller commits."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError('unknown_job_kind')
+    job = Job(
+        kind=kind,
+        status=JobStatus.QUEUED,
+        payload=payload,
+        company_id=company_id,
+        created_by=created_by,
+        max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_after=datetime.utcnow(),
+    )
+    db.session.add(job)
+    db.session.info[JOBS_ENQUEUED_INFO_KEY] = True
+    return job
+
+
+def serialize_job(job: Job) -> dict:
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status.value,
+        'company_id': job.company_id,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _lock_token() -> str:
+    return f'{socket.gethostname()[:32]}:{os.getpid()}:{uuid.uuid4().hex[:12]}'
+
+
+def claim_job() -> Job | None:
+    """Atomically move the oldest runnable job to ``running`` and return it.
+
+    The conditional ``UPDATE ... WHERE status = 'queued'`` only succeeds for one
+    claimant, so any number of threads and processes can poll the same table.
+    """
+    now = datetime.utcnow()
+    candidates = db.session.execute(
+        select(Job.id)
+        .where(Job.status == JobStatus.QUEUED, Job.run_after <= now)
+        .order_by(Job.run_after, Job.id)
+        .limit(CLAIM_CANDIDATES)
+    ).scalars().all()
+    for job_id in candidates:
+        token = _lock_token()
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+            .values(status=JobStatus.RUNNING, locked_by=token, locked_at=now, started_at=now, attempts=Job.attempts + 1),
+            execution_options={'synchronize_session': False},
+        )
+        if result.rowcount == 1:
+            db.session.commit()
+            return db.session.get(Job, job_id)
+    db.session.rollback()
+    return None
+
+
+def requeue_stale_jobs(lease_seconds: float) -> int:
+    """Return jobs whose worker stopped renewing its lease (crash, kill -9) to the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == JobStatus.RUNNING, Job.locked_at < cutoff)
+        .values(status=JobStatus.QUEUED, locked_by=None, locked_at=None),
+        execution_options={'synchronize_session': False},
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+class JobLease:
+    """Renews a running job's ``locked_at`` from a background thread while its handler runs.
+
+    Renewals are fenced on the lock token. Once one finds the job owned by
+    another worker (it was requeued after this process stalled), the lease is
+    lost for good and ``check()`` raises ``JobLeaseLost``.
+    """
+
+    def __init__(self, app: Flask, job_id: int, token: str, interval: float):
+        self.app = app
+        self.job_id = job_id
+        self.token = token
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._lost = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-lease-{job_id}', daemon=True)
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def check(self):
+        if self._lost.is_set():
+            raise JobLeaseLost(f'job {self.job_id} lost its lease')
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def renew(self) -> bool:
+        # Its own connection: the handler's session may be mid-transaction.
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                update(Job)
+                .where(Job.id == self.job_id, Job.status == JobStatus.RUNNING, Job.locked_by == self.token)
+                .values(locked_at=datetime.utcnow())
+            )
+        return result.rowcount == 1
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stopped.wait(self.interval):
+                try:
+                    renewed = self.renew()
+                except Exception:
+                    # E.g. a busy SQLite database; the next beat retries well within the lease.
+                    logger.warning('job %s lease renewal failed', self.job_id, exc_info=True)
+                    continue
+                if not renewed:
+                    logger.warning('job %s lost its lease to another worker', self.job_id)
+                    self._lost.set()
+                    return
+
+
+def current_job_lease() -> JobLease | None:
+    """The lease of the job the calling worker thread is running, if any."""
+    return getattr(_lease_local, 'lease', None)
+
+
+def check_job_lease():
+    """Raise ``JobLeaseLost`` if the job the calling worker thread is running was taken over."""
+    lease = current_job_lease()
+    if lease is not None:
+        lease.check()
+
+
+def _finish(job_id: int, token: str, **values) -> bool:
+    # Fenced on the lock token: a worker whose lease was taken over must not overwrite the new owner.
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.RUNNING, Job.locked_by == token)
+        .values(locked_by=None, locked_at=None, **values),
+        execution_options={'synchronize_session': False},
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        logger.warning('job %s lost its lease, discarding its outcome', job_id)
+        return False
+    db.session.commit()
+    return True
+
+
+def run_job(job: Job) -> JobStatus:
+    lease = _lease_local.lease = JobLease(
+        current_app._get_current_object(), job.id, job.locked_by, current_app.config['JOB_LEASE_SECONDS'] / 4
+    )
+    lease.start()
+    try:
+        return _run_job(job, lease)
+    finally:
+        lease.stop()
+        _lease_local.lease = None
+
+
+def _run_job(job: Job, lease: JobLease) -> JobStatus:
+    job_id, token, kind = job.id, job.locked_by, job.kind
+    attempts, max_attempts = job.attempts, job.max_attempts
+    handler = JOB_HANDLERS.get(kind)
+    try:
+        if handler is None:
+            raise ValueError('unknown_job_kind')
+        result = handler(job)
+        lease.check()
+    except JobLeaseLost:
+        # The new owner runs the job from here; leave its row and side effects alone.
+        db.session.rollback()
+        logger.warning('job %s (%s) lost its lease, abandoning this run', job_id, kind)
+        return JobStatus.RUNNING
+    except Exception as exc:
+        db.session.rollback()
+        now = datetime.utcnow()
+        if isinstance(exc, ValueError) or attempts >= max_attempts:
+            logger.warning('job %s (%s) failed: %s', job_id, kind, exc)
+            _finish(job_id, token, status=JobStatus.FAILED, error=str(exc), finished_at=now)
+            return JobStatus.FAILED
+        backoff = current_app.config['JOB_RETRY_BACKOFF'] * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        logger.info('job %s (%s) attempt %s failed, retrying in %.1fs: %s', job_id, kind, attempts, backoff, exc)
+        _finish(job_id, token, status=JobStatus.QUEUED, error=str(exc), run_after=now + timedelta(seconds=backoff))
+        return JobStatus.QUEUED
+
+    if not _finish(job_id, token, status=JobStatus.SUCCEEDED, result=result or {}, error=None, finished_at=datetime.utcnow()):
+        return JobStatus.RUNNING
+    return JobStatus.SUCCEEDED
+
+
+def get_queue_counts() -> dict[str, int]:
+    rows = db.session.execute(select(Job.status, func.count()).group_by(Job.status)).all()
+    counts = {status.value: 0 for status in JobStatus}
+    counts.update({status.value: count for status, count in rows})
+    return counts
+
+
+class JobWorker:
+    """Pool of threads that claim and run queued jobs, each inside its own app context."""
+
+    def __init__(self, app: Flask, threads: int):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = app.config['JOB_POLL_INTERVAL']
+        self.lease_seconds = app.config['JOB_LEASE_SECONDS']
+        self.stats = {'claimed': 0, 'succeeded': 0, 'failed': 0, 'retried': 0, 'lease_lost': 0}
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._last_requeue = 0.0
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self.start()
+
+    def start(self):
+        # Threads do not survive a fork, so each process starts its own pool.
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f'job-worker-{index}', daemon=True) for index in range(self.threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._pid = os.getpid()
+
+    def stop(self, timeout: float | None = None):
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def wake(self):
+        if self._pid == os.getpid():
+            self._wakeup.set()
+
+    def run_once(self) -> bool:
+        """Claim and run at most one job. Must be called inside an app context."""
+        if time.monotonic() - self._last_requeue >= self.lease_seconds / 10:
+            self._last_requeue = time.monotonic()
+            requeued = requeue_stale_jobs(self.lease_seconds)
+            if requeued:
+                logger.warning('requeued %s jobs with expired leases', requeued)
+        job = claim_job()
+        if job is None:
+            return False
+        outcome = run_job(job)
+        with self._stats_lock:
+            self.stats['claimed'] += 1
+            if outcome == JobStatus.SUCCEEDED:
+                self.stats['succeeded'] += 1
+            elif outcome == JobStatus.FAILED:
+                self.stats['failed'] += 1
+            elif outcome == JobStatus.QUEUED:
+                self.stats['retried'] += 1
+            else:
+                self.stats['lease_lost'] += 1
+        return True
+
+    def drain(self) -> int:
+        """Run jobs in the calling thread until none is runnable; return how many ran."""
+        count = 0
+        with self.app.app_context():
+            while self.run_once():
+                count += 1
+        return count
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self.app.app_context():
+                try:
+                    ran = self.run_once()
+                except Exception:
+                    logger.exception('job worker iteration failed')
+                    db.session.rollback()
+                    ran = False
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def snapshot(self) -> dict:
+        return {'threads': self.threads if self._pid == os.getpid() else 0, **self.stats}
+
+
+def get_job_worker(app: Flask) -> JobWorker | None:
+    return app.extensions.get('job_worker')
+
+
+def init_job_queue(app: Flask):
+    _register_session_hooks()
+    threads = app.config.get('JOB_EMBEDDED_WORKERS', 0)
+    if threads <= 0:
+        return
+    worker = app.extensions['job_worker'] = JobWorker(app, threads)
+    # Started lazily so each gunicorn worker owns its threads after the fork.
+    app.before_request(worker.ensure_started)
+
+
+_hooks_registered = False
+
+
+def _register_session_hooks():
+    global _hooks_registered
+    if _hooks_registered:
+        return
+    _hooks_registered = True
+
+    @event.listens_for(db.session, 'after_commit')
+    def _wake_workers(session):
+        if session.info.pop(JOBS_ENQUEUED_INFO_KEY, False):
+            worker = get_job_worker(current_app)
+            if worker is not None:
+                worker.wake()
+
+    @event.listens_for(db.session, 'after_soft_rollback')
+    def _discard_enqueued(session, previous_transaction):
+        if not session.in_transaction():
+            session.info.pop(JOBS_ENQUEUED_INFO_KEY, None)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint('jobs', __name__)
+
+from . import commands, routes  # noqa: E402,F401
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import time
+
+import click
+from flask import current_app
+
+from ..job_queue import JobWorker
+from . import bp
+
+
+@bp.cli.command('worker')
+@click.option('--threads', type=int, default=None, help='Worker threads (defaults to JOB_WORKER_THREADS).')
+@click.option('--once', is_flag=True, help='Run every runnable job, then exit.')
+def worker_command(threads: int | None, once: bool):
+    """Run background jobs from the job table."""
+    worker = JobWorker(current_app._get_current_object(), threads or current_app.config['JOB_WORKER_THREADS'])
+    if once:
+        click.echo(f'ran {worker.drain()} jobs')
+        return
+
+    worker.start()
+    click.echo(f'job worker running with {worker.threads} threads')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        worker.stop(timeout=30)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from flask_login import current_user, login_required
+
+from ..api_utils import api_error, api_ok, ensure_company_scope
+from ..job_queue import serialize_job
+from ..models import Job, PlatformRole
+from . import bp
+
+
+@bp.get('/<int:job_id>')
+@login_required
+def get_job(job_id: int):
+    job = Job.query.get_or_404(job_id)
+    if job.company_id is not None:
+        allowed = ensure_company_scope(job.company_id)
+    else:
+        allowed = job.created_by == current_user.id or current_user.platform_role == PlatformRole.PLATFORM_ADMIN
+    if not allowed:
+        return api_error('forbidden', status=403)
+    return api_ok(serialize_job(job))
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hmac
+import ipaddress
+import os
+import time
+
+from flask import Flask, Response, abort, current_app, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .database import get_replica_engines
+
+# When PROMETHEUS_MULTIPROC_DIR is set before this module is imported, every value
+# below is backed by a per-process mmap file in that directory and /metrics merges
+# the files of all gunicorn workers, so any worker can answer a scrape.
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+STARTED_G_KEY = 'metrics_started'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time from request start to response headers.',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter('http_requests', 'Handled requests.', ['blueprint', 'endpoint', 'method', 'status'])
+REQUEST_ERRORS = Counter(
+    'http_request_errors', 'Requests answered with a 4xx or 5xx status.', ['blueprint', 'endpoint', 'status_class']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled.', ['blueprint'], multiprocess_mode='livesum'
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Body size of responses with a known length (streamed responses are not counted).',
+    ['blueprint', 'endpoint'],
+    buckets=SIZE_BUCKETS,
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_connections_checked_out', 'Pooled DB connections in use.', ['engine'], multiprocess_mode='livesum'
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections_open', 'Open DB connections held by the pools.', ['engine'], multiprocess_mode='livesum'
+)
+DB_POOL_CONNECTS = Counter('db_pool_connects', 'New DBAPI connections opened.', ['engine'])
+DB_POOL_INVALIDATIONS = Counter('db_pool_invalidations', 'DB connections discarded as broken.', ['engine'])
+
+LLM_LATENCY = Histogram(
+    'llm_request_duration_seconds',
+    'Chat completion calls, until the last byte of the response.',
+    ['model', 'mode', 'outcome'],
+    buckets=LLM_BUCKETS,
+)
+LLM_FIRST_TOKEN = Histogram(
+    'llm_time_to_first_token_seconds', 'Streaming calls, until the first text delta.', ['model'], buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Counter('llm_tokens', 'Tokens reported by the provider.', ['model', 'kind'])
+LLM_CACHE_HITS = Counter('llm_cache_hits', 'Chat completions answered from the completion cache.', ['model'])
+
+
+def _labels() -> tuple[str, str]:
+    # Unmatched URLs share one label so scanners cannot blow up the series count.
+    return request.blueprint or 'app', request.endpoint or 'unmatched'
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.labels(_labels()[0]).inc()
+
+
+def _finish_request(response):
+    started = g.get(STARTED_G_KEY)
+    if started is None:
+        return response
+    blueprint, endpoint = _labels()
+    REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+    if response.status_code >= 400:
+        REQUEST_ERRORS.labels(blueprint, endpoint, f'{response.status_code // 100}xx').inc()
+    if not response.is_streamed and response.content_length is not None:
+        RESPONSE_SIZE.labels(blueprint, endpoint).observe(response.content_length)
+    return response
+
+
+def _teardown_request(exc):
+    # Teardown runs even when an earlier hook failed, so the gauge cannot drift upwards.
+    if g.pop(STARTED_G_KEY, None) is not None:
+        REQUESTS_IN_FLIGHT.labels(_labels()[0]).dec()
+
+
+def instrument_engine(engine: Engine, name: str):
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    open_connections = DB_POOL_CONNECTIONS.labels(name)
+
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.labels(name).inc()
+        open_connections.inc()
+
+    @event.listens_for(engine, 'close')
+    def _close(dbapi_connection, connection_record):
+        open_connections.dec()
+
+    @event.listens_for(engine, 'close_detached')
+    def _close_detached(dbapi_connection):
+        open_connections.dec()
+
+    @event.listens_for(engine, 'checkout')
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+
+    @event.listens_for(engine, 'checkin')
+    def _checkin(dbapi_connection, connection_record):
+        # Also fires for connections invalidated while checked out; those arrive here with no DBAPI connection.
+        checked_out.dec()
+
+    @event.listens_for(engine, 'invalidate')
+    def _invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.labels(name).inc()
+
+
+def observe_llm_call(model: str, mode: str, seconds: float, outcome: str):
+    LLM_LATENCY.labels(model, mode, outcome).observe(seconds)
+
+
+def observe_llm_first_token(model: str, seconds: float):
+    LLM_FIRST_TOKEN.labels(model).observe(seconds)
+
+
+def count_llm_tokens(model: str, usage: dict | None):
+    """Add an OpenAI-style ``usage`` object (``prompt_tokens`` / ``completion_tokens``) to the token counters."""
+    if not usage:
+        return
+    for kind in ('prompt', 'completion'):
+        tokens = usage.get(f'{kind}_tokens')
+        if isinstance(tokens, int) and tokens > 0:
+            LLM_TOKENS.labels(model, kind).inc(tokens)
+
+
+def count_llm_cache_hit(model: str):
+    LLM_CACHE_HITS.labels(model).inc()
+
+
+def _scrape_allowed() -> bool:
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+            return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in current_app.config['METRICS_ALLOWED_IPS'])
+
+
+def render_metrics() -> Response:
+    # Traffic, error rates and per-model token counts are not for the public API port.
+    if not _scrape_allowed():
+        abort(404)
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app: Flask):
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        # CLI commands and the dev server also write there; only gunicorn's master creates and wipes it.
+        os.makedirs(os.environ[MULTIPROC_DIR_ENV], exist_ok=True)
+    with app.app_context():
+        instrument_engine(app.extensions['sqlalchemy'].engine, 'primary')
+    for index, engine in enumerate(get_replica_engines(app)):
+        instrument_engine(engine, f'replica{index}')
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', render_metrics, methods=['GET'])
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import enum
-from datetime import datetime
+from datetime import date, datetime
 
 from flask_login import UserMixin
-from sqlalchemy import Enum, ForeignKey, UniqueConstraint
+from sqlalchemy import Enum, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .extensions import db, login_manager
@@ -47,6 +47,29 @@ class FinancialRecordType(enum.StrEnum):
     EXPENSE = 'expense'
 
 
+class JobStatus(enum.StrEnum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
+class ExecutionStatus(enum.StrEnum):
+    QUEUED = 'queued'
+    PLANNING = 'planning'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
+class StepStatus(enum.StrEnum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+
 class UserAccount(db.Model, UserMixin, TimestampMixin):
     __tablename__ = 'user_account'
 
@@ -83,6 +106,9 @@ class Company(db.Model, TimestampMixin):
     organization_structure: Mapped[str | None] = mapped_column(db.Text)
     goals: Mapped[str | None] = mapped_column(db.Text)
     created_by: Mapped[int | None] = mapped_column(ForeignKey('user_account.id'))
+    # Bumped on commit whenever the company's data changes (see app.data_versions); drives ETags.
+    data_version: Mapped[int] = mapped_column(default=0, server_default='0', nullable=False)
+    data_changed_at: Mapped[datetime | None] = mapped_column(db.DateTime)
 
     accounts: Mapped[list['UserAccount']] = relationship(
         back_populates='company',
@@ -90,6 +116,24 @@ class Company(db.Model, TimestampMixin):
     )
     employees: Mapped[list['Employee']] = relationship(back_populates='company', cascade='all, delete-orphan')
     projects: Mapped[list['Project']] = relationship(back_populates='company', cascade='all, delete-orphan')
+    organization_roles: Mapped[list['OrganizationRole']] = relationship(
+        back_populates='company', cascade='all, delete-orphan', order_by='OrganizationRole.position'
+    )
+
+
+class OrganizationRole(db.Model, TimestampMixin):
+    """One row per role in ``Company.organization_structure``, kept in sync when the company is saved."""
+
+    __tablename__ = 'organization_role'
+    __table_args__ = (UniqueConstraint('company_id', 'name', name='uq_organization_role_company_name'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
+    name: Mapped[str] = mapped_column(db.String(128), nullable=False)
+    description: Mapped[str | None] = mapped_column(db.Text)
+    position: Mapped[int] = mapped_column(default=0)
+
+    company: Mapped['Company'] = relationship(back_populates='organization_roles')
 
 
 class Role(db.Model, TimestampMixin):
@@ -105,6 +149,7 @@ class Role(db.Model, TimestampMixin):
 
 class Employee(db.Model, TimestampMixin):
     __tablename__ = 'employee'
+    __table_args__ = (Index('ix_employee_company_id_id', 'company_id', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
@@ -124,6 +169,7 @@ class Employee(db.Model, TimestampMixin):
 
 class Project(db.Model, TimestampMixin):
     __tablename__ = 'project'
+    __table_args__ = (Index('ix_project_company_id_id', 'company_id', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
@@ -141,6 +187,7 @@ class Project(db.Model, TimestampMixin):
 
 class Task(db.Model, TimestampMixin):
     __tablename__ = 'task'
+    __table_args__ = (Index('ix_task_project_id_id', 'project_id', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey('project.id'), nullable=False)
@@ -157,30 +204,44 @@ class Task(db.Model, TimestampMixin):
 
 class TokenUsage(db.Model, TimestampMixin):
     __tablename__ = 'token_usage'
+    __table_args__ = (Index('ix_token_usage_company_id_usage_date', 'company_id', 'usage_date'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
     model: Mapped[str] = mapped_column(db.String(64), nullable=False)
     tokens_used: Mapped[int] = mapped_column(nullable=False)
     cost: Mapped[float] = mapped_column(db.Float, nullable=False)
-    usage_date: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.utcnow)
+    usage_date: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.utcnow, index=True)
     created_by: Mapped[int | None] = mapped_column(ForeignKey('user_account.id'))
 
 
 class FinancialRecord(db.Model, TimestampMixin):
     __tablename__ = 'financial_record'
+    __table_args__ = (Index('ix_financial_record_company_id_record_type_record_date', 'company_id', 'record_type', 'record_date'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
-    record_date: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.utcnow)
+    record_date: Mapped[datetime] = mapped_column(db.DateTime, default=datetime.utcnow, index=True)
     description: Mapped[str] = mapped_column(db.Text, nullable=False)
     amount: Mapped[float] = mapped_column(db.Float, nullable=False)
     record_type: Mapped[FinancialRecordType] = mapped_column(Enum(FinancialRecordType), nullable=False)
     created_by: Mapped[int | None] = mapped_column(ForeignKey('user_account.id'))
 
 
+class FinanceDailyRollup(db.Model, TimestampMixin):
+    __tablename__ = 'finance_daily_rollup'
+
+    company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), primary_key=True)
+    day: Mapped[date] = mapped_column(db.Date, primary_key=True)
+    tokens_used: Mapped[int] = mapped_column(db.BigInteger, default=0, nullable=False)
+    ai_cost: Mapped[float] = mapped_column(db.Float, default=0, nullable=False)
+    income: Mapped[float] = mapped_column(db.Float, default=0, nullable=False)
+    expense: Mapped[float] = mapped_column(db.Float, default=0, nullable=False)
+
+
 class Tool(db.Model, TimestampMixin):
     __tablename__ = 'tool'
+    __table_args__ = (Index('ix_tool_company_id_id', 'company_id', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
@@ -202,6 +263,10 @@ class ProjectEmployee(db.Model, TimestampMixin):
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_log'
+    __table_args__ = (
+        Index('ix_audit_log_company_id_created_at', 'company_id', 'created_at'),
+        Index('ix_audit_log_created_at', 'created_at'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     company_id: Mapped[int | None] = mapped_column(ForeignKey('company.id'))
@@ -219,3 +284,70 @@ class SystemSetting(db.Model, TimestampMixin):
 
     key: Mapped[str] = mapped_column(db.String(128), primary_key=True)
     value: Mapped[dict] = mapped_column(db.JSON, default=dict)
+
+
+class Job(db.Model, TimestampMixin):
+    __tablename__ = 'job'
+    __table_args__ = (Index('ix_job_status_run_after', 'status', 'run_after'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(db.String(64), nullable=False)
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    company_id: Mapped[int | None] = mapped_column(ForeignKey('company.id'))
+    payload: Mapped[dict] = mapped_column(db.JSON, default=dict)
+    result: Mapped[dict | None] = mapped_column(db.JSON)
+    error: Mapped[str | None] = mapped_column(db.Text)
+    attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(default=3, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+    locked_by: Mapped[str | None] = mapped_column(db.String(64))
+    locked_at: Mapped[datetime | None] = mapped_column(default=None)
+    started_at: Mapped[datetime | None] = mapped_column(default=None)
+    finished_at: Mapped[datetime | None] = mapped_column(default=None)
+    created_by: Mapped[int | None] = mapped_column(ForeignKey('user_account.id'))
+
+
+class TaskExecution(db.Model, TimestampMixin):
+    __tablename__ = 'task_execution'
+    __table_args__ = (Index('ix_task_execution_task_id_id', 'task_id', 'id'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    task_id: Mapped[int] = mapped_column(ForeignKey('task.id'), nullable=False)
+    company_id: Mapped[int] = mapped_column(ForeignKey('company.id'), nullable=False)
+    assignee_id: Mapped[int] = mapped_column(ForeignKey('employee.id'), nullable=False)
+    job_id: Mapped[int | None] = mapped_column(ForeignKey('job.id'))
+    status: Mapped[ExecutionStatus] = mapped_column(Enum(ExecutionStatus), default=ExecutionStatus.QUEUED, nullable=False)
+    plan_text: Mapped[str | None] = mapped_column(db.Text)
+    error: Mapped[str | None] = mapped_column(db.Text)
+    started_at: Mapped[datetime | None] = mapped_column(default=None)
+    finished_at: Mapped[datetime | None] = mapped_column(default=None)
+    duration_ms: Mapped[float | None] = mapped_column(db.Float)
+    created_by: Mapped[int | None] = mapped_column(ForeignKey('user_account.id'))
+
+    steps: Mapped[list['TaskExecutionStep']] = relationship(
+        back_populates='execution',
+        cascade='all, delete-orphan',
+        order_by='TaskExecutionStep.position',
+    )
+
+
+class TaskExecutionStep(db.Model, TimestampMixin):
+    __tablename__ = 'task_execution_step'
+    __table_args__ = (UniqueConstraint('execution_id', 'position', name='uq_task_execution_step_position'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    execution_id: Mapped[int] = mapped_column(ForeignKey('task_execution.id'), nullable=False)
+    position: Mapped[int] = mapped_column(nullable=False)
+    event: Mapped[str | None] = mapped_column(db.String(255))
+    action: Mapped[str] = mapped_column(db.Text, nullable=False)
+    tool_name: Mapped[str | None] = mapped_column(db.String(128))
+    input: Mapped[dict | list | str | None] = mapped_column(db.JSON)
+    depends_on: Mapped[list] = mapped_column(db.JSON, default=list)
+    status: Mapped[StepStatus] = mapped_column(Enum(StepStatus), default=StepStatus.PENDING, nullable=False)
+    output: Mapped[str | None] = mapped_column(db.Text)
+    error: Mapped[str | None] = mapped_column(db.Text)
+    started_at: Mapped[datetime | None] = mapped_column(default=None)
+    finished_at: Mapped[datetime | None] = mapped_column(default=None)
+    duration_ms: Mapped[float | None] = mapped_column(db.Float)
+
+    execution: Mapped['TaskExecution'] = relationship(back_populates='steps')
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+
+from .data_versions import mark_company_changed
+from .extensions import db
+from .models import Company, OrganizationRole
+
+# organization_role.name and employee.organization_role are String(128).
+ORGANIZATION_ROLE_NAME_LENGTH = 128
+
+
+def normalize_organization_role_name(name) -> str:
+    """The stored form of a role name: stripped and cut to the column length."""
+    return str(name or '').strip()[:ORGANIZATION_ROLE_NAME_LENGTH].rstrip()
+
+
+def parse_organization_roles(structure: str | None) -> list[dict[str, str]]:
+    """Normalize a company's ``organization_structure`` JSON text to ``[{'name', 'description'}]``."""
+    if not structure:
+        return []
+    try:
+        rows = json.loads(structure)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(rows, list):
+        return []
+    normalized = []
+    seen = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        # Normalized before the duplicate check: names sharing a 128-char prefix are one role.
+        name = normalize_organization_role_name(row.get('name'))
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        normalized.append({'name': name, 'description': (row.get('description') or '').strip()})
+    return normalized
+
+
+def sync_organization_roles(company: Company):
+    """Replace the company's ``organization_role`` rows with the parsed structure. The caller commits."""
+    db.session.execute(delete(OrganizationRole).where(OrganizationRole.company_id == company.id))
+    mark_company_changed(company.id)
+    roles = parse_organization_roles(company.organization_structure)
+    if roles:
+        now = datetime.utcnow()
+        db.session.execute(
+            insert(OrganizationRole),
+            [
+                {
+                    'company_id': company.id,
+                    'name': role['name'],
+                    'description': role['description'] or None,
+                    'position': position,
+                    'created_at': now,
+                    'updated_at': now,
+                }
+                for position, role in enumerate(roles)
+            ],
+        )
+
+
+def get_organization_roles(company_id: int) -> list[dict[str, str]]:
+    rows = db.session.execute(
+        select(OrganizationRole.name, OrganizationRole.description)
+        .where(OrganizationRole.company_id == company_id)
+        .order_by(OrganizationRole.position)
+    ).all()
+    return [{'name': row.name, 'description': row.description or ''} for row in rows]
+
+
+def organization_role_names(company_id: int) -> set[str]:
+    return set(db.session.execute(select(OrganizationRole.name).where(OrganizationRole.company_id == company_id)).scalars())
+
+
+def organization_role_exists(company_id: int, name: str) -> bool:
+    # Served by the (company_id, name) unique index.
+    name = normalize_organization_role_name(name)
+    return (
+        db.session.execute(
+            select(OrganizationRole.id)
+            .where(OrganizationRole.company_id == company_id, OrganizationRole.name == name)
+            .limit(1)
+        ).first()
+        is not None
+    )
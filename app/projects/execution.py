@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from flask import Flask, current_app
+from sqlalchemy import insert, update
+
+from ..ai_service import generate_structured_chat_completion
+from ..extensions import db
+from ..job_queue import (
+    JobLease,
+    JobLeaseLost,
+    check_job_lease,
+    current_job_lease,
+    register_job_handler,
+)
+from ..models import (
+    Employee,
+    ExecutionStatus,
+    Job,
+    StepStatus,
+    Task,
+    TaskExecution,
+    TaskExecutionStep,
+    Tool,
+)
+from .jobs import parse_plan_array
+
+TASK_EXECUTION_JOB = 'task.execute'
+TERMINAL_EXECUTION_STATUSES = (ExecutionStatus.SUCCEEDED, ExecutionStatus.FAILED)
+DEFAULT_AGENT_PROMPT = '你是企业AI员工，负责执行分配给你的任务动作，输出简洁的执行结果。'
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def serialize_step(step: TaskExecutionStep) -> dict:
+    return {
+        'id': step.id,
+        'position': step.position,
+        'event': step.event,
+        'action': step.action,
+        'tool_name': step.tool_name,
+        'input': step.input,
+        'depends_on': step.depends_on or [],
+        'status': step.status.value,
+        'output': step.output,
+        'error': step.error,
+        'started_at': _isoformat(step.started_at),
+        'finished_at': _isoformat(step.finished_at),
+        'duration_ms': step.duration_ms,
+    }
+
+
+def serialize_execution(execution: TaskExecution, include_steps: bool = True) -> dict:
+    data = {
+        'id': execution.id,
+        'task_id': execution.task_id,
+        'assignee_id': execution.assignee_id,
+        'job_id': execution.job_id,
+        'status': execution.status.value,
+        'error': execution.error,
+        'started_at': _isoformat(execution.started_at),
+        'finished_at': _isoformat(execution.finished_at),
+        'duration_ms': execution.duration_ms,
+    }
+    if include_steps:
+        data['steps'] = [serialize_step(step) for step in execution.steps]
+    return data
+
+
+def company_tools(company_id: int) -> dict[str, Tool]:
+    return {tool.name: tool for tool in Tool.query.filter_by(company_id=company_id, supported_by_mcp=True)}
+
+
+def build_plan_prompts(task: Task, assignee: Employee, tools: dict[str, Tool]) -> tuple[str, str]:
+    mcp_tools = [{'name': t.name, 'description': t.description, 'config': t.config} for t in tools.values()]
+    context = [
+        {'id': t.id, 'description': t.description, 'status': t.status.value, 'priority': t.priority.value}
+        for t in Task.query.filter_by(project_id=task.project_id).order_by(Task.id.asc()).all()
+    ]
+    return (
+        '你是任务执行编排助手，需要产出可执行的事件动作清单JSON数组。',
+        (
+            f'员工:{assignee.name}，组织角色:{assignee.organization_role or assignee.company_role.value}。'
+            f'员工提示词:{assignee.agent_prompt or "未提供"}。\n'
+            f'当前任务:{task.description}\n'
+            f'项目上下文:{json.dumps(context, ensure_ascii=False)}\n'
+            f'MCP工具清单:{json.dumps(mcp_tools, ensure_ascii=False)}\n'
+            '请输出JSON数组，每项包含 event, action, tool_name, input, '
+            'depends_on（所依赖的前序步骤序号数组，从0开始；可并行的步骤留空）。'
+        ),
+    )
+
+
+def save_plan(execution: TaskExecution, plan_text: str) -> int:
+    """Parse ``plan_text`` and bulk-insert one step row per action. The caller commits."""
+    items = [item for item in parse_plan_array(plan_text) if isinstance(item, dict) and item.get('action')]
+    if not items:
+        raise ValueError('invalid_plan')
+    now = datetime.utcnow()
+    rows = []
+    for position, item in enumerate(items):
+        depends_on = item.get('depends_on') or []
+        rows.append(
+            {
+                'execution_id': execution.id,
+                'position': position,
+                'event': str(item.get('event') or '')[:255] or None,
+                'action': str(item['action']),
+                'tool_name': str(item.get('tool_name') or '')[:128] or None,
+                'input': item.get('input'),
+                # Only earlier steps may be dependencies, which keeps the step graph acyclic.
+                'depends_on': sorted(
+                    {int(d) for d in depends_on if isinstance(d, int) and 0 <= d < position}
+                    if isinstance(depends_on, list)
+                    else set()
+                ),
+                'status': StepStatus.PENDING,
+                'created_at': now,
+                'updated_at': now,
+            }
+        )
+    db.session.execute(insert(TaskExecutionStep), rows)
+    execution.plan_text = plan_text
+    return len(rows)
+
+
+def fail_execution(execution_id: int, error: str):
+    execution = db.session.get(TaskExecution, execution_id)
+    execution.status = ExecutionStatus.FAILED
+    execution.error = error
+    execution.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _step_prompt(task: Task, step: TaskExecutionStep, tools: dict[str, Tool], upstream: dict[int, str]) -> str:
+    tool = tools.get(step.tool_name or '')
+    tool_text = (
+        json.dumps({'name': tool.name, 'description': tool.description, 'config': tool.config}, ensure_ascii=False)
+        if tool
+        else (step.tool_name or '无')
+    )
+    return (
+        f'当前任务:{task.description}\n'
+        f'事件:{step.event or "未提供"}\n'
+        f'动作:{step.action}\n'
+        f'工具:{tool_text}\n'
+        f'输入:{json.dumps(step.input, ensure_ascii=False)}\n'
+        f'前序步骤结果:{json.dumps(upstream, ensure_ascii=False)}\n'
+        '请执行该动作并输出结果。'
+    )
+
+
+def _check_lease(lease: JobLease | None):
+    if lease is not None:
+        lease.check()
+
+
+def _run_step(
+    app: Flask, lease: JobLease | None, step_id: int, system_prompt: str, user_prompt: str
+) -> tuple[StepStatus, str | None]:
+    with app.app_context():
+        _check_lease(lease)
+        step = db.session.get(TaskExecutionStep, step_id)
+        step.status = StepStatus.RUNNING
+        step.started_at = datetime.utcnow()
+        step.error = None
+        db.session.commit()
+
+        started = time.perf_counter()
+        try:
+            step.output = generate_structured_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt)
+            step.status = StepStatus.SUCCEEDED
+        except Exception as exc:
+            step.status = StepStatus.FAILED
+            step.error = str(exc)
+        step.finished_at = datetime.utcnow()
+        step.duration_ms = _elapsed_ms(started)
+        status, output = step.status, step.output
+        try:
+            # The new owner has reset this step to pending and reruns it.
+            _check_lease(lease)
+        except JobLeaseLost:
+            db.session.rollback()
+            raise
+        db.session.commit()
+        return status, output
+
+
+def _mark_skipped(step_id: int):
+    db.session.execute(
+        update(TaskExecutionStep)
+        .where(TaskExecutionStep.id == step_id)
+        .values(status=StepStatus.SKIPPED, error='dependency_failed', finished_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False},
+    )
+    db.session.commit()
+
+
+def _run_steps(execution: TaskExecution, task: Task, assignee: Employee, tools: dict[str, Tool]) -> dict[int, StepStatus]:
+    """Run every step whose dependencies succeeded, up to ``TASK_EXECUTION_CONCURRENCY`` at a time.
+
+    Steps that already succeeded in an earlier run are kept, so a retried or
+    resumed execution only redoes the remaining work. Once the job's lease is
+    lost no further step starts or saves its result, and ``JobLeaseLost`` is raised
+    after the steps in flight return.
+    """
+    steps = {step.position: step for step in execution.steps}
+    for step in steps.values():
+        if step.status != StepStatus.SUCCEEDED:
+            step.status = StepStatus.PENDING
+            step.error = None
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    lease = current_job_lease()
+    system_prompt = assignee.agent_prompt or DEFAULT_AGENT_PROMPT
+    statuses = {position: step.status for position, step in steps.items()}
+    outputs = {position: step.output for position, step in steps.items() if step.status == StepStatus.SUCCEEDED}
+    running = {}
+    with ThreadPoolExecutor(app.config['TASK_EXECUTION_CONCURRENCY'], thread_name_prefix='task-step') as pool:
+        while True:
+            # Leaving the pool waits for the steps in flight.
+            _check_lease(lease)
+            for position, step in sorted(steps.items()):
+                if statuses[position] != StepStatus.PENDING:
+                    continue
+                depends_on = step.depends_on or []
+                if any(statuses[d] in (StepStatus.FAILED, StepStatus.SKIPPED) for d in depends_on):
+                    statuses[position] = StepStatus.SKIPPED
+                    _mark_skipped(step.id)
+                elif all(statuses[d] == StepStatus.SUCCEEDED for d in depends_on):
+                    statuses[position] = StepStatus.RUNNING
+                    prompt = _step_prompt(task, step, tools, {d: outputs[d] for d in depends_on})
+                    running[pool.submit(_run_step, app, lease, step.id, system_prompt, prompt)] = position
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = running.pop(future)
+                statuses[position], outputs[position] = future.result()
+    return statuses
+
+
+@register_job_handler(TASK_EXECUTION_JOB)
+def run_task_execution(job: Job) -> dict:
+    """Plan the task with the model, persist one row per step, then run the steps.
+
+    Progress is committed as it happens so pollers see it and a retried job
+    resumes from the persisted steps instead of starting over.
+    """
+    execution = db.session.get(TaskExecution, job.payload['execution_id'])
+    if execution is None:
+        raise ValueError('execution_not_found')
+    task = db.session.get(Task, execution.task_id)
+    assignee = db.session.get(Employee, execution.assignee_id)
+    if task is None or assignee is None:
+        raise ValueError('assignee_not_found')
+
+    started = time.perf_counter()
+    execution.started_at = execution.started_at or datetime.utcnow()
+    execution.error = None
+    tools = company_tools(execution.company_id)
+    try:
+        if not execution.steps:
+            execution.status = ExecutionStatus.PLANNING
+            db.session.commit()
+            system_prompt, user_prompt = build_plan_prompts(task, assignee, tools)
+            plan_text = generate_structured_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt)
+            check_job_lease()
+            save_plan(execution, plan_text)
+            db.session.commit()
+            db.session.refresh(execution)
+        check_job_lease()
+        execution.status = ExecutionStatus.RUNNING
+        db.session.commit()
+        statuses = _run_steps(execution, task, assignee, tools)
+    except JobLeaseLost:
+        # The execution row belongs to the new owner now.
+        db.session.rollback()
+        raise
+    except ValueError as exc:
+        # Permanent (invalid_plan, ai_model_not_configured, ...): the job fails with the execution.
+        db.session.rollback()
+        fail_execution(execution.id, str(exc))
+        raise
+    except Exception as exc:
+        db.session.rollback()
+        last_attempt = job.attempts >= job.max_attempts
+        execution.status = ExecutionStatus.FAILED if last_attempt else ExecutionStatus.QUEUED
+        execution.error = str(exc)
+        db.session.commit()
+        raise
+
+    failed = sum(1 for status in statuses.values() if status != StepStatus.SUCCEEDED)
+    execution.status = ExecutionStatus.FAILED if failed else ExecutionStatus.SUCCEEDED
+    execution.error = f'{failed}_steps_failed' if failed else None
+    execution.finished_at = datetime.utcnow()
+    execution.duration_ms = _elapsed_ms(started)
+    return {
+        'execution_id': execution.id,
+        'status': execution.status.value,
+        'steps': len(statuses),
+        'failed_steps': failed,
+    }
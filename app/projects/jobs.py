@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from ..ai_service import generate_structured_chat_completion
+from ..data_versions import mark_company_changed
+from ..extensions import db
+from ..job_queue import check_job_lease, register_job_handler
+from ..models import Job, Priority, Project, Task, TaskStatus
+
+PROJECT_BREAKDOWN_JOB = 'project.breakdown'
+
+
+def parse_plan_array(text: str) -> list:
+    start_index = text.find('[')
+    end_index = text.rfind(']')
+    if start_index == -1 or end_index <= start_index:
+        raise ValueError('invalid_plan')
+    parsed = json.loads(text[start_index : end_index + 1])
+    if not isinstance(parsed, list):
+        raise ValueError('invalid_plan')
+    return parsed
+
+
+def _enum_or_default(enum_cls, value, default):
+    return enum_cls(value) if value in enum_cls._value2member_map_ else default
+
+
+@register_job_handler(PROJECT_BREAKDOWN_JOB)
+def breakdown_project(job: Job) -> dict:
+    """Ask the model to break the project objective into tasks and insert them in one statement."""
+    project = db.session.get(Project, job.payload['project_id'])
+    if project is None or not project.objective:
+        raise ValueError('project_not_found')
+
+    plan_text = generate_structured_chat_completion(
+        system_prompt='你是企业项目经理，输出任务拆解JSON。',
+        user_prompt=(
+            '请按以下目标输出 JSON 数组，每项包括 description, priority(low/medium/high), status(todo)。'
+            f'\n项目：{project.name}\n目标：{project.objective}'
+        ),
+    )
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'project_id': project.id,
+            'description': item['description'],
+            'status': _enum_or_default(TaskStatus, item.get('status'), TaskStatus.TODO),
+            'priority': _enum_or_default(Priority, item.get('priority'), Priority.MEDIUM),
+            'created_by': job.created_by,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for item in parse_plan_array(plan_text)
+        if isinstance(item, dict) and item.get('description')
+    ]
+    # The model call can outlast a stalled lease; never insert next to the new owner.
+    check_job_lease()
+    if rows:
+        db.session.execute(insert(Task), rows)
+        mark_company_changed(project.company_id)
+    return {'project_id': project.id, 'task_count': len(rows)}
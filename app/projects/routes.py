@@ -1,15 +1,71 @@
 from __future__ import annotations
 
-import json
+import time
+from datetime import datetime
 
-from flask import request
+from flask import current_app, request, url_for
 from flask_login import current_user, login_required
+from sqlalchemy import select
 
-from ..ai_service import generate_structured_chat_completion
-from ..api_utils import api_error, api_ok, ensure_company_scope, log_action, parse_iso_datetime
+from ..ai_service import stream_structured_chat_completion
+from ..api_utils import (
+    api_error,
+    api_ok,
+    conditional_get,
+    ensure_company_scope,
+    keyset_paginate,
+    log_action,
+    parse_iso_datetime,
+    requested_company_id,
+    sse_event,
+    sse_response,
+)
+from ..database import use_read_replica
 from ..extensions import db
-from ..models import Employee, Priority, Project, ProjectEmployee, Task, TaskStatus, Tool
+from ..job_queue import enqueue_job
+from ..models import (
+    Employee,
+    ExecutionStatus,
+    Priority,
+    Project,
+    ProjectEmployee,
+    Task,
+    TaskExecution,
+    TaskStatus,
+)
+from ..serialization import RowSerializer
+from ..task_graph import TaskGraph, creates_dependency_cycle
 from . import bp
+from .execution import (
+    TASK_EXECUTION_JOB,
+    TERMINAL_EXECUTION_STATUSES,
+    build_plan_prompts,
+    company_tools,
+    fail_execution,
+    save_plan,
+    serialize_execution,
+)
+from .jobs import PROJECT_BREAKDOWN_JOB
+
+PROJECT_FIELDS = RowSerializer('id', 'name', 'description', 'lead_id', 'objective')
+TASK_FIELDS = RowSerializer('id', 'description', 'status', 'due_date', 'priority', 'assignee_id', 'dependency_task_id')
+
+
+def _employee_displays(company_id: int, employee_ids: set[int | None]) -> dict[int, str]:
+    """Render ``name（role）`` for just the employees referenced on the current page."""
+    employee_ids.discard(None)
+    if not employee_ids:
+        return {}
+    rows = db.session.execute(
+        select(Employee.id, Employee.name, Employee.organization_role, Employee.company_role).where(
+            Employee.company_id == company_id, Employee.id.in_(employee_ids)
+        )
+    ).all()
+    return {row.id: f'{row.name}（{row.organization_role or row.company_role.value}）' for row in rows}
+
+
+def _project_company_id(project_id: int) -> int | None:
+    return db.session.execute(select(Project.company_id).where(Project.id == project_id)).scalar()
 
 
 @bp.post('')
@@ -42,42 +98,27 @@ def create_project():
     db.session.add(project)
     db.session.flush()
 
+    job = None
     if objective and data.get('auto_breakdown', True):
-        try:
-            plan_text = generate_structured_chat_completion(
-                system_prompt='你是企业项目经理，输出任务拆解JSON。',
-                user_prompt=(
-                    '请按以下目标输出 JSON 数组，每项包括 description, priority(low/medium/high), status(todo)。'
-                    f'\n项目：{project.name}\n目标：{objective}'
-                ),
-            )
-            start_index = plan_text.find('[')
-            end_index = plan_text.rfind(']')
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                parsed = json.loads(plan_text[start_index : end_index + 1])
-                if isinstance(parsed, list):
-                    for item in parsed:
-                        if not isinstance(item, dict) or not item.get('description'):
-                            continue
-                        db.session.add(
-                            Task(
-                                project_id=project.id,
-                                description=item['description'],
-                                status=TaskStatus(item.get('status', TaskStatus.TODO.value)),
-                                priority=Priority(item.get('priority', Priority.MEDIUM.value)),
-                                created_by=current_user.id,
-                            )
-                        )
-        except Exception:
-            pass
+        # The model call runs in a background job; the client polls /jobs/<job_id>.
+        job = enqueue_job(
+            PROJECT_BREAKDOWN_JOB,
+            {'project_id': project.id},
+            company_id=company_id,
+            created_by=current_user.id,
+        )
 
     log_action('project.create', 'project', str(project.id), company_id, {'name': project.name})
     db.session.commit()
+    if job is not None:
+        return api_ok({'id': project.id, 'name': project.name, 'job_id': job.id}, status=202)
     return api_ok({'id': project.id, 'name': project.name}, status=201)
 
 
 @bp.get('')
 @login_required
+@use_read_replica
+@conditional_get(requested_company_id)
 def list_projects():
     company_id = request.args.get('company_id', type=int) or current_user.company_id
     if not company_id:
@@ -85,24 +126,14 @@ def list_projects():
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
 
-    projects = Project.query.filter_by(company_id=company_id).order_by(Project.id.desc()).all()
-    employee_map = {e.id: e for e in Employee.query.filter_by(company_id=company_id).all()}
+    try:
+        projects, next_cursor = keyset_paginate(Project.query.filter_by(company_id=company_id), Project.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    lead_displays = _employee_displays(company_id, {p.lead_id for p in projects})
     return api_ok(
-        [
-            {
-                'id': p.id,
-                'name': p.name,
-                'description': p.description,
-                'lead_id': p.lead_id,
-                'objective': p.objective,
-                'lead_display': (
-                    f"{employee_map[p.lead_id].name}（{employee_map[p.lead_id].organization_role or employee_map[p.lead_id].company_role.value}）"
-                    if p.lead_id in employee_map
-                    else None
-                ),
-            }
-            for p in projects
-        ]
+        PROJECT_FIELDS.many(projects, lead_display=lambda p: lead_displays.get(p.lead_id)),
+        meta={'next_cursor': next_cursor},
     )
 
 
@@ -121,6 +152,10 @@ def create_task(project_id: int):
         assignee = Employee.query.filter_by(id=assignee_id, company_id=project.company_id).first()
         if not assignee:
             return api_error('assignee_not_found')
+    # A new task has no dependents yet, so any existing task of the project is a safe dependency.
+    dependency_task_id = data.get('dependency_task_id')
+    if dependency_task_id and not Task.query.filter_by(id=dependency_task_id, project_id=project_id).first():
+        return api_error('dependency_task_not_found')
 
     task = Task(
         project_id=project_id,
@@ -129,7 +164,7 @@ def create_task(project_id: int):
         status=TaskStatus(data.get('status', TaskStatus.TODO.value)),
         due_date=parse_iso_datetime(data.get('due_date')),
         priority=Priority(data.get('priority', Priority.MEDIUM.value)),
-        dependency_task_id=data.get('dependency_task_id'),
+        dependency_task_id=dependency_task_id,
         created_by=current_user.id,
     )
     db.session.add(task)
@@ -138,78 +173,310 @@ def create_task(project_id: int):
     return api_ok({'id': task.id, 'status': task.status.value}, status=201)
 
 
+@bp.put('/tasks/<int:task_id>')
+@login_required
+def update_task(task_id: int):
+    task = Task.query.get_or_404(task_id)
+    project = Project.query.get_or_404(task.project_id)
+    if not ensure_company_scope(project.company_id):
+        return api_error('forbidden', status=403)
+    data = request.get_json() or {}
+
+    if data.get('assignee_id'):
+        if not Employee.query.filter_by(id=data['assignee_id'], company_id=project.company_id).first():
+            return api_error('assignee_not_found')
+    if 'dependency_task_id' in data:
+        dependency_task_id = data.get('dependency_task_id') or None
+        if dependency_task_id is not None:
+            if not Task.query.filter_by(id=dependency_task_id, project_id=project.id).first():
+                return api_error('dependency_task_not_found')
+            if creates_dependency_cycle(task.id, dependency_task_id):
+                return api_error('dependency_cycle', status=409)
+        task.dependency_task_id = dependency_task_id
+
+    try:
+        if 'description' in data:
+            if not data['description']:
+                return api_error('invalid_payload')
+            task.description = data['description']
+        if 'assignee_id' in data:
+            task.assignee_id = data.get('assignee_id') or None
+        if 'status' in data:
+            task.status = TaskStatus(data['status'])
+        if 'priority' in data:
+            task.priority = Priority(data['priority'])
+        if 'due_date' in data:
+            task.due_date = parse_iso_datetime(data.get('due_date'))
+    except ValueError:
+        return api_error('invalid_payload')
+
+    log_action('task.update', 'task', str(task.id), project.company_id, {'project_id': project.id})
+    db.session.commit()
+    return api_ok({'id': task.id, 'status': task.status.value, 'dependency_task_id': task.dependency_task_id})
+
+
+@bp.get('/<int:project_id>/graph')
+@login_required
+@use_read_replica
+@conditional_get(_project_company_id)
+def get_task_graph(project_id: int):
+    """Topological order, earliest starts and critical path of the project's tasks.
+
+    ``?task_id=`` adds every task transitively blocked by that task.
+    """
+    project = Project.query.get_or_404(project_id)
+    if not ensure_company_scope(project.company_id):
+        return api_error('forbidden', status=403)
+
+    graph = TaskGraph.load(project_id)
+    try:
+        order = graph.topological_order()
+    except ValueError:
+        return api_error('dependency_cycle', status=409)
+    earliest = graph.earliest_start(order)
+    critical_path = graph.critical_path(earliest)
+    data = {
+        'project_id': project_id,
+        'tasks': [
+            {
+                'id': task_id,
+                'dependency_task_id': graph.dependency[task_id],
+                'status': graph.status[task_id].value,
+                'earliest_start': earliest[task_id],
+                'blocked': graph.is_blocked(task_id),
+            }
+            for task_id in order
+        ],
+        'critical_path': critical_path,
+        'critical_path_length': sum(graph.duration(task_id) for task_id in critical_path),
+    }
+    task_id = request.args.get('task_id', type=int)
+    if task_id is not None:
+        if task_id not in graph.status:
+            return api_error('task_not_found', status=404)
+        data['blocked_by_task'] = sorted(graph.blocked_by(task_id))
+    return api_ok(data)
+
+
 @bp.get('/<int:project_id>/tasks')
 @login_required
+@use_read_replica
+@conditional_get(_project_company_id)
 def list_tasks(project_id: int):
     project = Project.query.get_or_404(project_id)
     if not ensure_company_scope(project.company_id):
         return api_error('forbidden', status=403)
-    tasks = Task.query.filter_by(project_id=project_id).order_by(Task.id.desc()).all()
-    employee_map = {e.id: e for e in Employee.query.filter_by(company_id=project.company_id).all()}
+    try:
+        tasks, next_cursor = keyset_paginate(Task.query.filter_by(project_id=project_id), Task.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    assignee_displays = _employee_displays(project.company_id, {t.assignee_id for t in tasks})
     return api_ok(
-        [
-            {
-                'id': t.id,
-                'description': t.description,
-                'status': t.status.value,
-                'due_date': t.due_date.isoformat() if t.due_date else None,
-                'priority': t.priority.value,
-                'assignee_id': t.assignee_id,
-                'assignee_display': (
-                    f"{employee_map[t.assignee_id].name}（{employee_map[t.assignee_id].organization_role or employee_map[t.assignee_id].company_role.value}）"
-                    if t.assignee_id in employee_map
-                    else None
-                ),
-                'dependency_task_id': t.dependency_task_id,
-            }
-            for t in tasks
-        ]
+        TASK_FIELDS.many(tasks, assignee_display=lambda t: assignee_displays.get(t.assignee_id)),
+        meta={'next_cursor': next_cursor},
     )
 
 
-@bp.post('/tasks/<int:task_id>/execute')
-@login_required
-def execute_task(task_id: int):
+def _load_execution_target(task_id: int):
     task = Task.query.get_or_404(task_id)
     project = Project.query.get_or_404(task.project_id)
     if not ensure_company_scope(project.company_id):
-        return api_error('forbidden', status=403)
+        return None, api_error('forbidden', status=403)
     if not task.assignee_id:
-        return api_error('assignee_not_found')
+        return None, api_error('assignee_not_found')
 
     assignee = Employee.query.filter_by(id=task.assignee_id, company_id=project.company_id).first()
     if not assignee:
-        return api_error('assignee_not_found')
+        return None, api_error('assignee_not_found')
+    return (task, project, assignee), None
+
 
-    tools = Tool.query.filter_by(company_id=project.company_id, supported_by_mcp=True).all()
-    mcp_tools = [{'name': t.name, 'description': t.description, 'config': t.config} for t in tools]
-    context = [
-        {'id': t.id, 'description': t.description, 'status': t.status.value, 'priority': t.priority.value}
-        for t in Task.query.filter_by(project_id=project.id).order_by(Task.id.asc()).all()
-    ]
+@bp.post('/tasks/<int:task_id>/execute')
+@login_required
+def execute_task(task_id: int):
+    target, error = _load_execution_target(task_id)
+    if error:
+        return error
+    task, project, assignee = target
+
+    # Planning and step execution run in a background job; progress is polled or streamed.
+    execution = TaskExecution(
+        task_id=task.id,
+        company_id=project.company_id,
+        assignee_id=assignee.id,
+        status=ExecutionStatus.QUEUED,
+        created_by=current_user.id,
+    )
+    db.session.add(execution)
+    db.session.flush()
+    job = enqueue_job(
+        TASK_EXECUTION_JOB,
+        {'execution_id': execution.id},
+        company_id=project.company_id,
+        created_by=current_user.id,
+    )
+    db.session.flush()
+    execution.job_id = job.id
+
+    log_action('task.execute.plan', 'task', str(task.id), project.company_id, {'task_id': task.id, 'execution_id': execution.id})
+    db.session.commit()
+    data = {'task_id': task.id, 'execution_id': execution.id, 'job_id': job.id, 'status': execution.status.value}
+    if current_app.config['TASK_EXECUTION_STREAM_ENABLED']:
+        data['events_url'] = url_for('projects.stream_execution_events', execution_id=execution.id)
+    return api_ok(data, status=202)
 
+
+@bp.post('/tasks/<int:task_id>/execute/stream')
+@login_required
+def execute_task_stream(task_id: int):
+    """Stream the plan tokens over SSE, then hand the persisted steps to the execution job."""
+    if not current_app.config['TASK_EXECUTION_STREAM_ENABLED']:
+        return api_error('streaming_disabled', status=404)
+    target, error = _load_execution_target(task_id)
+    if error:
+        return error
+    task, project, assignee = target
+
+    system_prompt, user_prompt = build_plan_prompts(task, assignee, company_tools(project.company_id))
     try:
-        plan = generate_structured_chat_completion(
-            system_prompt='你是任务执行编排助手，需要产出可执行的事件动作清单JSON数组。',
-            user_prompt=(
-                f'员工:{assignee.name}，组织角色:{assignee.organization_role or assignee.company_role.value}。'
-                f'员工提示词:{assignee.agent_prompt or "未提供"}。\n'
-                f'当前任务:{task.description}\n'
-                f'项目上下文:{json.dumps(context, ensure_ascii=False)}\n'
-                f'MCP工具清单:{json.dumps(mcp_tools, ensure_ascii=False)}\n'
-                '请输出JSON数组，每项包含 event, action, tool_name, input。'
-            ),
-        )
+        deltas = stream_structured_chat_completion(system_prompt=system_prompt, user_prompt=user_prompt)
     except ValueError as exc:
         if str(exc) == 'ai_model_not_configured':
             return api_error('ai_model_not_configured')
         raise
-    except Exception:
-        return api_error('task_execution_plan_failed', status=502)
 
-    log_action('task.execute.plan', 'task', str(task.id), project.company_id, {'task_id': task.id})
+    execution = TaskExecution(
+        task_id=task.id,
+        company_id=project.company_id,
+        assignee_id=assignee.id,
+        status=ExecutionStatus.PLANNING,
+        started_at=datetime.utcnow(),
+        created_by=current_user.id,
+    )
+    db.session.add(execution)
+    db.session.flush()
+    execution_id, company_id, user_id = execution.id, project.company_id, current_user.id
+    log_action('task.execute.plan', 'task', str(task.id), company_id, {'task_id': task.id, 'execution_id': execution_id})
+    db.session.commit()
+
+    def generate():
+        finished = False
+        try:
+            yield sse_event('execution', {'execution_id': execution_id, 'status': ExecutionStatus.PLANNING.value})
+            parts = []
+            for delta in deltas:
+                parts.append(delta)
+                yield sse_event('token', {'text': delta})
+
+            execution = db.session.get(TaskExecution, execution_id)
+            step_count = save_plan(execution, ''.join(parts))
+            job = enqueue_job(TASK_EXECUTION_JOB, {'execution_id': execution_id}, company_id=company_id, created_by=user_id)
+            db.session.flush()
+            execution.job_id = job.id
+            execution.status = ExecutionStatus.QUEUED
+            db.session.commit()
+            finished = True
+            yield sse_event(
+                'done',
+                {'execution_id': execution_id, 'job_id': job.id, 'status': execution.status.value, 'steps': step_count},
+            )
+        except Exception as exc:
+            db.session.rollback()
+            code = str(exc) if isinstance(exc, ValueError) else 'task_execution_plan_failed'
+            fail_execution(execution_id, code)
+            finished = True
+            yield sse_event('error', {'execution_id': execution_id, 'message': code})
+        finally:
+            if not finished:
+                # The client went away mid-plan; leave the execution resumable.
+                db.session.rollback()
+                fail_execution(execution_id, 'stream_aborted')
+
+    return sse_response(generate())
+
+
+def _get_scoped_execution(execution_id: int) -> TaskExecution | None:
+    execution = TaskExecution.query.get_or_404(execution_id)
+    return execution if ensure_company_scope(execution.company_id) else None
+
+
+@bp.get('/executions/<int:execution_id>')
+@login_required
+def get_execution(execution_id: int):
+    execution = _get_scoped_execution(execution_id)
+    if execution is None:
+        return api_error('forbidden', status=403)
+    return api_ok(serialize_execution(execution))
+
+
+@bp.get('/executions/<int:execution_id>/events')
+@login_required
+def stream_execution_events(execution_id: int):
+    """Push step and status changes over SSE until the execution ends or ``TASK_EXECUTION_STREAM_TIMEOUT``.
+
+    Holds a worker thread per open console, so it is only offered when
+    ``TASK_EXECUTION_STREAM_ENABLED``; clients otherwise poll ``GET /executions/<id>``.
+    """
+    if not current_app.config['TASK_EXECUTION_STREAM_ENABLED']:
+        return api_error('streaming_disabled', status=404)
+    if _get_scoped_execution(execution_id) is None:
+        return api_error('forbidden', status=403)
+    interval = current_app.config['TASK_EXECUTION_STREAM_INTERVAL']
+    timeout = current_app.config['TASK_EXECUTION_STREAM_TIMEOUT']
+
+    def generate():
+        deadline = time.monotonic() + timeout
+        sent_steps: dict[int, tuple] = {}
+        sent_execution = None
+        yield 'retry: 2000\n\n'
+        while True:
+            # End the read transaction so every poll sees the workers' latest commits.
+            db.session.rollback()
+            execution = db.session.get(TaskExecution, execution_id)
+            if execution is None:
+                yield sse_event('error', {'execution_id': execution_id, 'message': 'execution_not_found'})
+                return
+            data = serialize_execution(execution)
+            for step in data.pop('steps'):
+                marker = (step['status'], step['finished_at'])
+                if sent_steps.get(step['position']) != marker:
+                    sent_steps[step['position']] = marker
+                    yield sse_event('step', step)
+            if data != sent_execution:
+                sent_execution = data
+                yield sse_event('execution', data)
+            if data['status'] in TERMINAL_EXECUTION_STATUSES:
+                yield sse_event('done', data)
+                return
+            if time.monotonic() >= deadline:
+                return
+            time.sleep(interval)
+
+    return sse_response(generate())
+
+
+@bp.post('/executions/<int:execution_id>/resume')
+@login_required
+def resume_execution(execution_id: int):
+    execution = _get_scoped_execution(execution_id)
+    if execution is None:
+        return api_error('forbidden', status=403)
+    if execution.status != ExecutionStatus.FAILED:
+        return api_error('execution_not_resumable')
+
+    job = enqueue_job(
+        TASK_EXECUTION_JOB,
+        {'execution_id': execution.id},
+        company_id=execution.company_id,
+        created_by=current_user.id,
+    )
+    db.session.flush()
+    execution.job_id = job.id
+    execution.status = ExecutionStatus.QUEUED
+    execution.finished_at = None
+    log_action('task.execute.resume', 'task', str(execution.task_id), execution.company_id, {'execution_id': execution.id})
     db.session.commit()
-    return api_ok({'task_id': task.id, 'plan': plan, 'mcp_tools': mcp_tools})
+    return api_ok({'execution_id': execution.id, 'job_id': job.id, 'status': execution.status.value}, status=202)
 
 
 @bp.post('/<int:project_id>/members')
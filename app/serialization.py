@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import enum
+from datetime import date
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Iterable
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def _default(value: Any):
+    # ISO 8601 like the routes always wrote by hand (Flask's own default is an HTTP date).
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return DefaultJSONProvider.default(value)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's stdlib provider with dates as ISO 8601 strings and enums as their values."""
+
+    backend = 'stdlib'
+    default = staticmethod(_default)
+
+
+class OrjsonJSONProvider(StdlibJSONProvider):
+    """orjson provider: responses are encoded straight to bytes, datetimes and enums natively.
+
+    Calls that pass stdlib ``json`` options (``indent=``, ``cls=`` ...) are handed
+    to the stdlib provider unchanged. Keys keep insertion order instead of being sorted.
+    """
+
+    backend = 'orjson'
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self.option).decode('utf-8')
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=self.option), mimetype=self.mimetype)
+
+
+class RowSerializer:
+    """A fixed projection of model (or result row) attributes to a JSON-ready dict.
+
+    The getters are built once per serializer. Loaded ORM instances are read
+    straight from their ``__dict__``, skipping the instrumented attribute
+    descriptors that dominate hand-written ``{'id': obj.id, ...}`` comprehensions;
+    expired or unloaded attributes and plain result rows fall back to ``getattr``.
+    Values are left as they are: datetimes and enums are encoded by the app's JSON provider.
+    """
+
+    def __init__(self, *fields: str, **computed: Callable[[Any], Any]):
+        self.fields = fields
+        self.computed = computed
+        items, attrs = itemgetter(*fields), attrgetter(*fields)
+        if len(fields) == 1:
+            # Both getters return a bare value rather than a 1-tuple for a single field.
+            items, attrs = (lambda values, get=items: (get(values),)), (lambda obj, get=attrs: (get(obj),))
+
+        def values(obj: Any) -> tuple:
+            try:
+                return items(obj.__dict__)
+            except (AttributeError, KeyError):
+                return attrs(obj)
+
+        self._values = values
+
+    def one(self, obj: Any, **extra: Callable[[Any], Any]) -> dict[str, Any]:
+        row = dict(zip(self.fields, self._values(obj)))
+        for name, compute in (self.computed | extra).items():
+            row[name] = compute(obj)
+        return row
+
+    def many(self, objs: Iterable[Any], **extra: Callable[[Any], Any]) -> list[dict[str, Any]]:
+        """Serialize ``objs``; ``extra`` adds request-specific computed fields (e.g. lookups loaded for this page)."""
+        fields, values = self.fields, self._values
+        computed = list((self.computed | extra).items())
+        if not computed:
+            return [dict(zip(fields, values(obj))) for obj in objs]
+        rows = []
+        for obj in objs:
+            row = dict(zip(fields, values(obj)))
+            for name, compute in computed:
+                row[name] = compute(obj)
+            rows.append(row)
+        return rows
+
+
+def init_json(app: Flask):
+    backend = app.config.get('JSON_BACKEND', 'auto')
+    provider_class = OrjsonJSONProvider if orjson is not None and backend != 'stdlib' else StdlibJSONProvider
+    app.json_provider_class = provider_class
+    app.json = provider_class(app)
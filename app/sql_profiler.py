@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .database import get_replica_engines
+
+logger = logging.getLogger(__name__)
+
+PROFILE_G_KEY = 'sql_profile'
+START_TIMES_INFO_KEY = 'sql_profiler_started'
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with whitespace collapsed and expanded ``IN (?, ?, ...)`` lists folded to ``(?)``."""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class RequestProfile:
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.statements[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+class SqlProfiler:
+    """Per-request SQL statement count, DB time and repeated-statement (N+1) detection.
+
+    Only installed when ``SQL_PROFILER_ENABLED`` is set; otherwise no engine
+    listener or request hook exists, so the disabled cost is nothing at all.
+    """
+
+    def __init__(self, app: Flask):
+        self.max_queries = app.config['SQL_PROFILER_MAX_QUERIES']
+        self.max_db_ms = app.config['SQL_PROFILER_MAX_DB_MS']
+        self.repeat_threshold = app.config['SQL_PROFILER_REPEAT_THRESHOLD']
+        self.stats = {'requests': 0, 'flagged': 0, 'n_plus_one': 0}
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(START_TIMES_INFO_KEY, []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info[START_TIMES_INFO_KEY].pop()
+        # Statements run by job workers or helper threads have no request to charge.
+        if has_request_context():
+            profile = g.get(PROFILE_G_KEY)
+            if profile is not None:
+                profile.record(statement, time.perf_counter() - started)
+
+    @staticmethod
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get(START_TIMES_INFO_KEY) if exception_context.connection else None
+        if started:
+            started.pop()
+
+    def start_request(self):
+        g.sql_profile = RequestProfile()
+
+    def finish_request(self, response):
+        profile: RequestProfile | None = g.pop(PROFILE_G_KEY, None)
+        if profile is None:
+            return response
+        db_ms = profile.duration * 1000
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.2f};desc="{profile.count} queries"')
+
+        repeated = profile.repeated(self.repeat_threshold)
+        flagged = bool(repeated) or profile.count > self.max_queries or db_ms > self.max_db_ms
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['flagged'] += flagged
+            self.stats['n_plus_one'] += bool(repeated)
+        if flagged:
+            logger.warning(
+                'sql profile %s %s (%s): %s queries, %.1fms db%s',
+                request.method,
+                request.path,
+                request.endpoint,
+                profile.count,
+                db_ms,
+                ''.join(f'\n  repeated x{count}: {statement[:300]}' for statement, count in repeated),
+            )
+        return response
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            'max_queries': self.max_queries,
+            'max_db_ms': self.max_db_ms,
+            'repeat_threshold': self.repeat_threshold,
+        }
+
+
+def get_sql_profiler(app: Flask) -> SqlProfiler | None:
+    return app.extensions.get('sql_profiler')
+
+
+def init_sql_profiler(app: Flask):
+    if not app.config.get('SQL_PROFILER_ENABLED'):
+        return
+    profiler = app.extensions['sql_profiler'] = SqlProfiler(app)
+    with app.app_context():
+        profiler.attach(app.extensions['sqlalchemy'].engine)
+    for engine in get_replica_engines(app):
+        profiler.attach(engine)
+    app.before_request(profiler.start_request)
+    app.after_request(profiler.finish_request)
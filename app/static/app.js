@@ -55,7 +55,7 @@ function setStatus(message, isError = false) {
   statusBar.classList.toggle('error', isError);
 }
 
-async function api(path, method = 'GET', payload) {
+async function apiRaw(path, method = 'GET', payload) {
   const res = await fetch(`/api/v1${path}`, {
     method,
     headers: { 'Content-Type': 'application/json' },
@@ -73,7 +73,111 @@ async function api(path, method = 'GET', payload) {
   if (!res.ok || json.code !== 0) {
     throw new Error(json.message || `Request failed: ${res.status}`);
   }
-  return json.data;
+  return json;
+}
+
+async function api(path, method = 'GET', payload) {
+  return (await apiRaw(path, method, payload)).data;
+}
+
+async function streamSse(path, handlers) {
+  // POST endpoints cannot use EventSource, so read the event stream off fetch.
+  const res = await fetch(`/api/v1${path}`, { method: 'POST', credentials: 'include' });
+  if (!(res.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+    let json = null;
+    try {
+      json = await res.json();
+    } catch {
+      json = { message: 'Invalid response' };
+    }
+    throw new Error(json.message || `Request failed: ${res.status}`);
+  }
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      const data = [];
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+      });
+      const payload = JSON.parse(data.join('\n') || 'null');
+      if (event === 'error') throw new Error(payload.message);
+      if (handlers[event]) handlers[event](payload);
+    }
+  }
+}
+
+function reportExecution(execution, taskId) {
+  if (execution.status === 'succeeded') setStatus(`任务 #${taskId} 执行完成`);
+  else setStatus(`任务 #${taskId} 执行失败：${execution.error || ''}`, true);
+}
+
+function reportSteps(steps, taskId) {
+  const done = steps.filter((s) => s.status === 'succeeded').length;
+  setStatus(`任务 #${taskId} 执行中：${done}/${steps.length} 个步骤完成`);
+}
+
+async function watchExecution(executionId, taskId, eventsUrl, intervalMs = 1500) {
+  if (eventsUrl) {
+    // Only offered when the server runs threaded workers; otherwise poll.
+    const source = new EventSource(eventsUrl, { withCredentials: true });
+    const steps = {};
+    source.addEventListener('step', (e) => {
+      const step = JSON.parse(e.data);
+      steps[step.position] = step;
+      reportSteps(Object.values(steps), taskId);
+    });
+    source.addEventListener('done', (e) => {
+      source.close();
+      reportExecution(JSON.parse(e.data), taskId);
+    });
+    source.addEventListener('error', (e) => {
+      if (!e.data) return; // connection dropped: EventSource reconnects by itself
+      source.close();
+      setStatus(JSON.parse(e.data).message, true);
+    });
+    return;
+  }
+  for (;;) {
+    const execution = await api(`/projects/executions/${executionId}`);
+    if (execution.status === 'succeeded' || execution.status === 'failed') {
+      reportExecution(execution, taskId);
+      return;
+    }
+    if (execution.steps.length) reportSteps(execution.steps, taskId);
+    else setStatus(`任务 #${taskId} 规划中…`);
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
+async function waitForJob(jobId, intervalMs = 1500) {
+  for (;;) {
+    const job = await api(`/jobs/${jobId}`);
+    if (job.status === 'succeeded') return job;
+    if (job.status === 'failed') throw new Error(job.error || 'job_failed');
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
+async function apiAll(path) {
+  const items = [];
+  let cursor = null;
+  do {
+    const separator = path.includes('?') ? '&' : '?';
+    const json = await apiRaw(cursor ? `${path}${separator}cursor=${encodeURIComponent(cursor)}` : path);
+    items.push(...json.data);
+    cursor = json.meta ? json.meta.next_cursor : null;
+  } while (cursor);
+  return items;
 }
 
 function renderNav() {
@@ -286,7 +390,7 @@ async function renderEmployees() {
   let organizationRoles = [];
   try {
     [employees, organizationRoles] = await Promise.all([
-      api(`/employees?company_id=${state.companyId}`),
+      apiAll(`/employees?company_id=${state.companyId}`),
       api(`/employees/organization-roles?company_id=${state.companyId}`),
     ]);
   } catch (err) {
@@ -355,15 +459,29 @@ async function renderEmployees() {
   document.getElementById('generatePromptBtn').onclick = async () => {
     const payload = Object.fromEntries(new FormData(form).entries());
     payload.company_id = state.companyId;
-    payload.generate_agent_prompt = true;
     try {
-      if (payload.editing_employee_id) {
-        const result = await api(`/employees/${payload.editing_employee_id}`, 'PUT', payload);
-        form.elements.agent_prompt.value = result.agent_prompt || '';
+      let employeeId = payload.editing_employee_id;
+      if (employeeId) {
+        await api(`/employees/${employeeId}`, 'PUT', payload);
       } else {
-        const created = await api('/employees', 'POST', payload);
-        form.elements.editing_employee_id.value = created.id;
-        form.elements.agent_prompt.value = created.agent_prompt || '';
+        employeeId = (await api('/employees', 'POST', payload)).id;
+        form.elements.editing_employee_id.value = employeeId;
+      }
+      form.elements.agent_prompt.value = '';
+      setStatus('AI 提示词生成中…');
+      try {
+        await streamSse(`/employees/${employeeId}/agent-prompt/stream`, {
+          token: ({ text }) => {
+            form.elements.agent_prompt.value += text;
+          },
+          done: (result) => {
+            form.elements.agent_prompt.value = result.agent_prompt || '';
+          },
+        });
+      } catch (err) {
+        if (err.message !== 'streaming_disabled') throw err;
+        const employee = await api(`/employees/${employeeId}`, 'PUT', { generate_agent_prompt: true });
+        form.elements.agent_prompt.value = employee.agent_prompt || '';
       }
       setStatus('AI 提示词已生成');
       await renderEmployees();
@@ -409,8 +527,8 @@ async function renderProjects() {
   let employees = [];
   try {
     [state.projects, employees] = await Promise.all([
-      api(`/projects?company_id=${state.companyId}`),
-      api(`/employees?company_id=${state.companyId}`),
+      apiAll(`/projects?company_id=${state.companyId}`),
+      apiAll(`/employees?company_id=${state.companyId}`),
     ]);
   } catch (err) {
     setStatus(err.message, true);
@@ -455,7 +573,7 @@ async function renderProjects() {
   for (const project of state.projects) {
     let tasks = [];
     try {
-      tasks = await api(`/projects/${project.id}/tasks`);
+      tasks = await apiAll(`/projects/${project.id}/tasks`);
     } catch {
       tasks = [];
     }
@@ -473,8 +591,10 @@ async function renderProjects() {
   listEl.querySelectorAll('.run-task-btn').forEach((btn) => {
     btn.onclick = async () => {
       try {
-        const result = await api(`/projects/tasks/${btn.dataset.taskId}/execute`, 'POST', {});
-        setStatus(`任务 #${result.task_id} 已生成执行计划`);
+        const taskId = btn.dataset.taskId;
+        const result = await api(`/projects/tasks/${taskId}/execute`, 'POST');
+        setStatus(`任务 #${taskId} 已进入执行队列`);
+        await watchExecution(result.execution_id, taskId, result.events_url);
       } catch (err) {
         setStatus(err.message, true);
       }
@@ -486,9 +606,14 @@ async function renderProjects() {
     const payload = Object.fromEntries(new FormData(e.target).entries());
     payload.company_id = state.companyId;
     try {
-      await api('/projects', 'POST', payload);
-      setStatus('项目创建成功');
+      const created = await api('/projects', 'POST', payload);
+      setStatus(created.job_id ? '项目创建成功，正在生成任务拆解…' : '项目创建成功');
       await renderProjects();
+      if (created.job_id) {
+        const job = await waitForJob(created.job_id);
+        setStatus(`任务拆解完成，新增 ${job.result.task_count} 个任务`);
+        if (state.activeView === 'projects') await renderProjects();
+      }
     } catch (err) {
       setStatus(err.message, true);
     }
@@ -698,7 +823,7 @@ async function renderTools() {
 
   let tools = [];
   try {
-    tools = await api(`/tools?company_id=${state.companyId}`);
+    tools = await apiAll(`/tools?company_id=${state.companyId}`);
   } catch (err) {
     setStatus(err.message, true);
   }
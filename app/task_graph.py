@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from typing import Iterable
+
+from sqlalchemy import select
+
+from .extensions import db
+from .models import Task, TaskStatus
+
+
+class TaskGraph:
+    """In-memory dependency DAG of one project's tasks.
+
+    Each task depends on at most one other task (``Task.dependency_task_id``).
+    Schedules are measured in task units: an unfinished task takes one unit and
+    a done task none, so a task's earliest start is the amount of unfinished work
+    ahead of it and the critical path is the longest chain of remaining work.
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, int | None, TaskStatus]]):
+        self.dependency: dict[int, int | None] = {}
+        self.status: dict[int, TaskStatus] = {}
+        for task_id, dependency_id, status in rows:
+            self.dependency[task_id] = dependency_id
+            self.status[task_id] = status
+        self.dependents: dict[int, list[int]] = defaultdict(list)
+        for task_id, dependency_id in self.dependency.items():
+            # References to tasks outside the project are treated as no dependency.
+            if dependency_id not in self.dependency:
+                self.dependency[task_id] = None
+            else:
+                self.dependents[dependency_id].append(task_id)
+
+    @classmethod
+    def load(cls, project_id: int) -> TaskGraph:
+        # Plain Core rows: ORM row processing dominates the build time for large projects.
+        return cls(
+            db.session.connection().execute(
+                select(Task.id, Task.dependency_task_id, Task.status).where(Task.project_id == project_id)
+            )
+        )
+
+    def topological_order(self) -> list[int]:
+        """Dependencies before dependents; raises ``ValueError('dependency_cycle')`` if the data has a cycle."""
+        queue = deque(sorted(task_id for task_id, dependency_id in self.dependency.items() if dependency_id is None))
+        order = []
+        while queue:
+            task_id = queue.popleft()
+            order.append(task_id)
+            queue.extend(self.dependents.get(task_id, ()))
+        if len(order) != len(self.dependency):
+            raise ValueError('dependency_cycle')
+        return order
+
+    def duration(self, task_id: int) -> int:
+        return 0 if self.status[task_id] == TaskStatus.DONE else 1
+
+    def earliest_start(self, order: list[int] | None = None) -> dict[int, int]:
+        earliest: dict[int, int] = {}
+        for task_id in order if order is not None else self.topological_order():
+            dependency_id = self.dependency[task_id]
+            earliest[task_id] = 0 if dependency_id is None else earliest[dependency_id] + self.duration(dependency_id)
+        return earliest
+
+    def critical_path(self, earliest: dict[int, int] | None = None) -> list[int]:
+        """The chain of tasks with the latest finish, from its first task to its last."""
+        earliest = earliest if earliest is not None else self.earliest_start()
+        if not earliest:
+            return []
+        last = max(earliest, key=lambda task_id: (earliest[task_id] + self.duration(task_id), -task_id))
+        path = [last]
+        while self.dependency[path[-1]] is not None:
+            path.append(self.dependency[path[-1]])
+        path.reverse()
+        return path
+
+    def blocked_by(self, task_id: int) -> set[int]:
+        """Every task that transitively waits on ``task_id``."""
+        blocked = set()
+        queue = deque(self.dependents.get(task_id, ()))
+        while queue:
+            current = queue.popleft()
+            if current not in blocked:
+                blocked.add(current)
+                queue.extend(self.dependents.get(current, ()))
+        return blocked
+
+    def is_blocked(self, task_id: int) -> bool:
+        dependency_id = self.dependency[task_id]
+        return dependency_id is not None and self.status[dependency_id] != TaskStatus.DONE
+
+
+def creates_dependency_cycle(task_id: int, dependency_id: int) -> bool:
+    """Whether making ``task_id`` depend on ``dependency_id`` would close a cycle.
+
+    Walks only the ancestor chain of ``dependency_id`` with a recursive CTE, so
+    the check costs one query proportional to the chain depth, not the project size.
+    """
+    if task_id == dependency_id:
+        return True
+    chain = select(Task.dependency_task_id.label('id')).where(Task.id == dependency_id).cte('chain', recursive=True)
+    # UNION (not UNION ALL) stops on chains that already loop.
+    chain = chain.union(select(Task.dependency_task_id).join(chain, Task.id == chain.c.id))
+    return db.session.execute(select(chain.c.id).where(chain.c.id == task_id).limit(1)).first() is not None
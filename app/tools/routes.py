@@ -3,11 +3,23 @@ from __future__ import annotations
 from flask import request
 from flask_login import current_user, login_required
 
-from ..api_utils import api_error, api_ok, ensure_company_scope, log_action
+from ..api_utils import (
+    api_error,
+    api_ok,
+    conditional_get,
+    ensure_company_scope,
+    keyset_paginate,
+    log_action,
+    requested_company_id,
+)
+from ..database import use_read_replica
 from ..extensions import db
 from ..models import Tool
+from ..serialization import RowSerializer
 from . import bp
 
+TOOL_FIELDS = RowSerializer('id', 'name', 'description', 'supported_by_mcp', 'config', 'updated_at')
+
 
 @bp.post('')
 @login_required
@@ -36,6 +48,8 @@ def create_tool():
 
 @bp.get('')
 @login_required
+@use_read_replica
+@conditional_get(requested_company_id)
 def list_tools():
     company_id = request.args.get('company_id', type=int) or current_user.company_id
     if not company_id:
@@ -43,18 +57,11 @@ def list_tools():
     if not ensure_company_scope(company_id):
         return api_error('forbidden', status=403)
 
-    tools = Tool.query.filter_by(company_id=company_id).order_by(Tool.id.desc()).all()
-    return api_ok([
-        {
-            'id': tool.id,
-            'name': tool.name,
-            'description': tool.description,
-            'supported_by_mcp': tool.supported_by_mcp,
-            'config': tool.config,
-            'updated_at': tool.updated_at.isoformat() if tool.updated_at else None,
-        }
-        for tool in tools
-    ])
+    try:
+        tools, next_cursor = keyset_paginate(Tool.query.filter_by(company_id=company_id), Tool.id)
+    except ValueError:
+        return api_error('invalid_cursor')
+    return api_ok(TOOL_FIELDS.many(tools), meta={'next_cursor': next_cursor})
 
 
 @bp.put('/<int:tool_id>')
@@ -0,0 +1,90 @@
+"""Compare per-call urlopen against the pooled AI provider client on the local stub LLM.
+
+Usage: python benchmarks/ai_client_latency.py [--calls 200] [--latency-ms 20] [--handshake-ms 30] [--error-rate 0.0]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib import request as urlrequest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_llm import start_stub_server  # noqa: E402
+
+PAYLOAD = json.dumps(
+    {'model': 'stub', 'messages': [{'role': 'user', 'content': 'ping'}], 'temperature': 0.2}
+).encode('utf-8')
+HEADERS = {'Authorization': 'Bearer stub', 'Content-Type': 'application/json'}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(label: str, samples: list[float], connections: int):
+    print(
+        f'{label:<10} p50={percentile(samples, 50):7.2f}ms  p99={percentile(samples, 99):7.2f}ms  '
+        f'mean={statistics.mean(samples):7.2f}ms  connections={connections}'
+    )
+
+
+def run_urlopen(base_url: str, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        req = urlrequest.Request(f'{base_url}/chat/completions', data=PAYLOAD, method='POST', headers=HEADERS)
+        with urlrequest.urlopen(req, timeout=30) as response:
+            json.loads(response.read())
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def run_pooled(base_url: str, calls: int) -> list[float]:
+    from app import create_app
+    from app.ai_client import AIProviderError, get_provider_client
+
+    samples = []
+    failed = 0
+    with create_app('testing').app_context():
+        client = get_provider_client(base_url)
+        for _ in range(calls):
+            started = time.perf_counter()
+            try:
+                json.loads(client.request('POST', '/chat/completions', body=PAYLOAD, headers=HEADERS))
+            except AIProviderError:
+                failed += 1
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f'pooled client stats: {client.snapshot()}, failed calls: {failed}')
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--handshake-ms', type=float, default=30)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency_ms, handshake_ms=args.handshake_ms, error_rate=args.error_rate)
+    base_url = f'http://127.0.0.1:{server.server_port}/v1'
+
+    pooled = run_pooled(base_url, args.calls)
+    pooled_connections = server.connections
+    baseline = run_urlopen(base_url, args.calls) if args.error_rate == 0 else None
+
+    print(f'{args.calls} calls, stub latency {args.latency_ms}ms, handshake {args.handshake_ms}ms')
+    if baseline is not None:
+        summarize('urlopen', baseline, server.connections - pooled_connections)
+    summarize('pooled', pooled, pooled_connections)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
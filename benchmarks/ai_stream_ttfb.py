@@ -0,0 +1,93 @@
+"""Time to first byte of the buffered and streaming agent prompt endpoints on the local stub LLM.
+
+Usage: python benchmarks/ai_stream_ttfb.py [--calls 20] [--latency-ms 300] [--token-ms 15] [--tokens 80]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_client_latency import percentile  # noqa: E402
+from stub_llm import start_stub_server  # noqa: E402
+
+NO_CACHE = {'Cache-Control': 'no-cache'}
+
+
+def setup(base_url: str):
+    from app import create_app
+    from app.ai_service import save_ai_model_settings
+    from app.extensions import db
+
+    app = create_app('testing')
+    app.config['AGENT_PROMPT_STREAM_ENABLED'] = True
+    with app.app_context():
+        db.create_all()
+        db.session.merge(save_ai_model_settings({'base_url': base_url, 'api_key': 'stub', 'model': 'stub'}))
+        db.session.commit()
+
+    client = app.test_client()
+    client.post(
+        '/api/v1/auth/register',
+        json={'email': 'bench@example.com', 'password': 'bench', 'full_name': 'Bench', 'platform_role': 'platform_admin'},
+    )
+    client.post('/api/v1/auth/login', json={'email': 'bench@example.com', 'password': 'bench'})
+    company = client.post('/api/v1/companies', json={'name': 'Bench', 'organization_structure': []}).json['data']
+    employee = client.post(
+        '/api/v1/employees', json={'company_id': company['id'], 'name': 'Bench', 'primary_tasks': 'benchmark'}
+    ).json['data']
+    return client, employee['id']
+
+
+def run_buffered(client, employee_id: int, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        response = client.put(f'/api/v1/employees/{employee_id}', json={'generate_agent_prompt': True}, headers=NO_CACHE)
+        assert response.json['code'] == 0, response.json
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def run_streaming(client, employee_id: int, calls: int) -> tuple[list[float], list[float]]:
+    first, total = [], []
+    for _ in range(calls):
+        started = time.perf_counter()
+        response = client.post(f'/api/v1/employees/{employee_id}/agent-prompt/stream', headers=NO_CACHE, buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+        first.append((time.perf_counter() - started) * 1000)
+        body = b''.join(chunks)
+        assert b'event: done' in body, body[-200:]
+        total.append((time.perf_counter() - started) * 1000)
+    return first, total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--token-ms', type=float, default=15)
+    parser.add_argument('--tokens', type=int, default=80)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency_ms=args.latency_ms, token_ms=args.token_ms, content='提示' * args.tokens)
+    client, employee_id = setup(f'http://127.0.0.1:{server.server_port}/v1')
+
+    buffered = run_buffered(client, employee_id, args.calls)
+    first, total = run_streaming(client, employee_id, args.calls)
+
+    print(f'{args.calls} calls, stub first-token latency {args.latency_ms}ms, {args.token_ms}ms per token')
+    print(f'{"buffered":<10} ttfb p50={percentile(buffered, 50):7.1f}ms  p99={percentile(buffered, 99):7.1f}ms')
+    print(
+        f'{"streaming":<10} ttfb p50={percentile(first, 50):7.1f}ms  p99={percentile(first, 99):7.1f}ms  '
+        f'complete p50={percentile(total, 50):7.1f}ms'
+    )
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
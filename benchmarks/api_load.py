@@ -0,0 +1,549 @@
+"""Seed synthetic tenants, drive a weighted mix of /api/v1 requests and report latency, throughput and queries per request.
+
+Runs in-process through the Flask test client or against a real gunicorn started on the same seeded database.
+Agent prompt calls go to the stub LLM from stub_llm.py. Queries per request and DB time are read from the SQL
+profiler's Server-Timing header, which this script switches on. The request sequence is drawn from ``--seed``, so two
+runs with the same arguments send the same requests; pass a previous report as ``--baseline`` to flag regressions.
+
+Usage: python benchmarks/api_load.py [--target testclient|gunicorn] [--mix read|write|mixed|llm] [--companies 3]
+       [--employees 200] [--projects 20] [--tasks 25] [--token-usage 5000] [--records 2000] [--audits 5000]
+       [--requests 2000] [--concurrency 8] [--workers 4] [--seed 1] [--output report.json] [--baseline old.json]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ai_client_latency import percentile  # noqa: E402
+from stub_llm import start_stub_server  # noqa: E402
+
+BENCH_EMAIL = 'load@signx.local'
+BENCH_PASSWORD = 'load'
+ORG_ROLES = ['CEO', 'CTO', 'Engineer', 'Designer', 'Sales', 'Support', 'Finance', 'HR']
+MODELS = ['gpt-4o-mini', 'gpt-4o', 'deepseek-chat']
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+# Weights per operation; every mix draws from the operations below.
+MIXES: dict[str, dict[str, int]] = {
+    'read': {
+        'list_employees': 20,
+        'list_projects': 15,
+        'list_tasks': 15,
+        'task_graph': 5,
+        'dashboard': 15,
+        'dashboard_series': 10,
+        'company_detail': 10,
+        'organization_roles': 5,
+        'list_audits': 5,
+    },
+    'write': {'create_token_usage': 30, 'create_record': 20, 'create_task': 25, 'update_employee': 25},
+    'mixed': {
+        'list_employees': 15,
+        'list_projects': 10,
+        'list_tasks': 12,
+        'task_graph': 3,
+        'dashboard': 12,
+        'dashboard_series': 6,
+        'company_detail': 8,
+        'organization_roles': 4,
+        'list_audits': 3,
+        'create_token_usage': 10,
+        'create_record': 5,
+        'create_task': 5,
+        'update_employee': 4,
+        'agent_prompts_batch': 3,
+    },
+    'llm': {'agent_prompts_batch': 80, 'list_employees': 20},
+}
+
+
+def build_operation(name: str, rng: random.Random, tenant: dict, days: int):
+    """``(method, path, json_body, headers)`` for one request of operation ``name`` against ``tenant``."""
+    company_id = tenant['company_id']
+    today = datetime.utcnow().replace(microsecond=0)
+    if name == 'list_employees':
+        return 'GET', f'/api/v1/employees?company_id={company_id}', None, {}
+    if name == 'list_projects':
+        return 'GET', f'/api/v1/projects?company_id={company_id}', None, {}
+    if name == 'list_tasks':
+        return 'GET', f'/api/v1/projects/{rng.choice(tenant["project_ids"])}/tasks', None, {}
+    if name == 'task_graph':
+        return 'GET', f'/api/v1/projects/{rng.choice(tenant["project_ids"])}/graph', None, {}
+    if name == 'dashboard':
+        return 'GET', f'/api/v1/finance/dashboard?company_id={company_id}', None, {}
+    if name == 'dashboard_series':
+        start = (today - timedelta(days=days)).date().isoformat()
+        return 'GET', f'/api/v1/finance/dashboard?company_id={company_id}&from={start}&granularity=week', None, {}
+    if name == 'company_detail':
+        return 'GET', f'/api/v1/companies/{company_id}', None, {}
+    if name == 'organization_roles':
+        return 'GET', f'/api/v1/employees/organization-roles?company_id={company_id}', None, {}
+    if name == 'list_audits':
+        return 'GET', f'/api/v1/admin/audits?company_id={company_id}', None, {}
+    if name == 'create_token_usage':
+        body = {'company_id': company_id, 'model': rng.choice(MODELS), 'tokens_used': rng.randint(50, 5000), 'cost': round(rng.uniform(0.0001, 0.05), 6)}
+        return 'POST', '/api/v1/finance/token-usage', body, {}
+    if name == 'create_record':
+        body = {
+            'company_id': company_id,
+            'description': 'load record',
+            'amount': round(rng.uniform(10, 5000), 2),
+            'record_type': rng.choice(['income', 'expense']),
+        }
+        return 'POST', '/api/v1/finance/records', body, {}
+    if name == 'create_task':
+        body = {'description': 'load task', 'assignee_id': rng.choice(tenant['employee_ids']), 'priority': rng.choice(['low', 'medium', 'high'])}
+        return 'POST', f'/api/v1/projects/{rng.choice(tenant["project_ids"])}/tasks', body, {}
+    if name == 'update_employee':
+        body = {'primary_tasks': f'load update {rng.randint(0, 10**6)}', 'organization_role': rng.choice(ORG_ROLES)}
+        return 'PUT', f'/api/v1/employees/{rng.choice(tenant["employee_ids"])}', body, {}
+    if name == 'agent_prompts_batch':
+        body = {'company_id': company_id, 'employee_ids': rng.sample(tenant['employee_ids'], min(5, len(tenant['employee_ids'])))}
+        # Bypass the completion cache so every call reaches the stub provider.
+        return 'POST', '/api/v1/employees/agent-prompts/batch', body, {'Cache-Control': 'no-cache'}
+    raise ValueError(f'unknown operation {name}')
+
+
+def seed(args, llm_base_url: str) -> tuple[list[dict], dict]:
+    """Bulk insert the synthetic tenants and return their ids plus row counts."""
+    from sqlalchemy import insert, select
+
+    from app import create_app
+    from app.ai_service import save_ai_model_settings
+    from app.extensions import db
+    from app.finance.rollups import rebuild_rollups
+    from app.models import (
+        AuditLog,
+        Company,
+        CompanyRole,
+        Employee,
+        FinancialRecord,
+        FinancialRecordType,
+        OrganizationRole,
+        Priority,
+        Project,
+        Task,
+        TaskStatus,
+        TokenUsage,
+    )
+
+    rng = random.Random(args.seed)
+    app = create_app('production')
+    now = datetime.utcnow().replace(microsecond=0)
+    stamps = {'created_at': now, 'updated_at': now}
+
+    def spread() -> datetime:
+        return now - timedelta(days=rng.randrange(args.days), seconds=rng.randrange(86400))
+
+    tenants = []
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post(
+            '/api/v1/auth/register',
+            json={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD, 'full_name': 'Load', 'platform_role': 'platform_admin'},
+        )
+        db.session.merge(save_ai_model_settings({'base_url': llm_base_url, 'api_key': 'stub', 'model': 'stub'}))
+        db.session.commit()
+
+        structure = json.dumps([{'name': name, 'description': None} for name in ORG_ROLES])
+        for index in range(args.companies):
+            company_id = db.session.execute(
+                insert(Company).values(name=f'Load tenant {index}', organization_structure=structure, **stamps).returning(Company.id)
+            ).scalar_one()
+            db.session.execute(
+                insert(OrganizationRole),
+                [{'company_id': company_id, 'name': name, 'position': position, **stamps} for position, name in enumerate(ORG_ROLES)],
+            )
+            db.session.execute(
+                insert(Employee),
+                [
+                    {
+                        'company_id': company_id,
+                        'name': f'emp-{index}-{i}',
+                        'primary_tasks': 'synthetic load employee',
+                        'company_role': CompanyRole.MEMBER,
+                        'organization_role': rng.choice(ORG_ROLES),
+                        **stamps,
+                    }
+                    for i in range(args.employees)
+                ],
+            )
+            employee_ids = list(db.session.scalars(select(Employee.id).where(Employee.company_id == company_id)))
+            db.session.execute(
+                insert(Project),
+                [
+                    {'company_id': company_id, 'name': f'project-{index}-{i}', 'lead_id': rng.choice(employee_ids), **stamps}
+                    for i in range(args.projects)
+                ],
+            )
+            project_ids = list(db.session.scalars(select(Project.id).where(Project.company_id == company_id)))
+            for project_id in project_ids:
+                # Inserted one by one so roughly half the tasks can depend on the previous task of the project.
+                previous = None
+                for i in range(args.tasks):
+                    previous = db.session.execute(
+                        insert(Task)
+                        .values(
+                            project_id=project_id,
+                            assignee_id=rng.choice(employee_ids),
+                            description=f'task {i}',
+                            status=rng.choice(list(TaskStatus)),
+                            priority=rng.choice(list(Priority)),
+                            dependency_task_id=previous if rng.random() < 0.5 else None,
+                            **stamps,
+                        )
+                        .returning(Task.id)
+                    ).scalar_one()
+            if args.token_usage:
+                db.session.execute(
+                    insert(TokenUsage),
+                    [
+                        {
+                            'company_id': company_id,
+                            'model': rng.choice(MODELS),
+                            'tokens_used': rng.randint(50, 5000),
+                            'cost': round(rng.uniform(0.0001, 0.05), 6),
+                            'usage_date': spread(),
+                            **stamps,
+                        }
+                        for _ in range(args.token_usage)
+                    ],
+                )
+            if args.records:
+                db.session.execute(
+                    insert(FinancialRecord),
+                    [
+                        {
+                            'company_id': company_id,
+                            'description': 'synthetic record',
+                            'amount': round(rng.uniform(10, 5000), 2),
+                            'record_type': rng.choice(list(FinancialRecordType)),
+                            'record_date': spread(),
+                            **stamps,
+                        }
+                        for _ in range(args.records)
+                    ],
+                )
+            if args.audits:
+                db.session.execute(
+                    insert(AuditLog),
+                    [
+                        {
+                            'company_id': company_id,
+                            'action': 'employee.update',
+                            'resource_type': 'employee',
+                            'resource_id': str(rng.choice(employee_ids)),
+                            'details': {},
+                            'created_at': spread(),
+                        }
+                        for _ in range(args.audits)
+                    ],
+                )
+            tenants.append({'company_id': company_id, 'employee_ids': employee_ids, 'project_ids': project_ids})
+        db.session.commit()
+        rebuild_rollups()
+        db.session.commit()
+
+    counts = {
+        'companies': args.companies,
+        'employees': args.companies * args.employees,
+        'projects': args.companies * args.projects,
+        'tasks': args.companies * args.projects * args.tasks,
+        'token_usage': args.companies * args.token_usage,
+        'financial_records': args.companies * args.records,
+        'audits': args.companies * args.audits,
+    }
+    return tenants, counts
+
+
+class TestClientTarget:
+    """In-process WSGI calls; each thread gets its own logged-in test client."""
+
+    def __init__(self):
+        from app import create_app
+
+        self.app = create_app('production')
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+            client.post('/api/v1/auth/login', json={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+        return client
+
+    def send(self, method: str, path: str, body: dict | None, headers: dict) -> tuple[int, str | None]:
+        response = self._client().open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code, response.headers.get('Server-Timing')
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """A gunicorn started with the repo's gunicorn.conf.py on a free local port."""
+
+    def __init__(self, workers: int, env: dict, log_path: str):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        env = {**env, 'GUNICORN_BIND': f'127.0.0.1:{self.port}', 'GUNICORN_WORKERS': str(workers)}
+        self.log = open(log_path, 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'wsgi:app', '--config', 'gunicorn.conf.py'],
+            cwd=ROOT,
+            env=env,
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+        self._local = threading.local()
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if self._request('GET', '/healthz', None, {})[0] == 200:
+                    break
+            except OSError:
+                pass
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f'gunicorn did not start, see {log_path}')
+            time.sleep(0.2)
+
+    def _request(self, method: str, path: str, body: dict | None, headers: dict):
+        # Sync workers close the connection after each response, so there is nothing to keep alive.
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        try:
+            payload = json.dumps(body).encode('utf-8') if body is not None else None
+            headers = {**headers, 'Content-Type': 'application/json'} if payload is not None else dict(headers)
+            cookie = getattr(self._local, 'cookie', None)
+            if cookie:
+                headers['Cookie'] = cookie
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status, response.headers
+        finally:
+            connection.close()
+
+    def send(self, method: str, path: str, body: dict | None, headers: dict) -> tuple[int, str | None]:
+        if getattr(self._local, 'cookie', None) is None:
+            _, login_headers = self._request('POST', '/api/v1/auth/login', {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}, {})
+            self._local.cookie = '; '.join(value.split(';', 1)[0] for value in login_headers.get_all('Set-Cookie') or [])
+        status, response_headers = self._request(method, path, body, headers)
+        return status, response_headers.get('Server-Timing')
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+        self.log.close()
+
+
+def run(target, plan: list[tuple[str, tuple]], concurrency: int) -> tuple[dict[str, list[dict]], float]:
+    samples: dict[str, list[dict]] = {}
+    lock = threading.Lock()
+    position = iter(range(len(plan)))
+
+    def worker(_):
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                return
+            name, (method, path, body, headers) = plan[index]
+            started = time.perf_counter()
+            status, timing = target.send(method, path, body, headers)
+            elapsed = (time.perf_counter() - started) * 1000
+            match = SERVER_TIMING.search(timing or '')
+            sample = {
+                'ms': elapsed,
+                'status': status,
+                'queries': int(match.group(2)) if match else None,
+                'db_ms': float(match.group(1)) if match else None,
+            }
+            with lock:
+                samples.setdefault(name, []).append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: list[dict], wall: float) -> dict:
+    latencies = [sample['ms'] for sample in samples]
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    db_ms = [sample['db_ms'] for sample in samples if sample['db_ms'] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'throughput_rps': round(len(samples) / wall, 1),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+        'db_ms_per_request': round(statistics.mean(db_ms), 2) if db_ms else None,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> dict:
+    """p95 and queries per request against ``baseline``; growth beyond ``threshold`` is a regression."""
+
+    def delta(current: dict, previous: dict | None) -> dict | None:
+        if not previous:
+            return None
+        result = {
+            'p95_ratio': round(current['p95_ms'] / previous['p95_ms'], 3) if previous['p95_ms'] else None,
+            'throughput_ratio': round(current['throughput_rps'] / previous['throughput_rps'], 3) if previous['throughput_rps'] else None,
+            'queries_delta': (
+                round(current['queries_per_request'] - previous['queries_per_request'], 2)
+                if current['queries_per_request'] is not None and previous.get('queries_per_request') is not None
+                else None
+            ),
+        }
+        # A whole extra query per request on average is a regression however fast the database is.
+        result['regression'] = bool((result['p95_ratio'] or 0) > 1 + threshold or (result['queries_delta'] or 0) >= 1)
+        return result
+
+    operations = {
+        name: delta(stats, baseline.get('operations', {}).get(name)) for name, stats in report['operations'].items()
+    }
+    summary = delta(report['summary'], baseline.get('summary'))
+    regressions = sorted(name for name, result in operations.items() if result and result['regression'])
+    if summary and summary['regression']:
+        regressions.insert(0, 'summary')
+    # Runs are only comparable when they sent the same requests against the same data.
+    keys = ('target', 'mix', 'seed', 'requests', 'warmup', 'concurrency', 'workers', 'database')
+    mismatched = [key for key in keys if report['meta'].get(key) != baseline.get('meta', {}).get(key)]
+    mismatched += [
+        key for key, value in report['dataset'].items() if key != 'seed_seconds' and baseline.get('dataset', {}).get(key) != value
+    ]
+    return {'summary': summary, 'operations': operations, 'regressions': regressions, 'mismatched': mismatched}
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', choices=['testclient', 'gunicorn'], default='testclient')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    parser.add_argument('--companies', type=int, default=3)
+    parser.add_argument('--employees', type=int, default=200, help='per company')
+    parser.add_argument('--projects', type=int, default=20, help='per company')
+    parser.add_argument('--tasks', type=int, default=25, help='per project')
+    parser.add_argument('--token-usage', type=int, default=5000, help='per company')
+    parser.add_argument('--records', type=int, default=2000, help='per company')
+    parser.add_argument('--audits', type=int, default=5000, help='per company')
+    parser.add_argument('--days', type=int, default=90, help='history spread of usage, records and audits')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--llm-latency-ms', type=float, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', help='empty database to seed; defaults to a temporary SQLite file')
+    parser.add_argument('--output', help='write the JSON report here as well as to stdout')
+    parser.add_argument('--baseline', help='previous report to compare against')
+    parser.add_argument('--regression-threshold', type=float, default=0.2, help='allowed p95 growth against the baseline')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    stub = start_stub_server(latency_ms=args.llm_latency_ms)
+    llm_base_url = f'http://127.0.0.1:{stub.server_port}/v1'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f'sqlite:///{tmp}/load.db'
+        # Read by the config classes at import time, so set before the app is imported; gunicorn inherits them.
+        env = {
+            'DATABASE_URL': database_url,
+            'FLASK_ENV': 'production',
+            'JOB_EMBEDDED_WORKERS': '0',
+            'SQL_PROFILER_ENABLED': 'true',
+            # Counting only: keep the profiler's threshold warnings out of the measurement.
+            'SQL_PROFILER_MAX_QUERIES': str(10**9),
+            'SQL_PROFILER_MAX_DB_MS': str(10**9),
+            'SQL_PROFILER_REPEAT_THRESHOLD': str(10**9),
+            'PROMETHEUS_MULTIPROC_DIR': f'{tmp}/prometheus',
+        }
+        os.environ.update(env)
+
+        started = time.perf_counter()
+        tenants, counts = seed(args, llm_base_url)
+        seed_seconds = time.perf_counter() - started
+
+        rng = random.Random(args.seed)
+        names, weights = zip(*MIXES[args.mix].items())
+        plan = []
+        for name in rng.choices(names, weights, k=args.warmup + args.requests):
+            plan.append((name, build_operation(name, rng, rng.choice(tenants), args.days)))
+
+        target = (
+            GunicornTarget(args.workers, dict(os.environ), f'{tmp}/gunicorn.log')
+            if args.target == 'gunicorn'
+            else TestClientTarget()
+        )
+        try:
+            run(target, plan[: args.warmup], args.concurrency)
+            stub_requests = stub.requests
+            samples, wall = run(target, plan[args.warmup :], args.concurrency)
+        finally:
+            target.close()
+            stub.shutdown()
+
+    report = {
+        'meta': {
+            'target': args.target,
+            'mix': args.mix,
+            'seed': args.seed,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+            'workers': args.workers if args.target == 'gunicorn' else None,
+            'database': database_url.split(':', 1)[0],
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+        },
+        'dataset': {**counts, 'seed_seconds': round(seed_seconds, 2)},
+        'summary': {**summarize([sample for group in samples.values() for sample in group], wall), 'wall_s': round(wall, 2)},
+        'operations': {name: summarize(group, wall) for name, group in sorted(samples.items())},
+        'stub_llm_requests': stub.requests - stub_requests,
+    }
+    if args.baseline:
+        report['comparison'] = compare(report, json.loads(Path(args.baseline).read_text()), args.regression_threshold)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    if args.fail_on_regression and report.get('comparison', {}).get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
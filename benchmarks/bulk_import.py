@@ -0,0 +1,70 @@
+"""Measure CSV bulk import throughput for employees, projects and tasks on a SQLite file.
+
+Usage: python benchmarks/bulk_import.py [--rows 20000] [--single-rows 500]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from token_usage_ingest import build_client  # noqa: E402
+
+
+def csv_body(rows: list[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def timed_import(client, company_id: int, entity: str, rows: list[dict], dry_run: bool = False) -> float:
+    query = f'company_id={company_id}' + ('&dry_run=true' if dry_run else '')
+    started = time.perf_counter()
+    data = client.post(f'/api/v1/imports/{entity}?{query}', data=csv_body(rows), content_type='text/csv').get_json()['data']
+    elapsed = time.perf_counter() - started
+    assert data['failed'] == 0, data['errors'][:5]
+    return round(len(rows) / elapsed, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--single-rows', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, company_id = build_client(f'sqlite:///{tmp}/bench.db')
+
+        started = time.perf_counter()
+        for i in range(args.single_rows):
+            client.post('/api/v1/employees', json={'company_id': company_id, 'name': f'single-{i}'})
+        single = round(args.single_rows / (time.perf_counter() - started), 1)
+
+        employees = [{'name': f'emp-{i}', 'company_role': 'member', 'primary_tasks': 'ops'} for i in range(args.rows)]
+        projects = [{'name': f'proj-{i}', 'lead_name': f'emp-{i}'} for i in range(max(1, args.rows // 10))]
+        tasks = [
+            {'project_name': f'proj-{i % len(projects)}', 'description': f'task {i}', 'assignee_name': f'emp-{i}', 'priority': 'high'}
+            for i in range(args.rows)
+        ]
+        report = {
+            'rows': args.rows,
+            'single_employee_rows_per_sec': single,
+            'employees_dry_run_rows_per_sec': timed_import(client, company_id, 'employees', employees, dry_run=True),
+            'employees_rows_per_sec': timed_import(client, company_id, 'employees', employees),
+            'projects_rows_per_sec': timed_import(client, company_id, 'projects', projects),
+            'tasks_rows_per_sec': timed_import(client, company_id, 'tasks', tasks),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""CPU cost of turning a large task list into an api_ok response: hand-built dicts vs RowSerializer, stdlib vs orjson.
+
+Usage: python benchmarks/json_serialization.py [--rows 10000] [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def build_tasks(rows: int):
+    from app.models import Priority, Task, TaskStatus
+
+    statuses, priorities = list(TaskStatus), list(Priority)
+    base = datetime(2026, 1, 1, 9, 30)
+    return [
+        Task(
+            id=i,
+            project_id=1,
+            description=f'task {i} description',
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            due_date=base + timedelta(hours=i) if i % 3 else None,
+            assignee_id=i % 50 or None,
+            dependency_task_id=i - 1 if i % 2 else None,
+        )
+        for i in range(rows)
+    ]
+
+
+def legacy_rows(tasks, displays):
+    return [
+        {
+            'id': t.id,
+            'description': t.description,
+            'status': t.status.value,
+            'due_date': t.due_date.isoformat() if t.due_date else None,
+            'priority': t.priority.value,
+            'assignee_id': t.assignee_id,
+            'assignee_display': displays.get(t.assignee_id),
+            'dependency_task_id': t.dependency_task_id,
+        }
+        for t in tasks
+    ]
+
+
+def measure(app, build, repeat: int) -> dict:
+    from app.api_utils import api_ok
+
+    samples = []
+    size = 0
+    with app.test_request_context():
+        for _ in range(repeat):
+            started = time.process_time()
+            response, _ = api_ok(build(), meta={'next_cursor': None})
+            size = len(response.get_data())
+            samples.append((time.process_time() - started) * 1000)
+    return {'cpu_ms_median': round(statistics.median(samples), 2), 'cpu_ms_min': round(min(samples), 2), 'bytes': size}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.projects.routes import TASK_FIELDS
+    from app.serialization import OrjsonJSONProvider, StdlibJSONProvider, orjson
+
+    app = create_app('testing')
+    tasks = build_tasks(args.rows)
+    displays = {i: f'emp-{i}（Engineer）' for i in range(50)}
+
+    def serialized():
+        return TASK_FIELDS.many(tasks, assignee_display=lambda t: displays.get(t.assignee_id))
+
+    report = {'rows': args.rows}
+    providers = [('stdlib', StdlibJSONProvider)] + ([('orjson', OrjsonJSONProvider)] if orjson else [])
+    for backend, provider_class in providers:
+        app.json = provider_class(app)
+        report[f'dict_comprehension+{backend}'] = measure(app, lambda: legacy_rows(tasks, displays), args.repeat)
+        report[f'row_serializer+{backend}'] = measure(app, serialized, args.repeat)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
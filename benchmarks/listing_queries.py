@@ -0,0 +1,97 @@
+"""Query count and latency of project and task listings as company headcount grows.
+
+Usage: python benchmarks/listing_queries.py [--headcounts 100,1000,10000,50000] [--tasks 3] [--calls 50]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from token_usage_ingest import build_client  # noqa: E402
+
+
+def seed(company_id: int, headcount: int, tasks: int) -> int:
+    from sqlalchemy import insert
+
+    from app.extensions import db
+    from app.models import CompanyRole, Employee, Project, Task
+
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(Employee),
+        [
+            {'company_id': company_id, 'name': f'emp-{i}', 'company_role': CompanyRole.MEMBER, 'created_at': now, 'updated_at': now}
+            for i in range(headcount)
+        ],
+    )
+    lead_id = db.session.query(Employee.id).filter_by(company_id=company_id).order_by(Employee.id.desc()).first()[0]
+    project = Project(company_id=company_id, name=f'bench-{headcount}', lead_id=lead_id)
+    db.session.add(project)
+    db.session.flush()
+    for i in range(tasks):
+        db.session.add(Task(project_id=project.id, description=f'task {i}', assignee_id=lead_id - i))
+    db.session.commit()
+    return project.id
+
+
+def measure(client, engine, path: str, calls: int) -> dict:
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(*_):
+        statements.append(1)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    samples = []
+    try:
+        for _ in range(calls):
+            statements.clear()
+            started = time.perf_counter()
+            response = client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.get_json()['code'] == 0
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return {'queries': len(statements), 'p50_ms': round(statistics.median(samples), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--headcounts', default='100,1000,10000,50000')
+    parser.add_argument('--tasks', type=int, default=3)
+    parser.add_argument('--calls', type=int, default=50)
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        client, company_id = build_client(f'sqlite:///{tmp}/bench.db')
+        from app.extensions import db
+
+        for headcount in (int(value) for value in args.headcounts.split(',')):
+            if report:
+                # Each headcount gets its own company; creating it moves the bench user into it.
+                company_id = client.post('/api/v1/companies', json={'name': f'Bench {headcount}'}).get_json()['data']['id']
+            with client.application.app_context():
+                project_id = seed(company_id, headcount, args.tasks)
+                engine = db.engine
+            report.append(
+                {
+                    'headcount': headcount,
+                    'list_projects': measure(client, engine, f'/api/v1/projects?company_id={company_id}', args.calls),
+                    'list_tasks': measure(client, engine, f'/api/v1/projects/{project_id}/tasks', args.calls),
+                }
+            )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
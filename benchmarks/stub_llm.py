@@ -0,0 +1,128 @@
+"""OpenAI-compatible chat-completion stub for local benchmarks.
+
+Usage: python benchmarks/stub_llm.py [--port 8990] [--latency-ms 20] [--handshake-ms 30] [--token-ms 0] [--error-rate 0.0]
+
+``--latency-ms`` is the time to the first token, ``--token-ms`` the delay between
+tokens (requests with ``"stream": true`` get them as SSE chunks),
+``--handshake-ms`` delays every new connection to approximate a TCP+TLS handshake,
+``--error-rate`` answers that fraction of requests with 503 to exercise retries.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+TOKEN_CHARS = 4
+
+
+def make_handler(latency_ms: float, handshake_ms: float, error_rate: float, content: str, token_ms: float = 0):
+    tokens = [content[i : i + TOKEN_CHARS] for i in range(0, len(content), TOKEN_CHARS)]
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            self.server.connections += 1
+            time.sleep(handshake_ms / 1000)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+        def _send_stream(self, request_body: dict):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for index, token in enumerate(tokens):
+                if index:
+                    time.sleep(token_ms / 1000)
+                chunk = {'model': request_body.get('model'), 'choices': [{'index': 0, 'delta': {'content': token}}]}
+                self._write_chunk(f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n'.encode('utf-8'))
+            self._write_chunk(b'data: [DONE]\n\n')
+            self._write_chunk(b'')
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            request_body = json.loads(self.rfile.read(length) or b'{}')
+            self.server.requests += 1
+            time.sleep(latency_ms / 1000)
+            if not self.path.endswith('/chat/completions'):
+                self._send_json(404, {'error': 'not_found'})
+                return
+            if random.random() < error_rate:
+                self._send_json(503, {'error': 'overloaded'})
+                return
+            if request_body.get('stream'):
+                self._send_stream(request_body)
+                return
+            time.sleep(token_ms * len(tokens) / 1000)
+            self._send_json(
+                200,
+                {
+                    'id': 'stub',
+                    'object': 'chat.completion',
+                    'model': request_body.get('model'),
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                    'usage': {'prompt_tokens': 10, 'completion_tokens': 10, 'total_tokens': 20},
+                },
+            )
+
+    return StubHandler
+
+
+def start_stub_server(
+    port: int = 0,
+    latency_ms: float = 20,
+    handshake_ms: float = 30,
+    error_rate: float = 0.0,
+    content: str = 'stub completion',
+    token_ms: float = 0,
+) -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread and return the server (``server.server_port`` holds the port)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency_ms, handshake_ms, error_rate, content, token_ms))
+    server.daemon_threads = True
+    server.connections = 0
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, name='stub-llm', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8990)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--handshake-ms', type=float, default=30)
+    parser.add_argument('--token-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency_ms, args.handshake_ms, args.error_rate, token_ms=args.token_ms)
+    print(f'stub LLM listening on http://127.0.0.1:{server.server_port}/v1')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Build time of the task dependency graph and the /projects/<id>/graph endpoint for a large project.
+
+Usage: python benchmarks/task_graph.py [--tasks 50000] [--fan-out 2]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from token_usage_ingest import build_client  # noqa: E402
+
+
+def seed(company_id: int, tasks: int, fan_out: int) -> tuple[int, int]:
+    from sqlalchemy import func, insert
+
+    from app.extensions import db
+    from app.models import Project, Task, TaskStatus
+
+    project = Project(company_id=company_id, name='graph bench')
+    db.session.add(project)
+    db.session.flush()
+    first_id = (db.session.query(func.max(Task.id)).scalar() or 0) + 1
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(Task),
+        [
+            {
+                'id': first_id + i,
+                'project_id': project.id,
+                'description': f'task {i}',
+                # A forest of fan-out trees: task i waits on task (i - 1) // fan_out.
+                'dependency_task_id': first_id + (i - 1) // fan_out if i else None,
+                'status': TaskStatus.DONE if i % 7 == 0 else TaskStatus.TODO,
+                'created_at': now,
+                'updated_at': now,
+            }
+            for i in range(tasks)
+        ],
+    )
+    db.session.commit()
+    return project.id, first_id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--fan-out', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, company_id = build_client(f'sqlite:///{tmp}/bench.db')
+        with client.application.app_context():
+            from app.task_graph import TaskGraph
+
+            project_id, first_id = seed(company_id, args.tasks, args.fan_out)
+            started = time.perf_counter()
+            graph = TaskGraph.load(project_id)
+            loaded = time.perf_counter()
+            order = graph.topological_order()
+            earliest = graph.earliest_start(order)
+            critical_path = graph.critical_path(earliest)
+            blocked = graph.blocked_by(first_id)
+            finished = time.perf_counter()
+
+        started_request = time.perf_counter()
+        response = client.get(f'/api/v1/projects/{project_id}/graph?task_id={first_id}')
+        request_ms = (time.perf_counter() - started_request) * 1000
+        assert response.get_json()['code'] == 0
+
+        started_update = time.perf_counter()
+        response = client.put(f'/api/v1/projects/tasks/{first_id}', json={'dependency_task_id': first_id + args.tasks - 1})
+        update_ms = (time.perf_counter() - started_update) * 1000
+        assert response.get_json()['message'] == 'dependency_cycle'
+
+    print(
+        json.dumps(
+            {
+                'tasks': args.tasks,
+                'load_ms': round((loaded - started) * 1000, 1),
+                'analysis_ms': round((finished - loaded) * 1000, 1),
+                'critical_path_tasks': len(critical_path),
+                'blocked_by_root': len(blocked),
+                'graph_endpoint_ms': round(request_ms, 1),
+                'cycle_rejecting_update_ms': round(update_ms, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
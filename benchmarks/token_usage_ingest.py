@@ -0,0 +1,79 @@
+"""Compare single-row and batch token usage ingestion through the Flask test client.
+
+Usage: python benchmarks/token_usage_ingest.py [--rows 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def build_client(database_url: str):
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/api/v1/auth/register', json={'email': 'bench@signx.local', 'password': 'bench', 'full_name': 'Bench'})
+    client.post('/api/v1/auth/login', json={'email': 'bench@signx.local', 'password': 'bench'})
+    company_id = client.post('/api/v1/companies', json={'name': 'Bench Co'}).get_json()['data']['id']
+    return client, company_id
+
+
+def usage_rows(company_id: int, count: int) -> list[dict]:
+    return [
+        {'company_id': company_id, 'model': 'gpt-4o-mini', 'tokens_used': 100 + i, 'cost': 0.001, 'usage_date': f'2026-01-{i % 28 + 1:02d}T10:00:00'}
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, company_id = build_client(f'sqlite:///{tmp}/bench.db')
+        rows = usage_rows(company_id, args.rows)
+
+        started = time.perf_counter()
+        for row in rows:
+            client.post('/api/v1/finance/token-usage', json=row)
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        client.post('/api/v1/finance/token-usage/batch', json=rows)
+        batch_json = time.perf_counter() - started
+
+        body = '\n'.join(json.dumps(row) for row in rows)
+        started = time.perf_counter()
+        client.post('/api/v1/finance/token-usage/batch', data=body, content_type='application/x-ndjson')
+        batch_ndjson = time.perf_counter() - started
+
+    print(
+        json.dumps(
+            {
+                'rows': args.rows,
+                'single_rows_per_sec': round(args.rows / single, 1),
+                'batch_json_rows_per_sec': round(args.rows / batch_json, 1),
+                'batch_ndjson_rows_per_sec': round(args.rows / batch_ndjson, 1),
+                'speedup_json': round(single / batch_json, 1),
+                'speedup_ndjson': round(single / batch_ndjson, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Hammer a running SignX server with concurrent writes and report throughput and failures.
+
+Start the stack first (e.g. ``docker compose up``), then:
+
+    python benchmarks/write_concurrency.py --base-url http://127.0.0.1:5500 --threads 16 --requests 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib import request as urlrequest
+from urllib.error import HTTPError, URLError
+
+
+def make_opener():
+    return urlrequest.build_opener(urlrequest.HTTPCookieProcessor(CookieJar()))
+
+
+def call(opener, base_url: str, path: str, payload: dict | None = None, method: str = 'POST'):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urlrequest.Request(f'{base_url}/api/v1{path}', data=data, method=method, headers={'Content-Type': 'application/json'})
+    with opener.open(req, timeout=60) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://127.0.0.1:5500')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='requests per thread')
+    args = parser.parse_args()
+
+    email = f'load-{uuid.uuid4().hex[:8]}@signx.local'
+    setup = make_opener()
+    call(setup, args.base_url, '/auth/register', {'email': email, 'password': 'load', 'full_name': 'Load'})
+    call(setup, args.base_url, '/auth/login', {'email': email, 'password': 'load'})
+    company_id = call(setup, args.base_url, '/companies', {'name': f'Load {uuid.uuid4().hex[:8]}'})['data']['id']
+
+    latencies: list[float] = []
+    failures: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def worker(_):
+        opener = make_opener()
+        call(opener, args.base_url, '/auth/login', {'email': email, 'password': 'load'})
+        for i in range(args.requests):
+            payload = {'company_id': company_id, 'model': 'load', 'tokens_used': 10, 'cost': 0.001}
+            path = '/finance/token-usage' if i % 2 == 0 else '/tools'
+            if path == '/tools':
+                payload = {'company_id': company_id, 'name': f'tool-{i}'}
+            started = time.perf_counter()
+            try:
+                call(opener, args.base_url, path, payload)
+                error = None
+            except HTTPError as exc:
+                error = f'http_{exc.code}'
+            except URLError as exc:
+                error = type(exc.reason).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    failures[error] = failures.get(error, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(worker, range(args.threads)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    print(
+        json.dumps(
+            {
+                'threads': args.threads,
+                'requests': total,
+                'failures': failures,
+                'writes_per_sec': round((total - sum(failures.values())) / wall, 1),
+                'p50_ms': round(statistics.median(latencies) * 1000, 2),
+                'p99_ms': round(latencies[min(total - 1, int(total * 0.99))] * 1000, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
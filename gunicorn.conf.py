@@ -0,0 +1,43 @@
+"""Gunicorn settings: threaded workers and Prometheus multiprocess metrics shared by all workers.
+
+Workers default to ``gthread`` so long-lived responses (SSE) occupy a thread
+rather than a whole worker; the SSE endpoints (task execution, agent prompt) are
+only enabled under a threaded or async worker class, with caps kept below ``timeout``.
+
+Every worker writes its metric values to mmap files in PROMETHEUS_MULTIPROC_DIR
+and /metrics merges them. The directory is emptied when the master starts so
+counters from a previous run are not summed in, and a dead worker's live gauges
+are dropped as soon as it exits.
+"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5500')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+# Read by the app when the workers import it, like PROMETHEUS_MULTIPROC_DIR below.
+for stream in ('TASK_EXECUTION_STREAM', 'AGENT_PROMPT_STREAM'):
+    if worker_class in ('gthread', 'gevent', 'eventlet'):
+        os.environ.setdefault(f'{stream}_ENABLED', 'true')
+        if float(os.getenv(f'{stream}_TIMEOUT', '25')) >= timeout:
+            os.environ[f'{stream}_TIMEOUT'] = str(timeout / 2)
+    else:
+        # A sync worker would be tied up for the whole stream and killed at ``timeout``.
+        os.environ[f'{stream}_ENABLED'] = 'false'
+
+# Must be in the environment before the app (and prometheus_client) is imported by the workers.
+multiproc_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-metrics')
+
+
+def on_starting(server):
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
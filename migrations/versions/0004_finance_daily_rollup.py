@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_finance_daily_rollup'
+down_revision = '0003_employee_org_role'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'finance_daily_rollup',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('tokens_used', sa.BigInteger(), nullable=False),
+        sa.Column('ai_cost', sa.Float(), nullable=False),
+        sa.Column('income', sa.Float(), nullable=False),
+        sa.Column('expense', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id']),
+        sa.PrimaryKeyConstraint('company_id', 'day'),
+    )
+
+    # Backfill from the raw tables. The ORM persists enum member names for record_type.
+    op.execute(
+        """
+        INSERT INTO finance_daily_rollup (company_id, day, tokens_used, ai_cost, income, expense, created_at, updated_at)
+        SELECT company_id, day, SUM(tokens_used), SUM(ai_cost), SUM(income), SUM(expense), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM (
+            SELECT company_id, DATE(usage_date) AS day, tokens_used, cost AS ai_cost, 0 AS income, 0 AS expense
+            FROM token_usage
+            UNION ALL
+            SELECT company_id, DATE(record_date) AS day, 0, 0,
+                   CASE WHEN record_type = 'INCOME' THEN amount ELSE 0 END,
+                   CASE WHEN record_type = 'EXPENSE' THEN amount ELSE 0 END
+            FROM financial_record
+        ) AS src
+        GROUP BY company_id, day
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('finance_daily_rollup')
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0005_finance_date_indexes'
+down_revision = '0004_finance_daily_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_token_usage_usage_date', 'token_usage', ['usage_date'])
+    op.create_index('ix_financial_record_record_date', 'financial_record', ['record_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_financial_record_record_date', table_name='financial_record')
+    op.drop_index('ix_token_usage_usage_date', table_name='token_usage')
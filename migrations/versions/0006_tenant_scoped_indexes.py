@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0006_tenant_scoped_indexes'
+down_revision = '0005_finance_date_indexes'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) matching the tenant-scoped list/dashboard queries.
+INDEXES = [
+    ('ix_employee_company_id_id', 'employee', ['company_id', 'id']),
+    ('ix_project_company_id_id', 'project', ['company_id', 'id']),
+    ('ix_task_project_id_id', 'task', ['project_id', 'id']),
+    ('ix_tool_company_id_id', 'tool', ['company_id', 'id']),
+    ('ix_audit_log_company_id_created_at', 'audit_log', ['company_id', 'created_at']),
+    ('ix_audit_log_created_at', 'audit_log', ['created_at']),
+    ('ix_token_usage_company_id_usage_date', 'token_usage', ['company_id', 'usage_date']),
+    (
+        'ix_financial_record_company_id_record_type_record_date',
+        'financial_record',
+        ['company_id', 'record_type', 'record_date'],
+    ),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_job_queue'
+down_revision = '0006_tenant_scoped_indexes'
+branch_labels = None
+depends_on = None
+
+# The ORM persists enum member names.
+job_status_enum = sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('status', job_status_enum, nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=64), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id']),
+        sa.ForeignKeyConstraint(['created_by'], ['user_account.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_status_run_after', 'job', ['status', 'run_after'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_status_run_after', table_name='job')
+    op.drop_table('job')
+    job_status_enum.drop(op.get_bind(), checkfirst=True)
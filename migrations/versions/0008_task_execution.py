@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_task_execution'
+down_revision = '0007_job_queue'
+branch_labels = None
+depends_on = None
+
+# The ORM persists enum member names.
+execution_status_enum = sa.Enum('QUEUED', 'PLANNING', 'RUNNING', 'SUCCEEDED', 'FAILED', name='executionstatus')
+step_status_enum = sa.Enum('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED', 'SKIPPED', name='stepstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_execution',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('assignee_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('status', execution_status_enum, nullable=False),
+        sa.Column('plan_text', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Float(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['task.id']),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id']),
+        sa.ForeignKeyConstraint(['assignee_id'], ['employee.id']),
+        sa.ForeignKeyConstraint(['job_id'], ['job.id']),
+        sa.ForeignKeyConstraint(['created_by'], ['user_account.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_task_execution_task_id_id', 'task_execution', ['task_id', 'id'])
+    op.create_table(
+        'task_execution_step',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('execution_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(length=255), nullable=True),
+        sa.Column('action', sa.Text(), nullable=False),
+        sa.Column('tool_name', sa.String(length=128), nullable=True),
+        sa.Column('input', sa.JSON(), nullable=True),
+        sa.Column('depends_on', sa.JSON(), nullable=False),
+        sa.Column('status', step_status_enum, nullable=False),
+        sa.Column('output', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['execution_id'], ['task_execution.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('execution_id', 'position', name='uq_task_execution_step_position'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_execution_step')
+    op.drop_index('ix_task_execution_task_id_id', table_name='task_execution')
+    op.drop_table('task_execution')
+    step_status_enum.drop(op.get_bind(), checkfirst=True)
+    execution_status_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009_organization_role'
+down_revision = '0008_task_execution'
+branch_labels = None
+depends_on = None
+
+
+def _parse_roles(structure: str | None) -> list[dict[str, str]]:
+    # Frozen copy of app.org_roles.parse_organization_roles so the backfill does not drift with the app.
+    if not structure:
+        return []
+    try:
+        rows = json.loads(structure)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(rows, list):
+        return []
+    roles, seen = [], set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        # Cut to the column length before the duplicate check, like the app does.
+        name = str(row.get('name') or '').strip()[:128].rstrip()
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        roles.append({'name': name, 'description': (row.get('description') or '').strip() or None})
+    return roles
+
+
+def upgrade() -> None:
+    organization_role = op.create_table(
+        'organization_role',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=128), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('company_id', 'name', name='uq_organization_role_company_name'),
+    )
+
+    now = datetime.utcnow()
+    companies = op.get_bind().execute(
+        sa.text('SELECT id, organization_structure FROM company WHERE organization_structure IS NOT NULL')
+    )
+    rows = [
+        {
+            'company_id': company_id,
+            'name': role['name'],
+            'description': role['description'],
+            'position': position,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for company_id, structure in companies
+        for position, role in enumerate(_parse_roles(structure))
+    ]
+    if rows:
+        op.bulk_insert(organization_role, rows)
+
+
+def downgrade() -> None:
+    op.drop_table('organization_role')
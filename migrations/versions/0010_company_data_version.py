@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0010_company_data_version'
+down_revision = '0009_organization_role'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('company') as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('data_changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('company') as batch_op:
+        batch_op.drop_column('data_changed_at')
+        batch_op.drop_column('data_version')
@@ -0,0 +1,74 @@
+"""The async audit sink must not lose rows of a committed transaction.
+
+The rows are spooled before the commit, so a process that dies between the
+commit and the hand-off to the in-process queue leaves them on disk for the
+next flush to replay; a rollback discards them.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app import create_app
+from app.audit_sink import SPOOL_PREFIX, STAGED_SUFFIX, _encode, init_audit_sink, queue_audit
+from app.extensions import db
+from app.models import AuditLog
+
+
+@pytest.fixture()
+def sink(tmp_path):
+    app = create_app('testing')
+    app.config.update(AUDIT_SINK='async', AUDIT_SINK_SPOOL_DIR=str(tmp_path), AUDIT_SINK_FLUSH_INTERVAL=3600)
+    init_audit_sink(app)
+    with app.app_context():
+        db.create_all()
+        yield app.extensions['audit_sink']
+        db.drop_all()
+
+
+def _row(action: str) -> dict:
+    return {'action': action, 'resource_type': 'test', 'details': {}, 'created_at': datetime.utcnow()}
+
+
+def _staged(sink) -> list:
+    return sorted(sink.spool_dir.glob(f'{SPOOL_PREFIX}*{STAGED_SUFFIX}'))
+
+
+def test_rows_are_spooled_before_the_commit(sink, monkeypatch):
+    seen = []
+    submit = sink.submit
+    monkeypatch.setattr(sink, 'submit', lambda rows: seen.append([path.read_text() for path in _staged(sink)]) or submit(rows))
+
+    queue_audit(sink, _row('committed'))
+    db.session.commit()
+
+    assert len(seen) == 1 and '"committed"' in seen[0][0]
+    assert _staged(sink) == []
+    assert sink.flush() == 1
+    assert db.session.scalar(select(AuditLog.action)) == 'committed'
+
+
+def test_rollback_discards_staged_rows(sink):
+    queue_audit(sink, _row('rolled_back'))
+    db.session.rollback()
+    db.session.commit()
+
+    assert _staged(sink) == []
+    assert sink.queue_depth() == 0
+
+
+def test_staged_rows_of_a_dead_process_are_replayed(sink):
+    queue_audit(sink, _row('started'))
+    db.session.commit()
+    dead = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+    staged = sink.spool_dir / f'{SPOOL_PREFIX}{int(dead.stdout)}-staged1{STAGED_SUFFIX}'
+    staged.write_text(_encode(_row('crashed')) + '\n', encoding='utf-8')
+
+    sink.flush()
+
+    assert sorted(db.session.scalars(select(AuditLog.action))) == ['crashed', 'started']
+    assert not staged.exists()
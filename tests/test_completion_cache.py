@@ -0,0 +1,51 @@
+"""The SQLite tier of the completion cache must stay cheap to write to.
+
+Eviction is batched: it runs once every ``disk_evict_interval`` writes, and the
+TTL sweep it runs must be served by the ``created_at`` index instead of
+scanning the table.
+"""
+from __future__ import annotations
+
+import time
+
+from app.completion_cache import CompletionCache
+
+
+def _disk_rows(cache: CompletionCache) -> int:
+    return cache._connection().execute('SELECT COUNT(*) FROM completion_cache').fetchone()[0]
+
+
+def test_disk_eviction_runs_every_interval_writes(tmp_path):
+    cache = CompletionCache(
+        ttl=60, max_entries=100, disk_path=str(tmp_path / 'cache.sqlite3'), disk_max_entries=3, disk_evict_interval=4
+    )
+    for index in range(3):
+        cache.set(f'k{index}', 'v')
+    cache.set('k3', 'v')  # the 4th write evicts down to the limit, least recently used first
+    assert _disk_rows(cache) == 3
+    assert cache.stats['evictions'] == 1
+    assert cache._connection().execute("SELECT 1 FROM completion_cache WHERE key = 'k0'").fetchone() is None
+
+    for index in range(4, 7):
+        cache.set(f'k{index}', 'v')
+    assert _disk_rows(cache) == 6  # over the limit until the next eviction is due
+    cache.set('k7', 'v')
+    assert _disk_rows(cache) == 3
+
+
+def test_disk_eviction_drops_expired_rows(tmp_path):
+    cache = CompletionCache(ttl=60, max_entries=100, disk_path=str(tmp_path / 'cache.sqlite3'), disk_evict_interval=2)
+    connection = cache._connection()
+    connection.execute(
+        'INSERT INTO completion_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+        ('stale', 'v', time.time() - 120, time.time() - 120),
+    )
+    cache.set('a', 'v')
+    cache.set('b', 'v')
+    assert _disk_rows(cache) == 2
+
+    plan = '\n'.join(
+        row[-1]
+        for row in connection.execute('EXPLAIN QUERY PLAN DELETE FROM completion_cache WHERE created_at <= ?', (0,))
+    )
+    assert 'ix_completion_cache_created_at' in plan, plan
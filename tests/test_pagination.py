@@ -0,0 +1,55 @@
+"""Cursors are client input: malformed ones must be rejected with 400 ``invalid_cursor``."""
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+
+
+@pytest.fixture(scope='module')
+def client():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post(
+            '/api/v1/auth/register',
+            json={'email': 'admin@example.com', 'password': 'p', 'full_name': 'Admin', 'platform_role': 'platform_admin'},
+        )
+        assert client.post('/api/v1/auth/login', json={'email': 'admin@example.com', 'password': 'p'}).status_code == 200
+        client.post('/api/v1/companies', json={'name': 'Acme'})
+        yield client
+        db.session.remove()
+        db.drop_all()
+
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize(
+    'url, values',
+    [
+        ('/api/v1/employees?company_id=1', [{'a': 1}]),
+        ('/api/v1/employees?company_id=1', [[1]]),
+        ('/api/v1/employees?company_id=1', ['1']),
+        ('/api/v1/employees?company_id=1', [True]),
+        ('/api/v1/employees?company_id=1', [1, 2]),
+        ('/api/v1/admin/audits', [5, 1]),
+        ('/api/v1/admin/audits', ['not a date', 1]),
+        ('/api/v1/admin/audits', ['2026-01-01T00:00:00', {'id': 1}]),
+    ],
+)
+def test_tampered_cursor_is_rejected(client, url, values):
+    response = client.get(f'{url}&cursor={_cursor(values)}' if '?' in url else f'{url}?cursor={_cursor(values)}')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'invalid_cursor'
+
+
+def test_well_formed_cursor_is_accepted(client):
+    response = client.get(f'/api/v1/admin/audits?cursor={_cursor(["2026-01-01T00:00:00", 1])}')
+    assert response.status_code == 200
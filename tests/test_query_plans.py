@@ -0,0 +1,93 @@
+"""The keyset-paginated list endpoints must be served by their tenant-scoped index on SQLite.
+
+Each endpoint is called through the test client (first page and a page reached
+through its cursor); the list statement it actually ran is captured and fed to
+``EXPLAIN QUERY PLAN``. A plan without the index, or one that sorts with a temp
+B-tree, means the query reads the whole table and gets slower with every row.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def seeded(app):
+    client = app.test_client()
+    client.post(
+        '/api/v1/auth/register',
+        json={'email': 'admin@example.com', 'password': 'p', 'full_name': 'Admin', 'platform_role': 'platform_admin'},
+    )
+    assert client.post('/api/v1/auth/login', json={'email': 'admin@example.com', 'password': 'p'}).status_code == 200
+    company_id = client.post('/api/v1/companies', json={'name': 'Acme'}).get_json()['data']['id']
+    project_id = client.post('/api/v1/projects', json={'company_id': company_id, 'name': 'P'}).get_json()['data']['id']
+    for index in range(3):
+        client.post('/api/v1/employees', json={'company_id': company_id, 'name': f'E{index}'})
+        client.post('/api/v1/projects', json={'company_id': company_id, 'name': f'P{index}'})
+        client.post(f'/api/v1/projects/{project_id}/tasks', json={'description': f'T{index}'})
+        client.post('/api/v1/tools', json={'company_id': company_id, 'name': f'Tool{index}'})
+    return client, company_id, project_id
+
+
+def _captured_selects(url: str, client, table: str) -> tuple[list[tuple[str, Any]], dict]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and f'FROM {table}' in statement and 'ORDER BY' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, response.get_json()
+    return statements, response.get_json()
+
+
+def _plan(statement: str, parameters) -> str:
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    return '\n'.join(row[-1] for row in rows)
+
+
+LIST_ENDPOINTS = [
+    ('employees', '/api/v1/employees?company_id={company_id}', 'employee', 'ix_employee_company_id_id'),
+    ('projects', '/api/v1/projects?company_id={company_id}', 'project', 'ix_project_company_id_id'),
+    ('tools', '/api/v1/tools?company_id={company_id}', 'tool', 'ix_tool_company_id_id'),
+    ('tasks', '/api/v1/projects/{project_id}/tasks', 'task', 'ix_task_project_id_id'),
+    ('audits', '/api/v1/admin/audits?company_id={company_id}', 'audit_log', 'ix_audit_log_company_id_created_at'),
+    ('audits_all', '/api/v1/admin/audits', 'audit_log', 'ix_audit_log_created_at'),
+]
+
+
+@pytest.mark.parametrize('name, url, table, index', LIST_ENDPOINTS, ids=[endpoint[0] for endpoint in LIST_ENDPOINTS])
+def test_list_endpoint_uses_index(seeded, name, url, table, index):
+    client, company_id, project_id = seeded
+    url = url.format(company_id=company_id, project_id=project_id)
+    separator = '&' if '?' in url else '?'
+
+    first_page, body = _captured_selects(f'{url}{separator}limit=1', client, table)
+    cursor = body['meta']['next_cursor']
+    assert cursor, 'the seed data must span more than one page'
+    next_page, _ = _captured_selects(f'{url}{separator}limit=1&cursor={cursor}', client, table)
+
+    for statement, parameters in (*first_page, *next_page):
+        plan = _plan(statement, parameters)
+        assert f'USING INDEX {index}' in plan or f'USING COVERING INDEX {index}' in plan, plan
+        assert 'USE TEMP B-TREE FOR ORDER BY' not in plan, plan
+    assert first_page and next_page
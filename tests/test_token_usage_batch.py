@@ -0,0 +1,42 @@
+"""Row validation of ``POST /finance/token-usage/batch``."""
+from __future__ import annotations
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+
+
+@pytest.fixture()
+def client():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post(
+            '/api/v1/auth/register',
+            json={'email': 'admin@example.com', 'password': 'p', 'full_name': 'Admin', 'platform_role': 'platform_admin'},
+        )
+        assert client.post('/api/v1/auth/login', json={'email': 'admin@example.com', 'password': 'p'}).status_code == 200
+        yield client
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.mark.parametrize('cost', ['nan', 'inf', '-inf', 'NaN', 'Infinity'])
+def test_non_finite_cost_is_rejected(client, cost):
+    company_id = client.post('/api/v1/companies', json={'name': 'Acme'}).get_json()['data']['id']
+    rows = [
+        {'company_id': company_id, 'model': 'm', 'tokens_used': 10, 'cost': cost},
+        {'company_id': company_id, 'model': 'm', 'tokens_used': 5, 'cost': 0.5},
+    ]
+
+    response = client.post('/api/v1/finance/token-usage/batch', json=rows)
+
+    assert response.status_code == 201
+    data = response.get_json()['data']
+    assert data['inserted'] == 1
+    assert data['errors'] == [{'index': 0, 'error': 'invalid_payload'}]
+    dashboard = client.get(f'/api/v1/finance/dashboard?company_id={company_id}').get_json()['data']
+    assert dashboard['ai_cost'] == 0.5
+    assert dashboard['tokens_used'] == 5